@@ -0,0 +1,174 @@
+"""
+Categorical encoders for high-cardinality columns such as merchant_id and user_id.
+Supports a dictionary-backed mode with a fixed vocabulary budget and a
+stateless feature-hashing mode. Both encode a full column in vectorized time
+and map unseen categories deterministically.
+"""
+
+import numpy as np
+import pandas as pd
+
+class DictionaryEncoder:
+    """
+    Maps categories to integer codes through a fitted vocabulary.
+
+    Codes follow LabelEncoder (sorted categories, 0..k-1) when sort=True.
+    New categories can be appended with partial_fit without changing the
+    codes already assigned. Unseen values map to unknown_value.
+    """
+
+    def __init__(self, max_categories=None, sort=True, unknown_value=-1):
+        """
+        Args:
+            max_categories (int): Vocabulary budget; keeps the most frequent values.
+            sort (bool): Assign codes in sorted category order at fit time.
+            unknown_value (int): Code returned for unseen categories.
+        """
+        self.max_categories = max_categories
+        self.sort = sort
+        self.unknown_value = unknown_value
+        self.categories_ = None
+        self._index = None
+
+    def _top_categories(self, values, limit):
+        counts = pd.Series(values).dropna().value_counts(sort=False)
+        if limit is not None and len(counts) > limit:
+            # Order by count, then by value, so the kept set is deterministic.
+            order = np.lexsort((counts.index.to_numpy(), -counts.to_numpy()))
+            counts = counts.iloc[order[:limit]]
+        return counts.index.to_numpy()
+
+    def fit(self, values):
+        categories = self._top_categories(values, self.max_categories)
+        if self.sort:
+            categories = np.sort(categories)
+        self.categories_ = categories
+        self._index = pd.Index(categories)
+        return self
+
+    def partial_fit(self, values):
+        """
+        Appends unseen categories to the vocabulary while budget remains.
+        """
+        if self.categories_ is None:
+            return self.fit(values)
+        new = self._top_categories(values, None)
+        new = new[self._index.get_indexer(new) == -1]
+        if self.max_categories is not None:
+            new = new[:max(self.max_categories - len(self.categories_), 0)]
+        if len(new):
+            self.categories_ = np.concatenate([self.categories_, new])
+            self._index = pd.Index(self.categories_)
+        return self
+
+    def transform(self, values):
+        if self._index is None:
+            raise RuntimeError("DictionaryEncoder must be fitted before transform")
+        codes = self._index.get_indexer(np.asarray(values))
+        if self.unknown_value != -1:
+            codes[codes == -1] = self.unknown_value
+        return codes
+
+    def fit_transform(self, values):
+        return self.fit(values).transform(values)
+
+    @property
+    def n_codes(self):
+        return len(self.categories_)
+
+    def get_state(self):
+        return {
+            "type": "dict",
+            "max_categories": self.max_categories,
+            "sort": self.sort,
+            "unknown_value": self.unknown_value,
+            "categories": self.categories_,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        encoder = cls(state["max_categories"], sort=state["sort"], unknown_value=state["unknown_value"])
+        encoder.categories_ = state["categories"]
+        encoder._index = pd.Index(encoder.categories_)
+        return encoder
+
+class HashingEncoder:
+    """
+    Maps categories to one of n_buckets codes with a keyed, deterministic hash.
+
+    Needs no vocabulary, so memory is fixed regardless of cardinality and new
+    merchants or users are encoded without refitting. Distinct values may
+    collide in the same bucket.
+    """
+
+    def __init__(self, n_buckets=2 ** 18, hash_key="fraud-detect-fed"):
+        """
+        Args:
+            n_buckets (int): Number of hash buckets (codes 0..n_buckets-1).
+            hash_key (str): 16-character key for pandas' SipHash.
+        """
+        if n_buckets <= 0:
+            raise ValueError("n_buckets must be a positive integer")
+        if len(hash_key.encode("utf8")) != 16:
+            raise ValueError("hash_key must be exactly 16 bytes")
+        self.n_buckets = n_buckets
+        self.hash_key = hash_key
+
+    def fit(self, values):
+        return self
+
+    def partial_fit(self, values):
+        return self
+
+    def transform(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind in "OUST":
+            # Strings hash by content; numbers hash by value.
+            values = values.astype(object)
+        hashed = pd.util.hash_array(values, hash_key=self.hash_key, categorize=True)
+        return (hashed % np.uint64(self.n_buckets)).astype(np.int64)
+
+    def fit_transform(self, values):
+        return self.transform(values)
+
+    @property
+    def n_codes(self):
+        return self.n_buckets
+
+    def get_state(self):
+        return {"type": "hash", "n_buckets": self.n_buckets, "hash_key": self.hash_key}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["n_buckets"], hash_key=state["hash_key"])
+
+ENCODERS = {
+    "dict": DictionaryEncoder,
+    "hash": HashingEncoder,
+}
+
+def make_encoder(spec="dict", **kwargs):
+    """
+    Returns an encoder from a name ('dict' or 'hash') or passes an instance through.
+    """
+    if not isinstance(spec, str):
+        return spec
+    if spec not in ENCODERS:
+        raise ValueError(f"Unsupported encoder '{spec}'. Choose from {list(ENCODERS)}.")
+    return ENCODERS[spec](**kwargs)
+
+def encoder_from_state(state):
+    """
+    Rebuilds an encoder from the dict returned by its get_state().
+    """
+    return ENCODERS[state["type"]].from_state(state)
+
+# Example usage
+if __name__ == "__main__":
+    merchants = np.array(["M303", "M301", "M305", "M303", "M302"])
+
+    dict_encoder = DictionaryEncoder(max_categories=3).fit(merchants)
+    print("Dictionary codes:", dict_encoder.transform(np.array(["M303", "M999"])))
+
+    hash_encoder = HashingEncoder(n_buckets=1024)
+    print("Hashed codes:", hash_encoder.transform(np.array(["M303", "M999"])))
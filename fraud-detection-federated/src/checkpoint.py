@@ -0,0 +1,195 @@
+"""
+Atomic, compact checkpoints for federated training state.
+A checkpoint is one compressed .npz file holding every array of a nested
+state (server weights, optimizer slots, compressor residuals, ...) plus a
+JSON description of the structure and the round metrics. Files are written
+to a temporary name, fsynced and renamed into place, so a crash mid-write
+never leaves a truncated "latest" checkpoint.
+"""
+
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+
+_CHECKPOINT_RE = re.compile(r"^round-(\d+)\.npz$")
+
+# === State Encoding ===
+# Nested dicts/lists/tuples of arrays and scalars are split into a JSON tree
+# and a flat list of arrays; arrays are referenced from the tree by index.
+# Dict keys keep their type (clients are keyed by int), so dicts are stored
+# as [key, value] pairs.
+
+def _encode(obj, arrays):
+    if isinstance(obj, np.ndarray):
+        arrays.append(obj)
+        return {"__array__": len(arrays) - 1}
+    if isinstance(obj, dict):
+        return {"__dict__": [[k, _encode(v, arrays)] for k, v in obj.items()]}
+    if isinstance(obj, (list, tuple)):
+        return {"__list__": [_encode(v, arrays) for v in obj], "tuple": isinstance(obj, tuple)}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+def _decode(node, arrays):
+    if isinstance(node, dict):
+        if "__array__" in node:
+            return arrays[node["__array__"]]
+        if "__dict__" in node:
+            return {(tuple(k) if isinstance(k, list) else k): _decode(v, arrays) for k, v in node["__dict__"]}
+        if "__list__" in node:
+            items = [_decode(v, arrays) for v in node["__list__"]]
+            return tuple(items) if node.get("tuple") else items
+    return node
+
+def save_state(path, state, metadata=None, compress=True):
+    """
+    Atomically writes a nested state to a single .npz file.
+
+    Args:
+        path (str): Destination file.
+        state: Nested dicts/lists of NumPy arrays and JSON-serializable scalars.
+        metadata (dict): Extra JSON-serializable information (round, metrics, ...).
+        compress (bool): Use zip deflate compression.
+    """
+    arrays = []
+    tree = _encode(state, arrays)
+    header = json.dumps({"tree": tree, "metadata": metadata or {}})
+    payload = {f"a{i}": a for i, a in enumerate(arrays)}
+    payload["__header__"] = np.frombuffer(header.encode("utf-8"), dtype=np.uint8)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            (np.savez_compressed if compress else np.savez)(f, **payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; match a normally created file.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_state(path):
+    """
+    Reads a file written by save_state.
+
+    Returns:
+        The nested state.
+        dict: The stored metadata.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(data["__header__"].tobytes().decode("utf-8"))
+        n_arrays = len(data.files) - 1
+        arrays = [data[f"a{i}"] for i in range(n_arrays)]
+    return _decode(header["tree"], arrays), header["metadata"]
+
+# === Checkpoint Directory ===
+
+class CheckpointManager:
+    """
+    Keeps round-numbered checkpoints in a directory.
+
+    save() writes round-000042.npz every `every` rounds (and always when
+    forced), then deletes all but the newest `keep` checkpoints. restore()
+    loads the newest one, refusing checkpoints written with another run config.
+    """
+
+    def __init__(self, directory, every=1, keep=3, compress=True, config=None):
+        """
+        Args:
+            directory (str): Checkpoint directory (created if missing).
+            every (int): Save every N rounds.
+            keep (int): Number of most recent checkpoints to keep (None keeps all).
+            compress (bool): Compress the checkpoint files.
+            config (dict): JSON-serializable run settings (optimizer, compressor,
+                scheduler, ...) stored with every checkpoint and checked on restore.
+        """
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        if keep is not None and keep < 1:
+            # keep=0 would delete the checkpoint just written.
+            raise ValueError("keep must be >= 1 (or None to keep all checkpoints)")
+        self.directory = directory
+        # Round-tripped through JSON so it compares equal to a restored copy.
+        self.config = None if config is None else json.loads(json.dumps(config))
+        self.every = every
+        self.keep = keep
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+        # Temporary files left behind by a write that was interrupted.
+        for name in os.listdir(directory):
+            if name.startswith(".tmp-"):
+                os.remove(os.path.join(directory, name))
+
+    def path_for(self, round_num):
+        return os.path.join(self.directory, f"round-{round_num:06d}.npz")
+
+    def checkpoints(self):
+        """
+        Returns [(round, path)] for every checkpoint in the directory, oldest first.
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            match = _CHECKPOINT_RE.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def latest(self):
+        """
+        Returns the path of the newest checkpoint, or None.
+        """
+        found = self.checkpoints()
+        return found[-1][1] if found else None
+
+    def save(self, round_num, state, metadata=None, force=False):
+        """
+        Saves a checkpoint if round_num is due (or force is set).
+
+        Returns:
+            str: The checkpoint path, or None if nothing was written.
+        """
+        if not force and round_num % self.every:
+            return None
+        path = self.path_for(round_num)
+        save_state(path, state, dict(metadata or {}, round=round_num, config=self.config), compress=self.compress)
+        self._prune()
+        return path
+
+    def restore(self, path=None):
+        """
+        Loads the given checkpoint or the newest one.
+
+        Returns:
+            The nested state and its metadata, or (None, None) if there is no checkpoint.
+
+        Raises:
+            ValueError: If the checkpoint was saved with a different run config.
+        """
+        path = path or self.latest()
+        if path is None:
+            return None, None
+        state, metadata = load_state(path)
+        saved = metadata.get("config")
+        if self.config is not None and saved != self.config:
+            changed = sorted(k for k in set(self.config) | set(saved or {})
+                             if (saved or {}).get(k) != self.config.get(k))
+            raise ValueError(f"Checkpoint {path} was saved with a different run config "
+                             f"(differs in {changed}: saved {saved}, current {self.config}). "
+                             f"Restore the original settings or start over without resuming.")
+        return state, metadata
+
+    def _prune(self):
+        if self.keep is None:
+            return
+        found = self.checkpoints()
+        for _, path in found[:max(0, len(found) - self.keep)]:
+            os.remove(path)
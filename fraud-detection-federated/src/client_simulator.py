@@ -5,9 +5,9 @@ Enhanced for edge case handling, analysis, and reproducibility.
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import logging
 from collections import Counter
+from client_shards import ShardedDataset
 
 logging.basicConfig(level=logging.INFO)
 
@@ -21,30 +21,26 @@ def ensure_numpy(X, y):
         y = y.values
     return X, y
 
-def stratified_split(X, y, num_clients):
+def stratified_split(X, y, num_clients, seed=42, lazy=False):
     """
     Attempts a stratified split to preserve label proportions across clients.
+    Works even when a class has fewer rows than there are clients.
     """
-    from sklearn.model_selection import StratifiedKFold
-    skf = StratifiedKFold(n_splits=num_clients, shuffle=True, random_state=42)
-    client_data = []
-    for _, idx in skf.split(X, y):
-        client_data.append((X[idx], y[idx]))
-    return client_data
+    X, y = ensure_numpy(X, y)
+    shards = ShardedDataset(X, y).partition(num_clients, seed=seed, stratify=True)
+    return shards if lazy else [shard.materialize() for shard in shards]
 
-def analyze_distribution(y, title="Label Distribution"):
+def analyze_distribution(y, title="Label Distribution", reporter=None):
     """
-    Plots the distribution of labels in a pie chart.
+    Renders the distribution of labels as a pie chart to the run directory.
     """
-    counter = Counter(y)
-    labels = list(counter.keys())
-    sizes = list(counter.values())
-    plt.figure(figsize=(5, 5))
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140)
-    plt.title(title)
-    plt.show()
+    from plot_reporter import default_reporter
+
+    counter = Counter(np.asarray(y).tolist())
+    return (reporter or default_reporter()).pie(list(counter.keys()), list(counter.values()), title=title)
 
-def split_clients(X, y, num_clients=3, shuffle=True, seed=None, stratify=False, analyze=False):
+def split_clients(X, y, num_clients=3, shuffle=True, seed=None, stratify=False, analyze=False, lazy=False,
+                  reporter=None):
     """
     Splits dataset into federated clients.
 
@@ -56,35 +52,32 @@ def split_clients(X, y, num_clients=3, shuffle=True, seed=None, stratify=False,
         seed (int): Random seed.
         stratify (bool): Enable stratified splitting.
         analyze (bool): Plot label distribution for each client.
+        lazy (bool): Return ClientShards (index views over X and y, rows
+            gathered per batch) instead of per-client copies.
+        reporter (PlotReporter): Where analyze renders; defaults to the process-wide reporter.
 
     Returns:
-        List of (X_i, y_i) tuples for each simulated client.
+        List of (X_i, y_i) tuples (or ClientShards) for each simulated client.
     """
     X, y = ensure_numpy(X, y)
 
-    if shuffle and not stratify:
-        if seed is not None:
-            np.random.seed(seed)
-        indices = np.arange(len(X))
-        np.random.shuffle(indices)
-        X = X[indices]
-        y = y[indices]
-
     if stratify:
         logging.info("Performing stratified split...")
-        client_data = stratified_split(X, y, num_clients)
-    else:
-        X_split = np.array_split(X, num_clients)
-        y_split = np.array_split(y, num_clients)
-        client_data = list(zip(X_split, y_split))
+    # Shuffling permutes an index array; the data itself is never reordered or copied.
+    shards = ShardedDataset(X, y).partition(num_clients, shuffle=shuffle, seed=seed, stratify=stratify)
 
-    for i, (Xi, yi) in enumerate(client_data):
-        logging.info(f"Client {i+1}: {Xi.shape[0]} samples, fraud rate: {np.mean(yi):.2f}")
+    for i, shard in enumerate(shards):
+        logging.info(f"Client {i+1}: {shard.num_samples} samples, fraud rate: {shard.label_mean():.2f}")
         if analyze:
-            analyze_distribution(yi, title=f"Client {i+1} Label Distribution")
+            analyze_distribution(shard.dataset.y[shard.indices], title=f"Client {i+1} Label Distribution",
+                                 reporter=reporter)
 
-    return client_data
+    return shards if lazy else [shard.materialize() for shard in shards]
 
 # Example usage
 if __name__ == "__main__":
-    from sklearn.datasets imp
+    from sklearn.datasets import make_classification
+
+    X_demo, y_demo = make_classification(n_samples=300, n_features=5, weights=[0.9, 0.1], random_state=42)
+    clients = split_clients(X_demo, y_demo, num_clients=3, seed=42, stratify=True)
+    print(f"Created {len(clients)} clients.")
@@ -1,155 +1,358 @@
 """
-This module handles data augmentation.
+Minority-class resampling for imbalanced fraud labels.
+Random oversampling and undersampling are pure index operations: on a
+ClientShard they return a new index view over the same base array, so no
+rows are copied. SMOTE interpolates new minority rows between each sample
+and one of its k nearest minority neighbors, found with a KD-tree; only the
+synthetic rows are allocated, generated in fixed-size chunks on a thread
+pool. Everything works per client, and lazy SMOTE shards generate their
+rows only while the client trains, so the federated simulation never holds
+every client's synthetic rows at once.
 """
 
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles data augmentation.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles data augmentation.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles data augmentation.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles data augmentation.
-"""
+import argparse
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
+from sklearn.neighbors import NearestNeighbors
+
+from client_shards import ClientShard, ShardedDataset
+
+METHODS = ("none", "oversample", "undersample", "smote")
+
+def _index_dtype(n):
+    return np.int32 if n < 2 ** 31 else np.int64
+
+def _class_rows(y):
+    y = np.asarray(y).ravel()
+    dtype = _index_dtype(len(y))
+    return np.flatnonzero(y == 1).astype(dtype), np.flatnonzero(y != 1).astype(dtype)
+
+def _minority_target(n_minority, n_majority, ratio):
+    # ratio is the minority:majority ratio wanted after resampling.
+    return max(n_minority, int(round(ratio * n_majority)))
+
+# === Index Resampling ===
+
+def random_oversample_indices(y, ratio=1.0, seed=None):
+    """
+    Row indices with fraud rows repeated (with replacement) until
+    fraud:legit reaches ratio. Original rows are all kept.
+
+    Returns:
+        np.ndarray: Row indices (original rows first, then repeats).
+    """
+    minority, majority = _class_rows(y)
+    rows = np.arange(len(minority) + len(majority), dtype=_index_dtype(len(minority) + len(majority)))
+    n_extra = _minority_target(len(minority), len(majority), ratio) - len(minority)
+    if n_extra <= 0 or len(minority) == 0:
+        return rows
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rows, minority[rng.integers(0, len(minority), n_extra)]])
+
+def random_undersample_indices(y, ratio=1.0, seed=None):
+    """
+    Row indices with legit rows dropped (without replacement) until
+    fraud:legit reaches ratio. Fraud rows are all kept. A client without
+    fraud rows (or ratio <= 0) keeps every row rather than being emptied.
+
+    Returns:
+        np.ndarray: Sorted row indices.
+    """
+    minority, majority = _class_rows(y)
+    if len(minority) == 0 or ratio <= 0:
+        return np.arange(len(minority) + len(majority), dtype=_index_dtype(len(minority) + len(majority)))
+    n_keep = min(len(majority), int(np.ceil(len(minority) / ratio)))
+    rng = np.random.default_rng(seed)
+    kept = rng.choice(majority, n_keep, replace=False) if n_keep < len(majority) else majority
+    return np.sort(np.concatenate([minority, kept]))
+
+# === SMOTE ===
+
+# Above this many features a KD-tree prunes too little to beat blocked brute force.
+KD_TREE_MAX_FEATURES = 8
+
+def minority_neighbors(X_minority, k_neighbors=5, workers=1, algorithm="auto"):
+    """
+    k nearest minority neighbors of every minority row (excluding itself).
+
+    Args:
+        algorithm (str): 'kd_tree', 'brute', or 'auto' (a KD-tree over the
+            minority rows up to KD_TREE_MAX_FEATURES features, else brute force).
+
+    Returns:
+        np.ndarray: (n_minority, k) neighbor row positions.
+    """
+    k = min(k_neighbors, len(X_minority) - 1)
+    if algorithm == "auto":
+        algorithm = "kd_tree" if X_minority.shape[1] <= KD_TREE_MAX_FEATURES else "brute"
+    index = NearestNeighbors(n_neighbors=k + 1, algorithm=algorithm, n_jobs=workers).fit(X_minority)
+    neighbors = index.kneighbors(X_minority, return_distance=False)
+    # Duplicated points can push a row's own index out of column 0, so drop
+    # the self-match wherever it is (or the farthest neighbor if it is absent).
+    drop = neighbors == np.arange(len(X_minority))[:, None]
+    drop[~drop.any(axis=1), -1] = True
+    return neighbors[~drop].reshape(len(X_minority), k).astype(np.int32)
+
+def smote(X, y, ratio=1.0, k_neighbors=5, categorical_idx=None, chunk_size=65536, workers=1, seed=None):
+    """
+    Synthetic fraud rows by SMOTE interpolation.
+
+    Each synthetic row is x + u * (n - x) for a random fraud row x, one of its
+    k nearest fraud neighbors n and u ~ U(0, 1). Categorical columns are
+    copied from whichever of x and n is closer instead of interpolated.
+
+    Args:
+        X (np.ndarray): Numeric features (e.g. the preprocessing pipeline output).
+        y (np.ndarray): Binary labels; 1 is the minority class.
+        ratio (float): fraud:legit ratio wanted after adding the synthetic rows.
+        k_neighbors (int): Neighbors considered per fraud row.
+        categorical_idx (list): Column positions holding encoded categories.
+        chunk_size (int): Synthetic rows generated per task.
+        workers (int): Threads for neighbor search and generation.
+        seed (int): Random seed; results do not depend on workers.
+
+    Returns:
+        np.ndarray, np.ndarray: Synthetic X rows and their labels (all 1).
+    """
+    minority, majority = _class_rows(y)
+    X_new = smote_minority(np.asarray(X[minority]), len(majority), ratio, k_neighbors, categorical_idx,
+                           chunk_size, workers, seed)
+    return X_new, np.ones(len(X_new), dtype=np.asarray(y).dtype)
+
+def smote_minority(X_minority, n_majority, ratio=1.0, k_neighbors=5, categorical_idx=None, chunk_size=65536,
+                   workers=1, seed=None):
+    """
+    SMOTE from the fraud rows alone; the legit rows only matter through their
+    count, so callers never need to gather them. Arguments as in smote().
+
+    Returns:
+        np.ndarray: Synthetic fraud rows.
+    """
+    X_min = np.asarray(X_minority)
+    n_new = _minority_target(len(X_min), n_majority, ratio) - len(X_min)
+    if n_new <= 0 or len(X_min) == 0:
+        return np.empty((0, X_min.shape[1]), dtype=X_min.dtype)
+    if len(X_min) < 2:
+        # Nothing to interpolate between: fall back to duplicating the row.
+        return np.repeat(X_min, n_new, axis=0)
+
+    neighbors = minority_neighbors(X_min, k_neighbors, workers=workers)
+    categorical = np.zeros(X_min.shape[1], dtype=bool)
+    if categorical_idx is not None:
+        categorical[list(categorical_idx)] = True
+    out = np.empty((n_new, X_min.shape[1]), dtype=X_min.dtype)
+
+    def generate(chunk):
+        start = chunk * chunk_size
+        stop = min(start + chunk_size, n_new)
+        rng = np.random.default_rng([seed if seed is not None else 0, chunk])
+        base = rng.integers(0, len(X_min), stop - start)
+        other = neighbors[base, rng.integers(0, neighbors.shape[1], stop - start)]
+        gap = rng.random((stop - start, 1)).astype(X_min.dtype)
+        x, n = X_min[base], X_min[other]
+        rows = x + gap * (n - x)
+        if categorical.any():
+            rows[:, categorical] = np.where(gap < 0.5, x[:, categorical], n[:, categorical])
+        out[start:stop] = rows
+
+    n_chunks = -(-n_new // chunk_size)
+    if workers > 1 and n_chunks > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(generate, range(n_chunks)))
+    else:
+        for chunk in range(n_chunks):
+            generate(chunk)
+    return out
+
+# === Augmented Clients ===
+
+class AugmentedShard(ClientShard):
+    """
+    A client shard plus synthetic rows held next to it.
+
+    Real rows stay index views into the shared base array; only the
+    synthetic rows are stored, and batches() mixes both.
+    """
+
+    def __init__(self, base, X_extra, y_extra):
+        super().__init__(base.dataset, base.indices)
+        self.X_extra = X_extra
+        self.y_extra = y_extra
+
+    @property
+    def num_samples(self):
+        return len(self.indices) + len(self.y_extra)
+
+    def materialize(self):
+        X, y = super().materialize()
+        return np.concatenate([X, self.X_extra]), np.concatenate([y, self.y_extra])
+
+    def label_mean(self):
+        y = self.dataset.y[np.sort(self.indices)]
+        return float((np.sum(y) + np.sum(self.y_extra)) / max(self.num_samples, 1))
+
+    def batches(self, batch_size=32, shuffle=True, rng=None):
+        n_base = len(self.indices)
+        order = np.arange(self.num_samples)
+        if shuffle:
+            rng = rng if rng is not None else np.random.default_rng()
+            order = rng.permutation(order)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            real = np.sort(self.indices[batch[batch < n_base]])
+            extra = batch[batch >= n_base] - n_base
+            yield (np.concatenate([np.asarray(self.dataset.X[real]), self.X_extra[extra]]),
+                   np.concatenate([np.asarray(self.dataset.y[real]), self.y_extra[extra]]))
+
+    def __reduce__(self):
+        return AugmentedShard, (ClientShard(self.dataset, self.indices), self.X_extra, self.y_extra)
+
+def _smote_shard(client, smote_opts):
+    y = np.asarray(client.dataset.y[client.indices])
+    # Only the client's fraud rows are gathered from the base array.
+    fraud = np.sort(client.indices[y == 1])
+    X_new = smote_minority(client.dataset.X[fraud], len(y) - len(fraud), **smote_opts)
+    return AugmentedShard(client, X_new, np.ones(len(X_new), dtype=y.dtype))
+
+class LazySmoteShard(ClientShard):
+    """
+    A client shard whose SMOTE rows are generated each time it is trained on
+    and dropped afterwards.
+
+    Only the SMOTE options are stored, so a simulation holds at most the
+    synthetic rows of the clients training at that moment. Generation is
+    seeded, so every round sees the same synthetic rows.
+    """
+
+    def __init__(self, base, smote_opts):
+        super().__init__(base.dataset, base.indices)
+        self.smote_opts = smote_opts
+        y = np.asarray(self.dataset.y[self.indices])
+        n_fraud = int(np.sum(y == 1))
+        n_new = _minority_target(n_fraud, len(y) - n_fraud, smote_opts.get("ratio", 1.0)) - n_fraud
+        self.n_fraud = n_fraud
+        self.n_extra = max(n_new, 0) if n_fraud else 0
+
+    @property
+    def num_samples(self):
+        return len(self.indices) + self.n_extra
+
+    def augmented(self):
+        """
+        Builds this client's synthetic rows now.
+
+        Returns:
+            AugmentedShard: The real rows plus the synthetic rows.
+        """
+        return _smote_shard(ClientShard(self.dataset, self.indices), self.smote_opts)
+
+    def materialize(self):
+        return self.augmented().materialize()
+
+    def label_mean(self):
+        return float((self.n_fraud + self.n_extra) / max(self.num_samples, 1))
+
+    def batches(self, batch_size=32, shuffle=True, rng=None):
+        yield from self.augmented().batches(batch_size, shuffle=shuffle, rng=rng)
+
+    def __reduce__(self):
+        return LazySmoteShard, (ClientShard(self.dataset, self.indices), self.smote_opts)
+
+def augment_client(client, method="smote", ratio=1.0, k_neighbors=5, categorical_idx=None, chunk_size=65536,
+                   workers=1, seed=None, lazy=False):
+    """
+    Rebalances one client's training data.
+
+    Args:
+        client: ClientShard or (X, y) tuple.
+        method (str): One of METHODS.
+        ratio (float): fraud:legit ratio after resampling.
+        k_neighbors, categorical_idx, chunk_size, workers: SMOTE options.
+        seed (int): Random seed.
+        lazy (bool): For SMOTE on a ClientShard, return a LazySmoteShard that
+            generates its synthetic rows only while the client trains.
+
+    Returns:
+        A ClientShard (index view, AugmentedShard or LazySmoteShard) for shard input, else an (X, y) tuple.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unsupported augmentation '{method}'. Choose from {list(METHODS)}.")
+    if method == "none":
+        return client
+
+    if isinstance(client, ClientShard):
+        y = client.dataset.y[client.indices]
+        if method == "smote":
+            smote_opts = dict(ratio=ratio, k_neighbors=k_neighbors, categorical_idx=categorical_idx,
+                              chunk_size=chunk_size, workers=workers, seed=seed)
+            return LazySmoteShard(client, smote_opts) if lazy else _smote_shard(client, smote_opts)
+        resample = random_oversample_indices if method == "oversample" else random_undersample_indices
+        return ClientShard(client.dataset, client.indices[resample(y, ratio, seed=seed)])
+
+    X, y = client
+    if method == "smote":
+        X_new, y_new = smote(X, y, ratio, k_neighbors, categorical_idx, chunk_size, workers, seed)
+        return np.concatenate([X, X_new]), np.concatenate([y, y_new])
+    resample = random_oversample_indices if method == "oversample" else random_undersample_indices
+    idx = resample(y, ratio, seed=seed)
+    return X[idx], y[idx]
+
+def augment_clients(client_data, method="smote", seed=None, **opts):
+    """
+    Applies augment_client to every client with a per-client seed.
+    """
+    return [augment_client(c, method=method, seed=None if seed is None else seed + i, **opts)
+            for i, c in enumerate(client_data)]
+
+# === Benchmark ===
+
+def benchmark_augmentation(n_rows=2_000_000, n_features=16, fraud_rate=0.01, ratio=0.5, workers=1, seed=0):
+    """
+    Compares time and peak extra memory of pandas-style oversampling (copy
+    the frame, append duplicated fraud rows) with index oversampling and
+    chunked SMOTE on one shard.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    y = (rng.random(n_rows) < fraud_rate).astype(np.int32)
+    shard = ShardedDataset(X, y).shard(np.arange(n_rows, dtype=np.int32))
+    report = {}
+
+    def measure(name, fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        report[name] = {"seconds": time.perf_counter() - start, "bytes": tracemalloc.get_traced_memory()[1]}
+        tracemalloc.stop()
+        return result
+
+    def copy_oversample():
+        minority = np.flatnonzero(y == 1)
+        extra = minority[rng.integers(0, len(minority), int(ratio * (n_rows - len(minority))) - len(minority))]
+        return np.concatenate([X, X[extra]]), np.concatenate([y, y[extra]])
+
+    measure("copy_oversample", copy_oversample)
+    measure("index_oversample", lambda: augment_client(shard, "oversample", ratio=ratio, seed=seed))
+    measure("index_undersample", lambda: augment_client(shard, "undersample", ratio=ratio, seed=seed))
+    augmented = measure("smote", lambda: augment_client(shard, "smote", ratio=ratio, workers=workers, seed=seed))
+
+    print(f"\n=== Augmentation ({n_rows:,} rows, {int(y.sum()):,} fraud, target ratio {ratio}) ===")
+    for name, r in report.items():
+        print(f"{name:<18} {r['seconds']:6.2f}s  peak {r['bytes'] / 2 ** 20:8.1f} MiB")
+    print(f"SMOTE client: {augmented.num_samples:,} rows, fraud share {augmented.label_mean():.3f}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Minority oversampling and undersampling")
+    parser.add_argument("--benchmark", type=int, default=2_000_000, metavar="ROWS",
+                        help="Rows of synthetic data to resample")
+    parser.add_argument("--ratio", type=float, default=0.5, help="fraud:legit ratio after resampling")
+    parser.add_argument("--workers", type=int, default=1, help="Threads for SMOTE")
+    args = parser.parse_args()
+    benchmark_augmentation(n_rows=args.benchmark, ratio=args.ratio, workers=args.workers)
 
 if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
+    main()
@@ -5,17 +5,23 @@ Loads and preprocesses transaction data for fraud detection and federated learni
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
 import logging
+from preprocessing import PreprocessingPipeline
+from dataset_cache import read_csv_cached
 
 logging.basicConfig(level=logging.INFO)
 
-def load_raw_data(file_path):
+def load_raw_data(file_path, use_cache=True):
     """
     Loads raw transaction data from a CSV file.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        use_cache (bool): Load through the columnar dataset cache, so repeat
+            runs memory-map typed columns instead of parsing the CSV.
     """
     try:
-        df = pd.read_csv(file_path)
+        df = read_csv_cached(file_path) if use_cache else pd.read_csv(file_path)
         logging.info(f"Data loaded successfully. Shape: {df.shape}")
         return df
     except Exception as e:
@@ -30,32 +36,43 @@ def validate_columns(df, required_cols):
     if missing:
         raise ValueError(f"Missing columns: {missing}")
 
-def preprocess_data(df, features, target='is_fraud'):
+def preprocess_data(df, features, target='is_fraud', pipeline=None, return_pipeline=False, encoders=None):
     """
     Selects features, encodes categoricals, scales numerics.
+
+    Args:
+        df (pd.DataFrame): Raw transaction data.
+        features (list): Feature columns, in model input order.
+        target (str): Label column.
+        pipeline (PreprocessingPipeline): Optional fitted pipeline to apply
+            instead of fitting a new one (e.g. on test or inference data).
+        return_pipeline (bool): Also return the pipeline so it can be saved.
+        encoders (dict): Optional column -> encoder ('dict', 'hash' or an
+            instance from categorical_encoders) used when fitting a new pipeline.
+
+    Returns:
+        X_scaled, y (and the pipeline if return_pipeline is True).
     """
     validate_columns(df, features + [target])
-    df = df.copy()
 
-    # Encode categorical features
-    for col in df[features].select_dtypes(include='object').columns:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        logging.info(f"Encoded column: {col}")
+    if pipeline is None:
+        pipeline = PreprocessingPipeline(features, encoders=encoders).fit(df)
+        for col in pipeline.categorical_cols:
+            logging.info(f"Encoded column: {col}")
 
-    X = df[features].values
+    X_scaled = pipeline.transform(df)
     y = df[target].values
-
-    # Scale features
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
     logging.info("Features scaled.")
 
+    if return_pipeline:
+        return X_scaled, y, pipeline
     return X_scaled, y
 
-def load_and_preprocess(file_path, features, target='is_fraud'):
+def load_and_preprocess(file_path, features, target='is_fraud', pipeline=None, return_pipeline=False,
+                        encoders=None):
     df = load_raw_data(file_path)
-    return preprocess_data(df, features, target)
+    return preprocess_data(df, features, target, pipeline=pipeline, return_pipeline=return_pipeline,
+                           encoders=encoders)
 
 def split_data(X, y, test_size=0.2, random_state=42):
     """
@@ -81,7 +98,8 @@ if __name__ == "__main__":
     features = ['amount', 'is_international', 'merchant_id']
     
     try:
-        X, y = load_and_preprocess(file, features)
+        X, y, pipeline = load_and_preprocess(file, features, return_pipeline=True)
+        pipeline.save("../models/preprocessing_pipeline.joblib")
         X_train, X_test, y_train, y_test = split_data(X, y)
         clients = split_clients(X_train, y_train, num_clients=3)
 
@@ -0,0 +1,218 @@
+"""
+Columnar binary cache for transaction CSVs.
+Converts a CSV once into typed per-column .npy files (categoricals stored as
+integer codes) and reloads them as memory-mapped arrays on later runs, keyed
+by the file's size, mtime and a content hash.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", ".cache")
+
+# Declared dtypes for the transaction schema; other columns are inferred.
+TRANSACTION_DTYPES = {
+    "transaction_id": "int64",
+    "amount": "float64",
+    "merchant_id": "category",
+    "timestamp": "datetime64[ns]",
+    "location": "category",
+    "device_type": "category",
+    "transaction_type": "category",
+    "user_id": "int64",
+    "is_international": "int8",
+    "is_fraud": "int8",
+}
+
+_HASH_BLOCK = 1 << 20
+
+def file_fingerprint(path):
+    """
+    Returns a cache key from file size, mtime and a hash of its first and last MiB.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(_HASH_BLOCK))
+        if stat.st_size > _HASH_BLOCK:
+            f.seek(max(stat.st_size - _HASH_BLOCK, _HASH_BLOCK))
+            digest.update(f.read(_HASH_BLOCK))
+    return digest.hexdigest()
+
+def _cache_path(csv_path, cache_dir, dtypes=None):
+    # The stem names the source file by basename and absolute path, so
+    # same-named CSVs in different directories get separate entries. The
+    # key covers the file contents and the effective dtypes it was parsed with.
+    source = os.path.abspath(csv_path)
+    path_hash = hashlib.blake2b(source.encode(), digest_size=4).hexdigest()
+    stem = f"{os.path.splitext(os.path.basename(csv_path))[0]}.{path_hash}"
+    key = hashlib.blake2b(file_fingerprint(csv_path).encode(), digest_size=16)
+    key.update(json.dumps(dict(TRANSACTION_DTYPES, **(dtypes or {})), sort_keys=True).encode())
+    return os.path.join(cache_dir, f"{stem}-{key.hexdigest()}"), stem
+
+def _read_typed_csv(csv_path, dtypes):
+    header = pd.read_csv(csv_path, nrows=0).columns
+    read_dtypes = {col: dt for col, dt in dtypes.items() if col in header and not dt.startswith("datetime")}
+    parse_dates = [col for col, dt in dtypes.items() if col in header and dt.startswith("datetime")]
+    try:
+        return pd.read_csv(csv_path, dtype=read_dtypes, parse_dates=parse_dates)
+    except (ValueError, TypeError) as e:
+        logging.warning(f"Declared dtypes do not fit {csv_path} ({e}); inferring dtypes instead.")
+        return pd.read_csv(csv_path, parse_dates=parse_dates)
+
+def build_cache(csv_path, cache_dir=DEFAULT_CACHE_DIR, dtypes=None):
+    """
+    Parses a CSV once and writes one .npy file per column plus a meta.json.
+
+    Args:
+        csv_path (str): Source CSV file.
+        cache_dir (str): Root directory for cache entries.
+        dtypes (dict): Column -> dtype overrides (defaults to TRANSACTION_DTYPES).
+
+    Returns:
+        str: Path of the cache entry directory.
+    """
+    entry, stem = _cache_path(csv_path, cache_dir, dtypes)
+    dtypes = dict(TRANSACTION_DTYPES, **(dtypes or {}))
+    df = _read_typed_csv(csv_path, dtypes)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{stem}-", dir=cache_dir)
+    meta = {"source": os.path.abspath(csv_path), "rows": len(df), "columns": [], "categories": {}}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.codes.to_numpy()
+            meta["categories"][col] = series.cat.categories.astype(str).tolist()
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            cat = series.astype("category")
+            values = cat.cat.codes.to_numpy()
+            meta["categories"][col] = cat.cat.categories.astype(str).tolist()
+        else:
+            values = series.to_numpy()
+        np.save(os.path.join(tmp_dir, f"{i}.npy"), values)
+        meta["columns"].append(col)
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    # Publish atomically and drop stale entries for the same file.
+    stale = re.compile(re.escape(stem) + r"-[0-9a-f]{32}")
+    for name in os.listdir(cache_dir):
+        if stale.fullmatch(name) and os.path.join(cache_dir, name) != entry:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+    try:
+        os.replace(tmp_dir, entry)
+    except OSError:
+        # Another process published the same entry first.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logging.info(f"Cached {csv_path} ({len(df)} rows) at {entry}")
+    return entry
+
+def load_columns(csv_path, cache_dir=DEFAULT_CACHE_DIR, dtypes=None):
+    """
+    Returns memory-mapped column arrays for a CSV, building the cache on first use.
+
+    Returns:
+        dict: column -> np.ndarray (memory-mapped), and
+        dict: categorical column -> list of categories (codes index into it).
+    """
+    entry, _ = _cache_path(csv_path, cache_dir, dtypes)
+    if not os.path.exists(os.path.join(entry, "meta.json")):
+        entry = build_cache(csv_path, cache_dir=cache_dir, dtypes=dtypes)
+    with open(os.path.join(entry, "meta.json")) as f:
+        meta = json.load(f)
+    columns = {
+        col: np.load(os.path.join(entry, f"{i}.npy"), mmap_mode="r")
+        for i, col in enumerate(meta["columns"])
+    }
+    return columns, meta["categories"]
+
+def read_csv_cached(csv_path, cache_dir=DEFAULT_CACHE_DIR, dtypes=None):
+    """
+    Drop-in replacement for pd.read_csv backed by the columnar cache.
+
+    Categorical columns come back as pandas Categoricals over the cached codes.
+    """
+    columns, categories = load_columns(csv_path, cache_dir=cache_dir, dtypes=dtypes)
+    data = {}
+    for col, values in columns.items():
+        if col in categories:
+            data[col] = pd.Categorical.from_codes(values, categories=categories[col])
+        else:
+            data[col] = values
+    return pd.DataFrame(data, copy=False)
+
+def benchmark_cache(n_rows=10_000_000, workdir=None, seed=42):
+    """
+    Times cold CSV parsing against warm cached loads on a generated file.
+
+    Returns:
+        dict: Seconds for 'csv_parse', 'cache_build' and 'cache_load'.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="fraud-cache-bench-")
+    csv_path = os.path.join(workdir, f"bench_{n_rows}.csv")
+    cache_dir = os.path.join(workdir, ".cache")
+
+    rng = np.random.default_rng(seed)
+    start_ts = np.datetime64("2025-01-01T00:00:00")
+    pd.DataFrame({
+        "transaction_id": np.arange(1, n_rows + 1),
+        "amount": rng.uniform(1, 10000, n_rows).round(2),
+        "merchant_id": np.char.add("M", rng.integers(100, 1000, n_rows).astype(str)),
+        "timestamp": start_ts + rng.integers(0, 90 * 86400, n_rows).astype("timedelta64[s]"),
+        "location": rng.choice(["CA", "NY", "TX", "IL", "FL"], n_rows),
+        "device_type": rng.choice(["mobile", "desktop", "tablet", "POS"], n_rows),
+        "user_id": rng.integers(1000, 100000, n_rows),
+        "is_international": rng.integers(0, 2, n_rows),
+        "is_fraud": (rng.random(n_rows) < 0.02).astype(int),
+    }).to_csv(csv_path, index=False)
+
+    timings = {}
+    start = time.perf_counter()
+    pd.read_csv(csv_path)
+    timings["csv_parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    build_cache(csv_path, cache_dir=cache_dir)
+    timings["cache_build"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = read_csv_cached(csv_path, cache_dir=cache_dir)
+    df["amount"].sum()
+    timings["cache_load"] = time.perf_counter() - start
+
+    print(f"\n=== Dataset Cache Benchmark ({n_rows} rows) ===")
+    print(f"Cold pd.read_csv:        {timings['csv_parse']:.2f}s")
+    print(f"One-time cache build:    {timings['cache_build']:.2f}s")
+    print(f"Warm cached load:        {timings['cache_load']:.3f}s")
+    print(f"Speedup (warm vs CSV):   {timings['csv_parse'] / timings['cache_load']:.0f}x")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or benchmark the columnar dataset cache")
+    parser.add_argument("csv", nargs="*", help="CSV files to convert into the cache")
+    parser.add_argument("--cache_dir", type=str, default=DEFAULT_CACHE_DIR, help="Cache root directory")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Benchmark cold vs warm loads on ROWS generated rows")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_cache(n_rows=args.benchmark)
+    for path in args.csv:
+        build_cache(path, cache_dir=args.cache_dir)
+
+if __name__ == "__main__":
+    main()
@@ -1,155 +1,253 @@
 """
-This module handles explainability.
+Batched, cached per-transaction explanations for fraud alerts.
+Attributions for a whole batch come from a few large forward passes:
+integrated gradients evaluates every row's interpolation path in one
+gradient call, and sampled Shapley values evaluate every row's permutation
+coalitions in one predict call, both against a background set that is
+summarized once and cached. Explanations are memoized by feature vector, so
+repeated transactions (and repeated alerts) are free.
 """
 
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles explainability.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles explainability.
-"""
+import argparse
+import time
+from collections import OrderedDict
 
 import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles explainability.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles explainability.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
 
-    def print_preview(self):
-        print(self.data.head())
+METHODS = ("ig", "shapley")
+
+class ExplanationEngine:
+    """
+    Feature attributions for batches of rows.
+
+    A row's attributions sum to f(row) minus the model output at the
+    reference: the background mean for 'ig' (up to integration error), the
+    sampled background rows for 'shapley' (expected_value on average). Each
+    value reads as "how much this feature moved the fraud probability".
+    """
+
+    def __init__(self, model, background, method="ig", steps=32, n_permutations=8, n_background=64,
+                 max_points=262_144, cache_size=100_000, seed=0):
+        """
+        Args:
+            model: Keras model (required for 'ig'); 'shapley' only needs predict/predict_on_batch.
+            background (np.ndarray): Reference rows, e.g. a sample of training data.
+            method (str): 'ig' (integrated gradients) or 'shapley' (permutation sampling).
+            steps (int): Interpolation steps per row for 'ig'.
+            n_permutations (int): Feature permutations per row for 'shapley'.
+            n_background (int): Background rows kept for 'shapley'.
+            max_points (int): Upper bound on model inputs evaluated per call.
+            cache_size (int): Memoized explanations (least recently used are evicted).
+            seed (int): Random seed for background sampling and permutations.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unsupported method '{method}'. Choose from {list(METHODS)}.")
+        self.model = model
+        self.method = method
+        self.steps = steps
+        self.n_permutations = n_permutations
+        self.max_points = max_points
+        self.cache_size = cache_size
+        self.rng = np.random.default_rng(seed)
+
+        # Background summary, computed once.
+        background = np.asarray(background, dtype=np.float32)
+        self.baseline = background.mean(axis=0, keepdims=True)
+        if len(background) > n_background:
+            background = background[self.rng.choice(len(background), n_background, replace=False)]
+        self.background = background
+        self.n_features = background.shape[1]
+        self._predict = getattr(model, "predict_on_batch", None) or model.predict
+        self.expected_value = float(self.predict(self.baseline if method == "ig" else self.background).mean())
+
+        self._cache = OrderedDict()
+        self.stats_ = {"rows": 0, "computed": 0, "cache_hits": 0, "seconds": 0.0}
+
+    def predict(self, X):
+        """
+        Model output for X in chunks of at most max_points rows.
+        """
+        out = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), self.max_points):
+            out[start:start + self.max_points] = np.asarray(
+                self._predict(X[start:start + self.max_points]), dtype=np.float32).reshape(-1)
+        return out
+
+    # === Methods ===
+
+    def _integrated_gradients(self, X):
+        import tensorflow as tf
+
+        # Trapezoid rule over steps + 1 points from the baseline to each row.
+        alphas = np.linspace(0.0, 1.0, self.steps + 1, dtype=np.float32)
+        weights = np.full(self.steps + 1, 1.0 / self.steps, dtype=np.float32)
+        weights[[0, -1]] /= 2
+        delta = X - self.baseline
+        rows_per_call = max(1, self.max_points // len(alphas))
+        out = np.empty_like(X)
+        for start in range(0, len(X), rows_per_call):
+            d = delta[start:start + rows_per_call]
+            path = tf.constant((self.baseline[None] + alphas[None, :, None] * d[:, None, :]).reshape(-1, self.n_features))
+            with tf.GradientTape() as tape:
+                tape.watch(path)
+                preds = self.model(path, training=False)
+            grads = tape.gradient(preds, path).numpy().reshape(len(d), len(alphas), self.n_features)
+            out[start:start + rows_per_call] = d * np.tensordot(weights, grads, axes=(0, 1))
+        return out
+
+    def _sampled_shapley(self, X):
+        # For each row and permutation, switch features from a background row
+        # to the row's values one at a time, in permutation order; each
+        # feature's marginal change in output is its contribution.
+        n, d, p = len(X), self.n_features, self.n_permutations
+        rows_per_call = max(1, self.max_points // (p * (d + 1)))
+        out = np.empty_like(X)
+        for start in range(0, n, rows_per_call):
+            x = X[start:start + rows_per_call]
+            m = len(x)
+            perms = np.argsort(self.rng.random((m, p, d)), axis=2)
+            ref = self.background[self.rng.integers(0, len(self.background), (m, p))]
+            # rank[i, j, f] = position of feature f in permutation j of row i.
+            rank = np.argsort(perms, axis=2)
+            k = np.arange(d + 1)
+            use_x = rank[:, :, None, :] < k[None, None, :, None]
+            points = np.where(use_x, x[:, None, None, :], ref[:, :, None, :])
+            preds = self.predict(points.reshape(-1, d).astype(np.float32)).reshape(m, p, d + 1)
+            gains = np.diff(preds, axis=2)
+            contrib = np.take_along_axis(gains, rank, axis=2)
+            out[start:start + m] = contrib.mean(axis=1)
+        return out
+
+    # === Public API ===
+
+    def explain(self, X):
+        """
+        Attributions for every row of X.
+
+        Duplicate rows within X and rows explained before are computed once.
+
+        Returns:
+            np.ndarray: (n_rows, n_features) attributions.
+        """
+        start = time.perf_counter()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        unique, inverse = np.unique(X, axis=0, return_inverse=True)
+        keys = [row.tobytes() for row in unique]
+        result = np.empty_like(unique)
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                self._cache.move_to_end(key)
+                result[i] = cached
+        if missing:
+            compute = self._integrated_gradients if self.method == "ig" else self._sampled_shapley
+            result[missing] = compute(unique[missing])
+            for i in missing:
+                self._cache[keys[i]] = result[i].copy()
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        self.stats_["rows"] += len(X)
+        self.stats_["computed"] += len(missing)
+        self.stats_["cache_hits"] += len(X) - len(missing)
+        self.stats_["seconds"] += time.perf_counter() - start
+        return result[inverse.reshape(-1)]
+
+    def stats(self):
+        """
+        Returns:
+            dict: rows explained, rows actually computed, cache hits, cache size
+            and throughput in explanations/sec.
+        """
+        s = dict(self.stats_, cache_entries=len(self._cache))
+        s["explanations_per_sec"] = s["rows"] / s["seconds"] if s["seconds"] > 0 else 0.0
+        return s
+
+def top_reasons(attributions, feature_names, k=3):
+    """
+    The k features pushing each row hardest toward fraud.
+
+    Returns:
+        list: One string per row, e.g. "amount (+0.31); is_international (+0.12)".
+    """
+    attributions = np.asarray(attributions)
+    order = np.argsort(-attributions, axis=1)[:, :k]
+    reasons = []
+    for row, idx in zip(attributions, order):
+        reasons.append("; ".join(f"{feature_names[j]} ({row[j]:+.3f})" for j in idx if row[j] > 0))
+    return reasons
+
+# === Benchmark ===
+
+def _naive_integrated_gradients(model, X, baseline, steps=32):
+    """
+    Reference implementation: one gradient call per row and step.
+    """
+    import tensorflow as tf
+
+    out = np.empty_like(X)
+    for i, x in enumerate(X):
+        total = np.zeros_like(x)
+        for a in np.linspace(0.0, 1.0, steps + 1, dtype=np.float32):
+            point = tf.constant((baseline[0] + a * (x - baseline[0]))[None])
+            with tf.GradientTape() as tape:
+                tape.watch(point)
+                pred = model(point, training=False)
+            weight = 0.5 if a in (0.0, 1.0) else 1.0
+            total += weight * tape.gradient(pred, point).numpy()[0] / steps
+        out[i] = (x - baseline[0]) * total
+    return out
+
+def benchmark_explanations(n_rows=20_000, n_features=8, n_naive=20, repeat_share=0.5, seed=0):
+    """
+    Explanations/sec for both methods on a small Keras model, a cache-warm
+    rerun, and a per-row integrated gradients loop for comparison.
+    """
+    import tensorflow as tf
+
+    rng = np.random.default_rng(seed)
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(n_features,)),
+        tf.keras.layers.Dense(16, activation="relu"),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    background = rng.normal(size=(5000, n_features)).astype(np.float32)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    # Alerts repeat (same card, same merchant, same amount); share some rows.
+    n_repeat = int(repeat_share * n_rows)
+    X[rng.choice(n_rows, n_repeat, replace=False)] = X[rng.integers(0, n_rows - n_repeat, n_repeat)]
+
+    print(f"\n=== Explanations ({n_rows:,} rows, {n_features} features) ===")
+    report = {}
+    for method in METHODS:
+        engine = ExplanationEngine(model, background, method=method, seed=seed)
+        attributions = engine.explain(X)
+        cold = engine.stats()
+        engine.explain(X)
+        warm_rate = n_rows / (engine.stats()["seconds"] - cold["seconds"])
+        preds = engine.predict(X)
+        gap = float(np.abs(attributions.sum(axis=1) - (preds - engine.expected_value)).mean())
+        report[method] = {"cold": cold["explanations_per_sec"], "warm": warm_rate, "completeness_gap": gap}
+        print(f"{method:<8} cold {cold['explanations_per_sec']:>10,.0f}/s ({cold['computed']:,} computed)  "
+              f"warm {warm_rate:>12,.0f}/s  mean |sum(attr) - (f(x) - E[f])| = {gap:.4f}")
+
+    engine = ExplanationEngine(model, background, method="ig", seed=seed)
+    start = time.perf_counter()
+    _naive_integrated_gradients(model, X[:n_naive], engine.baseline)
+    naive_rate = n_naive / (time.perf_counter() - start)
+    report["naive_ig"] = naive_rate
+    print(f"per-row IG loop {naive_rate:,.1f}/s")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched fraud alert explanations")
+    parser.add_argument("--benchmark", type=int, default=20_000, metavar="ROWS", help="Rows to explain")
+    parser.add_argument("--features", type=int, default=8, help="Number of input features")
+    args = parser.parse_args()
+    benchmark_explanations(n_rows=args.benchmark, n_features=args.features)
 
 if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
+    main()
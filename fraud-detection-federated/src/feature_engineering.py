@@ -1,155 +1,307 @@
 """
-This module handles feature engineering.
+Behavioral velocity features for fraud detection.
+Rolling per-user and per-merchant aggregates (transaction counts and amount
+sums over 1h/24h/7d, time since the previous transaction) plus new-device
+and new-location flags per user. The same features come from two paths:
+a vectorized batch backfill over sorted timestamps for training data, and
+an incremental VelocityFeatureStore that updates in amortized O(1) per
+event for online scoring.
+
+Every feature describes the history *before* an event: the event itself is
+not counted, and events with equal timestamps are ordered as they appear.
 """
 
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles feature engineering.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles feature engineering.
-"""
+import argparse
+import time
 
 import numpy as np
 import pandas as pd
 
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles feature engineering.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles feature engineering.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
+# Rolling windows in seconds.
+WINDOWS = {"1h": 3600, "24h": 86400, "7d": 7 * 86400}
+
+# Entity name -> key column in the transaction schema.
+ENTITIES = {"user": "user_id", "merchant": "merchant_id"}
+
+# Per-user "first time seen" flags: flag name -> column.
+NOVELTY_COLUMNS = {"new_device": "device_type", "new_location": "location"}
+
+# Value of *_seconds_since_last for an entity's first event.
+NO_HISTORY = -1.0
+
+def feature_names(windows=WINDOWS, entities=ENTITIES):
+    """
+    Output columns, in the order both the batch and online paths produce them.
+    """
+    names = []
+    for entity in entities:
+        for w in windows:
+            names += [f"{entity}_count_{w}", f"{entity}_amount_{w}"]
+        names.append(f"{entity}_seconds_since_last")
+    return names + [f"user_{flag}" for flag in NOVELTY_COLUMNS]
+
+VELOCITY_FEATURES = feature_names()
+
+def _to_seconds(timestamps):
+    return pd.to_datetime(pd.Series(timestamps)).to_numpy("datetime64[s]").astype(np.int64)
+
+# === Batch Backfill ===
+
+def _entity_features(codes, ts, amounts, windows):
+    """
+    Rolling features for one entity over rows already sorted by (code, ts).
+    """
+    n = len(codes)
+    out = {}
+    # Pack (entity, time) into one increasing key with a gap wider than any
+    # window between entities, so one searchsorted finds every window start.
+    span = int(ts.max() - ts.min()) + max(windows.values()) + 1 if n else 1
+    key = codes.astype(np.int64) * span + (ts - (ts.min() if n else 0))
+    amount_cumsum = np.r_[0.0, np.cumsum(amounts)]
+    rows = np.arange(n)
+    for name, seconds in windows.items():
+        # First row of the same entity with ts > t - seconds.
+        start = np.searchsorted(key, key - seconds, side="right")
+        out[f"count_{name}"] = (rows - start).astype(np.float64)
+        out[f"amount_{name}"] = amount_cumsum[rows] - amount_cumsum[start]
+
+    same_entity = np.r_[False, codes[1:] == codes[:-1]]
+    gap = np.r_[0, np.diff(ts)].astype(np.float64)
+    out["seconds_since_last"] = np.where(same_entity, gap, NO_HISTORY)
+    return out
+
+def velocity_features(df, windows=WINDOWS, entities=ENTITIES):
+    """
+    Backfills velocity features for a whole DataFrame.
+
+    Each entity needs one stable sort by (entity, timestamp); windows are
+    then resolved with a single vectorized binary search each.
+
+    Args:
+        df (pd.DataFrame): Transactions with timestamp, amount and the entity
+            and novelty columns.
+        windows (dict): Window name -> length in seconds.
+        entities (dict): Entity name -> key column.
+
+    Returns:
+        pd.DataFrame: Features aligned with df.index, columns in feature_names() order.
+    """
+    ts = _to_seconds(df["timestamp"])
+    amounts = df["amount"].to_numpy(dtype=np.float64)
+    result = {}
+    for entity, column in entities.items():
+        codes, _ = pd.factorize(df[column].to_numpy(), use_na_sentinel=False)
+        order = np.lexsort((ts, codes))
+        feats = _entity_features(codes[order], ts[order], amounts[order], windows)
+        for name, values in feats.items():
+            col = np.empty(len(df), dtype=np.float64)
+            col[order] = values
+            result[f"{entity}_{name}"] = col
+
+    user_codes, _ = pd.factorize(df[ENTITIES["user"]].to_numpy(), use_na_sentinel=False)
+    order = np.lexsort((ts, user_codes))
+    for flag, column in NOVELTY_COLUMNS.items():
+        value_codes, _ = pd.factorize(df[column].to_numpy(), use_na_sentinel=False)
+        pairs = pd.DataFrame({"user": user_codes[order], "value": value_codes[order]})
+        col = np.empty(len(df), dtype=np.float64)
+        col[order] = (~pairs.duplicated().to_numpy()).astype(np.float64)
+        result[f"user_{flag}"] = col
+
+    return pd.DataFrame(result, index=df.index)[feature_names(windows, entities)]
+
+def add_velocity_features(df, **kwargs):
+    """
+    Returns df with the velocity feature columns appended, ready to be passed
+    to data_loader.preprocess_data with features + VELOCITY_FEATURES.
+    """
+    return pd.concat([df, velocity_features(df, **kwargs)], axis=1)
+
+# === Online Store ===
+
+class _EntityState:
+    """
+    One entity's events inside the longest window: timestamps, running amount
+    totals (cum[k] = sum of the first k amounts) and, per window, the index of
+    the first event still inside it. Start indices only move forward, so each
+    event is passed over once per window: amortized O(1) per update.
+    """
+
+    __slots__ = ("ts", "cum", "starts", "last_ts")
+
+    # Drop evicted events once this many have piled up at the front.
+    COMPACT_AFTER = 256
+
+    def __init__(self, n_windows):
+        self.ts = []
+        self.cum = [0.0]
+        self.starts = [0] * n_windows
+        self.last_ts = None
+
+    def compact(self):
+        k = min(self.starts)
+        base = self.cum[k]
+        del self.ts[:k]
+        self.cum = [c - base for c in self.cum[k:]]
+        self.starts = [s - k for s in self.starts]
+
+class VelocityFeatureStore:
+    """
+    Incremental per-user and per-merchant velocity features for online scoring.
+
+    Memory per entity is bounded by its events inside the longest window,
+    plus the set of devices and locations each user has used.
+    """
+
+    def __init__(self, windows=WINDOWS, entities=ENTITIES):
+        """
+        Args:
+            windows (dict): Window name -> length in seconds.
+            entities (dict): Entity name -> key column.
+        """
+        self.windows = dict(windows)
+        self.entities = dict(entities)
+        self.names = feature_names(self.windows, self.entities)
+        self._seconds = list(self.windows.values())
+        # The longest window's start index is the oldest event still needed.
+        self._longest = int(np.argmax(self._seconds))
+        self._state = {entity: {} for entity in self.entities}
+        self._seen = {flag: {} for flag in NOVELTY_COLUMNS}
+
+    def process(self, event, update=True):
+        """
+        Computes one event's features from the history before it, then (if
+        update) adds the event to that history.
+
+        Args:
+            event (dict): Transaction with timestamp (seconds since epoch or
+                anything pd.Timestamp accepts), amount and the entity and novelty columns.
+            update (bool): Add the event to the store after scoring it.
+
+        Returns:
+            np.ndarray: Features in self.names order.
+        """
+        ts = event["timestamp"]
+        if not isinstance(ts, (int, float, np.integer, np.floating)):
+            ts = pd.Timestamp(ts).value // 10 ** 9
+        amount = float(event["amount"])
+        seconds = self._seconds
+
+        values = []
+        for entity, column in self.entities.items():
+            states = self._state[entity]
+            state = states.get(event[column])
+            if state is None:
+                state = states[event[column]] = _EntityState(len(seconds))
+            times, cum, starts = state.ts, state.cum, state.starts
+            n = len(times)
+            total = cum[n]
+            for j, length in enumerate(seconds):
+                cutoff = ts - length
+                k = starts[j]
+                while k < n and times[k] <= cutoff:
+                    k += 1
+                starts[j] = k
+                values.append(n - k)
+                values.append(total - cum[k])
+            values.append(ts - state.last_ts if state.last_ts is not None else NO_HISTORY)
+            if update:
+                times.append(ts)
+                cum.append(total + amount)
+                state.last_ts = ts
+                if starts[self._longest] > _EntityState.COMPACT_AFTER:
+                    state.compact()
+
+        user = event[ENTITIES["user"]]
+        for flag, column in NOVELTY_COLUMNS.items():
+            seen = self._seen[flag].get(user)
+            is_new = seen is None or event[column] not in seen
+            values.append(float(is_new))
+            if update and is_new:
+                if seen is None:
+                    seen = self._seen[flag][user] = set()
+                seen.add(event[column])
+        return np.array(values, dtype=np.float64)
+
+    def score(self, event):
+        """
+        Features for an event without recording it.
+        """
+        return self.process(event, update=False)
+
+    def update_frame(self, df):
+        """
+        Replays a time-ordered DataFrame through the store (e.g. to warm it
+        up from recent history).
+
+        Returns:
+            pd.DataFrame: Per-row features, aligned with df.index.
+        """
+        columns = ["timestamp", "amount"] + list(self.entities.values()) + list(NOVELTY_COLUMNS.values())
+        records = df[list(dict.fromkeys(columns))].assign(timestamp=_to_seconds(df["timestamp"])).to_dict("records")
+        rows = [self.process(record) for record in records]
+        return pd.DataFrame(np.array(rows).reshape(len(rows), len(self.names)), columns=self.names, index=df.index)
+
+    def num_entities(self):
+        return {entity: len(states) for entity, states in self._state.items()}
+
+# === Benchmark ===
+
+def synthetic_transactions(n_rows=1_000_000, n_users=50_000, n_merchants=2_000, days=30, seed=0):
+    """
+    Random transactions in the synthetic_data.csv schema, sorted by time.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-01-01T00:00:00")
+    offsets = np.sort(rng.integers(0, days * 86400, n_rows))
+    return pd.DataFrame({
+        "amount": np.round(rng.gamma(2.0, 60.0, n_rows), 2),
+        "merchant_id": np.char.add("M", np.minimum(rng.zipf(1.5, n_rows), n_merchants).astype(str)),
+        "timestamp": start + offsets.astype("timedelta64[s]"),
+        "location": rng.choice(["CA", "TX", "NY", "FL", "WA"], n_rows),
+        "device_type": rng.choice(["desktop", "mobile", "tablet"], n_rows),
+        "user_id": rng.integers(0, n_users, n_rows),
+    })
+
+def benchmark_velocity(n_rows=1_000_000, n_online=100_000, seed=0):
+    """
+    Times the batch backfill and per-event online scoring, and checks that
+    both paths agree.
+    """
+    df = synthetic_transactions(n_rows, seed=seed)
+
+    start = time.perf_counter()
+    batch = velocity_features(df)
+    batch_secs = time.perf_counter() - start
+
+    store = VelocityFeatureStore()
+    online = df.head(n_online)
+    start = time.perf_counter()
+    streamed = store.update_frame(online)
+    online_secs = time.perf_counter() - start
+
+    max_diff = float(np.abs(streamed.to_numpy() - batch.head(n_online).to_numpy()).max())
+    print(f"\n=== Velocity Features ({len(VELOCITY_FEATURES)} columns) ===")
+    print(f"Batch backfill:  {n_rows:,} rows in {batch_secs:.2f}s ({n_rows / batch_secs:,.0f} rows/sec)")
+    print(f"Online store:    {n_online:,} events in {online_secs:.2f}s "
+          f"({online_secs / n_online * 1e6:.1f} us/event)")
+    print(f"Max batch/online difference: {max_diff:.2e}")
+    return {"batch": batch_secs, "online_us": online_secs / n_online * 1e6, "max_diff": max_diff}
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-user and per-merchant velocity features")
+    parser.add_argument("--input", type=str, help="Transactions CSV to backfill")
+    parser.add_argument("--output", type=str, default="velocity_features.csv", help="Output CSV with features appended")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Benchmark batch and online paths on ROWS synthetic rows")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_velocity(n_rows=args.benchmark, n_online=min(args.benchmark, 100_000))
+        return
+    if not args.input:
+        parser.error("--input is required unless --benchmark is given")
+    df = add_velocity_features(pd.read_csv(args.input))
+    df.to_csv(args.output, index=False)
+    print(f"Wrote {len(df)} rows with {len(VELOCITY_FEATURES)} velocity features to {args.output}")
 
 if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
+    main()
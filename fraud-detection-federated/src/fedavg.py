@@ -0,0 +1,264 @@
+"""
+Lightweight federated averaging engine for plain Keras models.
+Replaces tff.learning.algorithms.build_weighted_fed_avg for simulation: clients
+train with local SGD, the server averages their weights with NumPy and applies
+a pluggable server optimizer to the averaged update (FedAvg, FedAvgM, FedAdam).
+"""
+
+import time
+
+import numpy as np
+
+from client_shards import client_size, fit_client
+from parallel_simulator import weighted_average
+from update_compression import make_compressor, payload_bytes
+
+# === Server Optimizers ===
+# Each optimizer is functional: init() builds its state from the initial
+# weights and apply() returns new weights and state, so the whole server state
+# is plain NumPy and easy to checkpoint.
+
+class ServerSGD:
+    """
+    Plain FedAvg: moves the global model by learning_rate * (average - global).
+    learning_rate=1.0 reproduces weighted averaging exactly.
+    """
+
+    def __init__(self, learning_rate=1.0):
+        self.learning_rate = learning_rate
+
+    def init(self, weights):
+        return {}
+
+    def apply(self, weights, delta, state):
+        return [w + self.learning_rate * d for w, d in zip(weights, delta)], state
+
+class ServerMomentum:
+    """
+    FedAvgM: server-side heavy-ball momentum on the averaged update.
+    """
+
+    def __init__(self, learning_rate=1.0, momentum=0.9):
+        self.learning_rate = learning_rate
+        self.momentum = momentum
+
+    def init(self, weights):
+        return {"velocity": [np.zeros_like(w) for w in weights]}
+
+    def apply(self, weights, delta, state):
+        velocity = [self.momentum * v + d for v, d in zip(state["velocity"], delta)]
+        new_weights = [w + self.learning_rate * v for w, v in zip(weights, velocity)]
+        return new_weights, {"velocity": velocity}
+
+class ServerAdam:
+    """
+    FedAdam (Reddi et al., 2021): Adam on the averaged update as a pseudo-gradient.
+    """
+
+    def __init__(self, learning_rate=0.01, beta_1=0.9, beta_2=0.99, epsilon=1e-3):
+        self.learning_rate = learning_rate
+        self.beta_1 = beta_1
+        self.beta_2 = beta_2
+        self.epsilon = epsilon
+
+    def init(self, weights):
+        return {
+            "m": [np.zeros_like(w) for w in weights],
+            "v": [np.zeros_like(w) for w in weights],
+            "step": 0,
+        }
+
+    def apply(self, weights, delta, state):
+        step = state["step"] + 1
+        m = [self.beta_1 * m + (1 - self.beta_1) * d for m, d in zip(state["m"], delta)]
+        v = [self.beta_2 * v + (1 - self.beta_2) * d * d for v, d in zip(state["v"], delta)]
+        m_hat_scale = 1.0 / (1 - self.beta_1 ** step)
+        v_hat_scale = 1.0 / (1 - self.beta_2 ** step)
+        new_weights = [
+            w + self.learning_rate * (mi * m_hat_scale) / (np.sqrt(vi * v_hat_scale) + self.epsilon)
+            for w, mi, vi in zip(weights, m, v)
+        ]
+        return new_weights, {"m": m, "v": v, "step": step}
+
+SERVER_OPTIMIZERS = {
+    "sgd": ServerSGD,
+    "momentum": ServerMomentum,
+    "adam": ServerAdam,
+}
+
+def make_server_optimizer(spec="sgd", **kwargs):
+    """
+    Returns a server optimizer from a name ('sgd', 'momentum', 'adam') or passes an instance through.
+    """
+    if not isinstance(spec, str):
+        return spec
+    if spec not in SERVER_OPTIMIZERS:
+        raise ValueError(f"Unsupported server optimizer '{spec}'. Choose from {list(SERVER_OPTIMIZERS)}.")
+    return SERVER_OPTIMIZERS[spec](**kwargs)
+
+# === Client Training ===
+
+class LocalTrainer:
+    """
+    Trains clients one after another in the current process.
+
+    Exposes the same train_clients() interface as ParallelSimulator, so the
+    engine can switch between in-process and multi-process client training.
+    """
+
+    def __init__(self, model_fn, learning_rate=0.05, local_epochs=1, batch_size=32):
+        """
+        Args:
+            model_fn (callable): Returns an (uncompiled or compiled) Keras model.
+            learning_rate (float): Client SGD learning rate.
+            local_epochs (int): Local epochs per client per round.
+            batch_size (int): Local batch size.
+        """
+        from tensorflow.keras.optimizers import SGD
+
+        self.model = model_fn()
+        self.model.compile(optimizer=SGD(learning_rate=learning_rate), loss="binary_crossentropy")
+        self.local_epochs = local_epochs
+        self.batch_size = batch_size
+
+    def train_clients(self, global_weights, client_data, client_ids=None):
+        client_ids = range(len(client_data)) if client_ids is None else client_ids
+        results = []
+        for i, client in zip(client_ids, client_data):
+            start = time.perf_counter()
+            self.model.set_weights(global_weights)
+            loss = fit_client(self.model, client, epochs=self.local_epochs, batch_size=self.batch_size)
+            results.append({
+                "client_id": i,
+                "weights": self.model.get_weights(),
+                "num_samples": client_size(client),
+                "loss": loss,
+                "seconds": time.perf_counter() - start,
+            })
+        return results
+
+    def evaluate_clients(self, global_weights, client_data, **accumulator_opts):
+        """
+        Scores every client locally with the global model.
+
+        Returns:
+            list: One streaming_metrics.MetricAccumulator per client.
+        """
+        from streaming_metrics import evaluate_client
+
+        self.model.set_weights(global_weights)
+        return [evaluate_client(self.model, client, **accumulator_opts) for client in client_data]
+
+# === Engine ===
+
+class FedAvgEngine:
+    """
+    Weighted federated averaging with a pluggable server optimizer.
+
+    Mirrors the TFF iterative process API: initialize() returns the server
+    state and next(state, client_data) runs one round and returns
+    (state, metrics). The state is a dict of NumPy arrays.
+    """
+
+    def __init__(self, model_fn, trainer=None, server_optimizer="sgd", compressor=None):
+        """
+        Args:
+            model_fn (callable): Returns a Keras model with the global architecture.
+            trainer: Object with train_clients(weights, client_data); defaults to a LocalTrainer.
+            server_optimizer: Name from SERVER_OPTIMIZERS or an optimizer instance.
+            compressor: Name from update_compression.COMPRESSORS or a compressor
+                instance applied to each client's delta before aggregation.
+        """
+        self.model_fn = model_fn
+        self.trainer = trainer or LocalTrainer(model_fn)
+        self.server_optimizer = make_server_optimizer(server_optimizer)
+        self.compressor = make_compressor(compressor)
+
+    def initialize(self):
+        weights = self.model_fn().get_weights()
+        return {
+            "round": 0,
+            "weights": weights,
+            "optimizer": self.server_optimizer.init(weights),
+        }
+
+    def aggregate(self, state, results, weight_scales=None):
+        """
+        Compresses, averages and applies client results to the server state.
+
+        Args:
+            state (dict): Current server state.
+            results (list): Client result dicts from train_clients. A result may
+                carry 'base_weights' (the possibly stale global model it started
+                from); otherwise its delta is taken against state['weights'].
+            weight_scales (list): Optional per-client discounts in [0, 1]
+                (e.g. staleness or straggler discounts). They shrink each
+                client's contribution, sum(s_i * n_i * delta_i) / sum(n_i),
+                rather than only re-weighting clients against each other, so
+                a buffer of equally stale updates still moves the model less.
+
+        Returns:
+            dict: New server state.
+            dict: Aggregation metrics.
+        """
+        sizes = np.array([r["num_samples"] for r in results], dtype=np.float64)
+        scales = np.ones_like(sizes) if weight_scales is None else np.asarray(weight_scales, dtype=np.float64)
+
+        # Clients upload their delta against the global model they received.
+        deltas, uplink_bytes = [], 0
+        for r in results:
+            base = r.get("base_weights", state["weights"])
+            client_delta = [w - g for w, g in zip(r["weights"], base)]
+            payload = self.compressor.compress(client_delta, client_id=r["client_id"])
+            uplink_bytes += payload_bytes(payload)
+            deltas.append(self.compressor.decompress(payload))
+        delta = weighted_average(deltas, sizes * scales)
+        # weighted_average normalizes by sum(s_i * n_i); rescale to sum(n_i).
+        shrink = float((sizes * scales).sum() / sizes.sum())
+        if shrink != 1.0:
+            delta = [(d * shrink).astype(d.dtype) for d in delta]
+        weights, opt_state = self.server_optimizer.apply(state["weights"], delta, state["optimizer"])
+
+        new_state = {"round": state["round"] + 1, "weights": weights, "optimizer": opt_state}
+        metrics = {
+            "loss": float(np.average([r["loss"] for r in results], weights=sizes)),
+            "num_samples": int(sizes.sum()),
+            "clients": len(results),
+            "uplink_bytes": uplink_bytes,
+        }
+        client_secs = [r["seconds"] for r in results if "seconds" in r]
+        if client_secs:
+            metrics["client_seconds_mean"] = float(np.mean(client_secs))
+            metrics["client_seconds_max"] = float(np.max(client_secs))
+        return new_state, metrics
+
+    def next(self, state, client_data, client_ids=None, weight_scales=None):
+        """
+        Runs one synchronous round over the given clients.
+
+        Args:
+            state (dict): Current server state.
+            client_data (list): (X_i, y_i) tuples for the participating clients.
+            client_ids (list): Stable ids for those clients (defaults to positions).
+            weight_scales (list): Optional per-client aggregation multipliers.
+        """
+        start = time.perf_counter()
+        results = self.trainer.train_clients(state["weights"], client_data, client_ids=client_ids)
+        new_state, metrics = self.aggregate(state, results, weight_scales=weight_scales)
+        metrics["round_seconds"] = time.perf_counter() - start
+        return new_state, metrics
+
+    def evaluate(self, state, client_data, **accumulator_opts):
+        """
+        Federated evaluation: clients build metric accumulators locally and
+        the server merges them, so no client's rows leave the client.
+
+        Returns:
+            dict: Merged metrics (see MetricAccumulator.result).
+            list: Per-client metrics.
+        """
+        from streaming_metrics import MetricAccumulator
+
+        accumulators = self.trainer.evaluate_clients(state["weights"], client_data, **accumulator_opts)
+        per_client = [acc.result() for acc in accumulators]
+        return MetricAccumulator.merge_all(accumulators).result(), per_client
@@ -1,29 +1,54 @@
 
-import pandas as pd
+import argparse
+import time
 import numpy as np
 import tensorflow as tf
-import tensorflow_federated as tff
+from data_loader import load_raw_data, preprocess_data
+from client_shards import ShardedDataset, client_size, pooled
+from input_pipeline import build_client_dataset, measure_steps_per_sec
+from data_augmentation import METHODS as AUGMENTATIONS, augment_clients
+from partitioning import GROUP_COLUMNS, PARTITIONERS, client_stats, make_partition, summarize_heterogeneity
 
-# Load dataset
-df = pd.read_csv("../data/synthetic_data.csv")
+DATA_PATH = "../data/synthetic_data.csv"
 features = ["amount", "is_international", "merchant_id"]
 target = "is_fraud"
+NUM_CLIENTS = 3
+NUM_ROUNDS = 10
+CLIENT_LR = 0.05
+BATCH_SIZE = 32
 
-X = df[features].values.astype(np.float32)
-y = df[target].values.astype(np.int32)
-
-# Simulate 3 clients evenly
-def split_clients(X, y, num_clients=3):
-    split_X = np.array_split(X, num_clients)
-    split_y = np.array_split(y, num_clients)
-    return list(zip(split_X, split_y))
+# Simulate 3 clients evenly. Clients are index views over one shared base
+# array (see client_shards); rows are gathered per batch during training.
+def split_clients(X, y, num_clients=3, memmap_dir=None):
+    dataset = ShardedDataset(X, y)
+    if memmap_dir:
+        dataset = dataset.to_memmap(memmap_dir)
+    return dataset.partition(num_clients, shuffle=False)
 
-client_data = split_clients(X, y, num_clients=3)
+def load_client_data(path=DATA_PATH, num_clients=NUM_CLIENTS, memmap_dir=None, partition="contiguous",
+                     alpha=0.5, seed=42, stats_path=None):
+    # merchant_id is categorical ("M303"), so it goes through the fitted
+    # preprocessing pipeline instead of a raw float cast.
+    df = load_raw_data(path)
+    X, y = preprocess_data(df, features, target)
+    if partition == "contiguous":
+        return split_clients(X.astype(np.float32), y.astype(np.int32), num_clients=num_clients, memmap_dir=memmap_dir)
 
-def create_tf_dataset(X, y):
-    return tf.data.Dataset.from_tensor_slices((X, y)).shuffle(buffer_size=10).batch(4)
+    # Non-IID partitions (see partitioning.PARTITIONERS) over the same shared base array.
+    dataset = ShardedDataset(X.astype(np.float32), y.astype(np.int32))
+    if memmap_dir:
+        dataset = dataset.to_memmap(memmap_dir)
+    index_lists = make_partition(partition, dataset.y, num_clients, df=df, alpha=alpha, seed=seed)
+    if stats_path:
+        keys = df[GROUP_COLUMNS[partition]].to_numpy() if partition in GROUP_COLUMNS else None
+        stats = client_stats(index_lists, dataset.y, keys=keys)
+        stats.to_csv(stats_path, index=False)
+        print(f"Wrote per-client statistics to {stats_path}: {summarize_heterogeneity(stats)}")
+    return [dataset.shard(idx) for idx in index_lists]
 
-federated_train_data = [create_tf_dataset(x, y) for x, y in client_data]
+def create_tf_dataset(X, y, batch_size=BATCH_SIZE, **pipeline_opts):
+    # See input_pipeline.build_client_dataset for shuffle/cache/prefetch/map/repeat options.
+    return build_client_dataset(X, y, batch_size=batch_size, **pipeline_opts)
 
 # === Model Builder ===
 def create_keras_model():
@@ -35,42 +60,434 @@ def create_keras_model():
     ])
     return model
 
-def model_fn():
-    keras_model = create_keras_model()
-    return tff.learning.models.from_keras_model(
-        keras_model,
-        input_spec=federated_train_data[0].element_spec,
-        loss=tf.keras.losses.BinaryCrossentropy(),
-        metrics=[tf.keras.metrics.BinaryAccuracy()]
+# === Federated Process (TensorFlow Federated) ===
+def build_tff_process(federated_train_data):
+    import tensorflow_federated as tff
+
+    def model_fn():
+        keras_model = create_keras_model()
+        return tff.learning.models.from_keras_model(
+            keras_model,
+            input_spec=federated_train_data[0].element_spec,
+            loss=tf.keras.losses.BinaryCrossentropy(),
+            metrics=[tf.keras.metrics.BinaryAccuracy()]
+        )
+
+    return tff.learning.algorithms.build_weighted_fed_avg(
+        model_fn=model_fn,
+        client_optimizer_fn=lambda: tf.keras.optimizers.SGD(learning_rate=CLIENT_LR),
+        server_optimizer_fn=lambda: tf.keras.optimizers.Adam()
     )
 
-# === Federated Process ===
-iterative_process = tff.learning.algorithms.build_weighted_fed_avg(
-    model_fn=model_fn,
-    client_optimizer_fn=lambda: tf.keras.optimizers.SGD(learning_rate=0.05),
-    server_optimizer_fn=lambda: tf.keras.optimizers.Adam()
-)
+def train_tff(client_data, num_rounds=NUM_ROUNDS, batch_size=BATCH_SIZE):
+    import tensorflow_federated as tff
 
-state = iterative_process.initialize()
+    federated_train_data = [create_tf_dataset(x, y, batch_size=batch_size) for x, y in client_data]
+    iterative_process = build_tff_process(federated_train_data)
+    state = iterative_process.initialize()
 
-# Train for several rounds
-NUM_ROUNDS = 10
-for round_num in range(1, NUM_ROUNDS + 1):
-    state, metrics = iterative_process.next(state, federated_train_data)
-    print(f"Round {round_num}: {metrics}")
+    for round_num in range(1, num_rounds + 1):
+        state, metrics = iterative_process.next(state, federated_train_data)
+        print(f"Round {round_num}: {metrics}")
 
-# Evaluate global model
-def evaluate_model(state, dataset):
     keras_model = create_keras_model()
-    model_weights = state.model.trainable
-    tff.learning.models.assign_weights_to_keras_model(keras_model, model_weights)
-    keras_model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
-    result = keras_model.evaluate(dataset.batch(8), verbose=0)
-    print(f"\nGlobal Model Evaluation: Loss={result[0]:.4f}, Accuracy={result[1]:.4f}")
-
-# Combine all client data for evaluation
-full_X = np.vstack([x for x, _ in client_data])
-full_y = np.hstack([y for _, y in client_data])
-full_dataset = tf.data.Dataset.from_tensor_slices((full_X, full_y))
-
-evaluate_model(state, full_dataset)
+    tff.learning.models.assign_weights_to_keras_model(keras_model, iterative_process.get_model_weights(state))
+    return keras_model
+
+# === Federated Process (NumPy FedAvg engine) ===
+def build_numpy_engine(server_optimizer="adam", batch_size=BATCH_SIZE, compression="none", workers=None):
+    from fedavg import FedAvgEngine, LocalTrainer
+
+    # Same client SGD / server Adam pairing as the TFF process.
+    if workers and workers > 1:
+        # Clients train in parallel worker processes (see parallel_simulator).
+        from parallel_simulator import ParallelSimulator
+        trainer = ParallelSimulator(None, model_fn=create_keras_model, num_workers=workers,
+                                    batch_size=batch_size, learning_rate=CLIENT_LR)
+    else:
+        trainer = LocalTrainer(create_keras_model, learning_rate=CLIENT_LR, batch_size=batch_size)
+    return FedAvgEngine(create_keras_model, trainer=trainer, server_optimizer=server_optimizer,
+                        compressor=compression)
+
+def build_scheduler(engine, num_clients, scheduler="sync", clients_per_round=None, deadline=None,
+                    straggler_policy="drop", buffer_size=5, seed=42):
+    from round_scheduler import AsyncScheduler, ClientLatencyModel, SyncScheduler
+
+    latency_model = ClientLatencyModel(num_clients, seed=seed)
+    if scheduler == "async":
+        concurrency = clients_per_round or num_clients
+        if isinstance(concurrency, float):
+            concurrency = max(1, int(round(concurrency * num_clients)))
+        return AsyncScheduler(engine, latency_model, concurrency=concurrency,
+                              buffer_size=min(buffer_size, concurrency), seed=seed)
+    return SyncScheduler(engine, latency_model, clients_per_round=clients_per_round, deadline=deadline,
+                         straggler_policy=straggler_policy, seed=seed)
+
+def _checkpoint_payload(engine, runner, state):
+    payload = {"server": state}
+    if hasattr(engine.compressor, "get_state"):
+        payload["compressor"] = engine.compressor.get_state()
+    if runner is not None:
+        payload["scheduler"] = runner.get_state()
+    return payload
+
+def _restore_payload(engine, runner, payload):
+    if "compressor" in payload:
+        engine.compressor.set_state(payload["compressor"])
+    if runner is not None and "scheduler" in payload:
+        runner.set_state(payload["scheduler"])
+    return payload["server"]
+
+def train_numpy(client_data, num_rounds=NUM_ROUNDS, server_optimizer="adam", batch_size=BATCH_SIZE,
+                compression="none", scheduler=None, checkpoint_dir=None, checkpoint_every=1,
+                keep_checkpoints=3, resume=True, workers=None, **scheduler_opts):
+    engine = build_numpy_engine(server_optimizer, batch_size=batch_size, compression=compression, workers=workers)
+    try:
+        return _train_numpy(engine, client_data, num_rounds, server_optimizer, batch_size, compression, scheduler,
+                            checkpoint_dir, checkpoint_every, keep_checkpoints, resume, **scheduler_opts)
+    finally:
+        if hasattr(engine.trainer, "close"):
+            engine.trainer.close()
+
+def _train_numpy(engine, client_data, num_rounds, server_optimizer, batch_size, compression, scheduler,
+                 checkpoint_dir, checkpoint_every, keep_checkpoints, resume, **scheduler_opts):
+    state = engine.initialize()
+    # Sampled / deadline / async rounds on a simulated clock (see round_scheduler).
+    runner = build_scheduler(engine, len(client_data), scheduler=scheduler, **scheduler_opts) if scheduler else None
+
+    if scheduler == "async":
+        if checkpoint_dir:
+            raise ValueError("Checkpointing supports synchronous rounds only (in-flight async updates are not saved).")
+        state, history = runner.run(state, client_data, num_rounds)
+        for entry in history:
+            print(f"Round {entry['round']} (t={entry['sim_time']:.1f}s): {entry}")
+    else:
+        # num_rounds is the total to reach, so a resumed run only trains the remaining rounds.
+        manager = None
+        history = []
+        if checkpoint_dir:
+            from checkpoint import CheckpointManager
+            # Server optimizer slots, compressor state and scheduler RNGs only
+            # make sense for the settings they were saved with.
+            config = dict(server_optimizer=server_optimizer, batch_size=batch_size, compression=compression,
+                          scheduler=scheduler, **scheduler_opts)
+            manager = CheckpointManager(checkpoint_dir, every=checkpoint_every, keep=keep_checkpoints,
+                                        config=config)
+            payload, metadata = manager.restore() if resume else (None, None)
+            if payload is not None:
+                state = _restore_payload(engine, runner, payload)
+                history = metadata["history"]
+                print(f"Resumed from {manager.latest()} (round {state['round']})")
+
+        sim_time = history[-1].get("sim_time", 0.0) if history else 0.0
+        while state["round"] < num_rounds:
+            if runner is None:
+                state, metrics = engine.next(state, client_data)
+            else:
+                state, metrics = runner.run_round(state, client_data)
+                sim_time += metrics["sim_seconds"]
+                metrics["sim_time"] = sim_time
+            history.append(metrics)
+            print(f"Round {state['round']}: {metrics}")
+            if manager is not None:
+                manager.save(state["round"], _checkpoint_payload(engine, runner, state), {"history": history},
+                             force=state["round"] == num_rounds)
+
+    keras_model = create_keras_model()
+    keras_model.set_weights(state["weights"])
+    return keras_model
+
+# Evaluate global model
+def evaluate_model(keras_model, client_data, batch_size=4096, n_bins=4096):
+    # Federated evaluation: every client scores its own rows in batches into a
+    # mergeable accumulator; only the accumulators are combined.
+    from streaming_metrics import MetricAccumulator, evaluate_client
+
+    accumulators = [evaluate_client(keras_model, client, batch_size=batch_size, n_bins=n_bins)
+                    for client in client_data]
+    result = MetricAccumulator.merge_all(accumulators).result()
+    at = result["thresholds"][0.5]
+    lower, upper = result["roc_auc_bounds"]
+    print(f"\nGlobal Model Evaluation: Loss={result['log_loss']:.4f}, Accuracy={at['accuracy']:.4f}, "
+          f"AUC={result['roc_auc']:.4f} [{lower:.4f}, {upper:.4f}], PR-AUC={result['pr_auc']:.4f}")
+    return result
+
+# === Input Pipeline Throughput ===
+def measure_client_pipelines(client_data, batch_sizes=(4, BATCH_SIZE)):
+    """
+    Reports training steps/sec and samples/sec per client for each batch size.
+    """
+    model = create_keras_model()
+    model.compile(optimizer=tf.keras.optimizers.SGD(learning_rate=CLIENT_LR), loss='binary_crossentropy')
+    report = {}
+    print("\n=== Client Input Pipeline Throughput ===")
+    for batch_size in batch_sizes:
+        for i, (X, y) in enumerate(client_data):
+            stats = measure_steps_per_sec(create_tf_dataset(X, y, batch_size=batch_size), model=model)
+            report[(batch_size, i)] = stats
+            print(f"batch_size={batch_size:<4} client {i+1}: {stats['steps_per_sec']:,.0f} steps/sec "
+                  f"({stats['steps_per_sec'] * batch_size:,.0f} samples/sec)")
+    return report
+
+# === Update Compression Comparison ===
+def compare_compression(client_data, num_rounds=NUM_ROUNDS, methods=("none", "int8", "topk", "topk+int8")):
+    """
+    Trains with each compressor from the same initial model and reports
+    uplink bytes per round, per-round loss and final accuracy.
+    """
+    full_X, full_y = pooled(client_data)
+    initial_weights = create_keras_model().get_weights()
+    report = {}
+    for method in methods:
+        engine = build_numpy_engine(compression=method)
+        state = engine.initialize()
+        state["weights"] = [w.copy() for w in initial_weights]
+        losses, round_bytes = [], []
+        for _ in range(num_rounds):
+            state, metrics = engine.next(state, client_data)
+            losses.append(metrics["loss"])
+            round_bytes.append(metrics["uplink_bytes"])
+        keras_model = create_keras_model()
+        keras_model.set_weights(state["weights"])
+        keras_model.compile(loss='binary_crossentropy', metrics=['accuracy'])
+        loss, acc = keras_model.evaluate(full_X, full_y, verbose=0)
+        report[method] = {"bytes_per_round": float(np.mean(round_bytes)), "losses": losses,
+                          "final_loss": loss, "accuracy": acc}
+
+    baseline = report[methods[0]]["bytes_per_round"]
+    print(f"\n=== Update Compression ({len(client_data)} clients, {num_rounds} rounds) ===")
+    for method, r in report.items():
+        print(f"{method:<10} {r['bytes_per_round']:>10,.0f} bytes/round ({baseline / r['bytes_per_round']:.1f}x smaller)  "
+              f"loss={r['final_loss']:.4f} acc={r['accuracy']:.4f}  "
+              f"loss by round: {' '.join(f'{l:.3f}' for l in r['losses'])}")
+    return report
+
+# === Round Scheduler Comparison ===
+def compare_schedulers(client_data, target_auc=0.75, max_rounds=50, clients_per_round=0.5, deadline=None):
+    """
+    Trains under each scheduling strategy from the same initial model and
+    reports the simulated time to reach target_auc on the pooled data.
+    """
+    from round_scheduler import make_auc_eval, time_to_target
+
+    full_X, full_y = pooled(client_data)
+    eval_fn = make_auc_eval(create_keras_model, full_X, full_y)
+    initial_weights = create_keras_model().get_weights()
+    num_clients = len(client_data)
+    if deadline is None:
+        # Median latency of a non-straggling client, so slow clients miss it.
+        from round_scheduler import ClientLatencyModel
+        probe = ClientLatencyModel(num_clients, sigma=0.0)
+        deadline = float(np.median([probe.sample(i, client_size(c)) for i, c in enumerate(client_data)])) * 1.5
+
+    strategies = {
+        "sync-wait": dict(scheduler="sync", clients_per_round=clients_per_round, straggler_policy="wait"),
+        "sync-drop": dict(scheduler="sync", clients_per_round=clients_per_round, deadline=deadline,
+                          straggler_policy="drop"),
+        "sync-downweight": dict(scheduler="sync", clients_per_round=clients_per_round, deadline=deadline,
+                                straggler_policy="downweight"),
+        "fedbuff": dict(scheduler="async", clients_per_round=clients_per_round, buffer_size=3),
+        "fedasync": dict(scheduler="async", clients_per_round=clients_per_round, buffer_size=1),
+    }
+    report = {}
+    for name, opts in strategies.items():
+        engine = build_numpy_engine()
+        state = engine.initialize()
+        state["weights"] = [w.copy() for w in initial_weights]
+        runner = build_scheduler(engine, num_clients, **opts)
+        # Async modes aggregate every buffer_size updates; give them the same client-update budget.
+        steps = max_rounds
+        if opts["scheduler"] == "async":
+            steps = max_rounds * runner.concurrency // runner.buffer_size
+        state, history = runner.run(state, client_data, steps, eval_fn=eval_fn, target=target_auc)
+        report[name] = {
+            "time_to_target": time_to_target(history, target_auc),
+            "steps": len(history),
+            "final_auc": history[-1]["metric"],
+            "sim_time": history[-1]["sim_time"],
+        }
+
+    print(f"\n=== Round Schedulers ({num_clients} clients, target AUC {target_auc}, deadline {deadline:.1f}s) ===")
+    for name, r in report.items():
+        ttt = f"{r['time_to_target']:.1f}s" if r["time_to_target"] is not None else "not reached"
+        print(f"{name:<16} time-to-target={ttt:<12} steps={r['steps']:<4} final AUC={r['final_auc']:.4f} "
+              f"sim time={r['sim_time']:.1f}s")
+    return report
+
+# === Partition Heterogeneity Comparison ===
+def compare_partitions(path=DATA_PATH, num_clients=NUM_CLIENTS, num_rounds=NUM_ROUNDS, alpha=0.5,
+                       strategies=("contiguous",) + PARTITIONERS, seed=42):
+    """
+    Trains from the same initial model under each partition strategy and
+    reports per-round AUC on the pooled data alongside client heterogeneity.
+    """
+    from round_scheduler import make_auc_eval
+
+    initial_weights = create_keras_model().get_weights()
+    report = {}
+    for strategy in strategies:
+        client_data = load_client_data(path, num_clients=num_clients, partition=strategy, alpha=alpha, seed=seed)
+        client_data = [c for c in client_data if c.num_samples > 0]
+        full_X, full_y = pooled(client_data)
+        eval_fn = make_auc_eval(create_keras_model, full_X, full_y)
+        stats = client_stats([c.indices for c in client_data], client_data[0].dataset.y)
+
+        engine = build_numpy_engine()
+        state = engine.initialize()
+        state["weights"] = [w.copy() for w in initial_weights]
+        aucs = []
+        for _ in range(num_rounds):
+            state, _ = engine.next(state, client_data)
+            aucs.append(eval_fn(state["weights"]))
+        report[strategy] = dict(summarize_heterogeneity(stats), aucs=aucs)
+
+    print(f"\n=== Partition Strategies ({num_clients} clients, {num_rounds} rounds, alpha={alpha}) ===")
+    for strategy, r in report.items():
+        print(f"{strategy:<11} clients={r['clients']:<4} size_cv={r['size_cv']:.2f} label_tvd={r['label_tvd_mean']:.3f}  "
+              f"AUC by round: {' '.join(f'{a:.3f}' for a in r['aucs'])}")
+    return report
+
+# === Backend Benchmark ===
+def benchmark_backends(client_data, num_rounds=3):
+    """
+    Compares startup (import + initialize) and per-round time of both backends.
+    """
+    report = {}
+
+    start = time.perf_counter()
+    engine = build_numpy_engine()
+    state = engine.initialize()
+    startup = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(num_rounds):
+        state, _ = engine.next(state, client_data)
+    report["numpy"] = {"startup": startup, "round": (time.perf_counter() - start) / num_rounds}
+
+    try:
+        start = time.perf_counter()
+        federated_train_data = [create_tf_dataset(x, y) for x, y in client_data]
+        iterative_process = build_tff_process(federated_train_data)
+        tff_state = iterative_process.initialize()
+        startup = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(num_rounds):
+            tff_state, _ = iterative_process.next(tff_state, federated_train_data)
+        report["tff"] = {"startup": startup, "round": (time.perf_counter() - start) / num_rounds}
+    except ImportError:
+        print("tensorflow_federated is not installed; skipping the TFF backend.")
+
+    print(f"\n=== FedAvg Backend Benchmark ({len(client_data)} clients, {num_rounds} rounds) ===")
+    for name, timing in report.items():
+        print(f"{name:<6} startup={timing['startup']:.2f}s  round={timing['round']:.3f}s")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Federated training for fraud detection")
+    parser.add_argument("--backend", choices=["numpy", "tff"], default="numpy",
+                        help="numpy: in-repo FedAvg engine; tff: TensorFlow Federated")
+    parser.add_argument("--rounds", type=int, default=NUM_ROUNDS, help="Number of federated rounds")
+    parser.add_argument("--clients", type=int, default=NUM_CLIENTS, help="Number of simulated clients")
+    parser.add_argument("--memmap_dir", type=str, default=None,
+                        help="Write the preprocessed base arrays here and memory-map them for all clients")
+    parser.add_argument("--partition", choices=("contiguous",) + PARTITIONERS, default="contiguous",
+                        help="How rows are assigned to clients (dirichlet: label skew, quantity: size skew, "
+                             "merchant/location/user: group-by column)")
+    parser.add_argument("--alpha", type=float, default=0.5,
+                        help="Dirichlet concentration for --partition dirichlet/quantity (smaller = more skewed)")
+    parser.add_argument("--client_stats", type=str, default=None, help="Write per-client statistics to this CSV")
+    parser.add_argument("--compare_partitions", action="store_true",
+                        help="Compare convergence across partition strategies")
+    parser.add_argument("--server_optimizer", choices=["sgd", "momentum", "adam"], default="adam",
+                        help="Server optimizer for the numpy backend")
+    parser.add_argument("--batch_size", type=int, default=BATCH_SIZE, help="Client batch size")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Train clients in N worker processes (numpy backend; default: in-process)")
+    parser.add_argument("--compression", choices=["none", "int8", "topk", "topk+int8"], default="none",
+                        help="Client update compression for the numpy backend")
+    parser.add_argument("--compare_compression", action="store_true",
+                        help="Compare bytes per round and convergence across compressors")
+    parser.add_argument("--scheduler", choices=["sync", "async"], default=None,
+                        help="Run the numpy backend on a simulated clock with client sampling/deadlines (sync) "
+                             "or buffered staleness-weighted updates (async)")
+    parser.add_argument("--clients_per_round", type=float, default=None,
+                        help="Clients per round (>=1) or fraction of clients (<1); async: concurrent clients")
+    parser.add_argument("--deadline", type=float, default=None, help="Sync round deadline in simulated seconds")
+    parser.add_argument("--straggler_policy", choices=["wait", "drop", "downweight"], default="drop",
+                        help="What to do with clients that miss the deadline")
+    parser.add_argument("--buffer_size", type=int, default=5, help="Async updates aggregated per server step")
+    parser.add_argument("--checkpoint_dir", type=str, default=None,
+                        help="Write round checkpoints here and resume from the latest one (numpy backend)")
+    parser.add_argument("--checkpoint_every", type=int, default=1, help="Checkpoint every N rounds")
+    parser.add_argument("--keep_checkpoints", type=int, default=3, help="Number of recent checkpoints to keep")
+    parser.add_argument("--no_resume", action="store_true", help="Ignore existing checkpoints and start from round 1")
+    parser.add_argument("--save_model", type=str, default=None,
+                        help="Save the final global model (e.g. ../models/federated_model.keras)")
+    parser.add_argument("--compare_schedulers", action="store_true",
+                        help="Compare simulated time-to-target-AUC across round schedulers")
+    parser.add_argument("--target_auc", type=float, default=0.75, help="Target AUC for --compare_schedulers")
+    parser.add_argument("--augment", choices=AUGMENTATIONS, default="none",
+                        help="Rebalance each client's training rows (evaluation uses the original rows)")
+    parser.add_argument("--augment_ratio", type=float, default=0.5, help="fraud:legit ratio after --augment")
+    parser.add_argument("--benchmark", action="store_true", help="Compare numpy and TFF backends")
+    parser.add_argument("--measure_pipeline", action="store_true", help="Report client input pipeline steps/sec")
+    args = parser.parse_args()
+    if args.keep_checkpoints < 1:
+        parser.error("--keep_checkpoints must be >= 1")
+
+    if args.compare_partitions:
+        compare_partitions(num_clients=args.clients, num_rounds=args.rounds, alpha=args.alpha)
+        return
+
+    client_data = load_client_data(num_clients=args.clients, memmap_dir=args.memmap_dir, partition=args.partition,
+                                   alpha=args.alpha, stats_path=args.client_stats)
+
+    if args.measure_pipeline:
+        measure_client_pipelines(client_data, batch_sizes=sorted({4, args.batch_size}))
+        return
+
+    if args.compare_compression:
+        compare_compression(client_data, num_rounds=args.rounds)
+        return
+
+    clients_per_round = args.clients_per_round
+    if clients_per_round is not None and clients_per_round >= 1:
+        clients_per_round = int(clients_per_round)
+
+    if args.compare_schedulers:
+        compare_schedulers(client_data, target_auc=args.target_auc, max_rounds=args.rounds,
+                           clients_per_round=clients_per_round or 0.5, deadline=args.deadline)
+        return
+
+    if args.benchmark:
+        benchmark_backends(client_data, num_rounds=args.rounds)
+        return
+
+    train_data = client_data
+    if args.augment != "none":
+        # Resampled clients are index views into the shared base array; SMOTE
+        # clients build their synthetic rows only while they train. Encoded
+        # and binary columns are copied from a neighbor, never interpolated.
+        categorical_idx = [features.index(c) for c in ("is_international", "merchant_id")]
+        train_data = augment_clients(client_data, method=args.augment, ratio=args.augment_ratio, seed=42,
+                                     categorical_idx=categorical_idx, lazy=True)
+        print(f"Augmented client sizes ({args.augment}): {[client_size(c) for c in train_data]}")
+
+    if args.backend == "tff":
+        keras_model = train_tff(train_data, num_rounds=args.rounds, batch_size=args.batch_size)
+    else:
+        keras_model = train_numpy(train_data, num_rounds=args.rounds, server_optimizer=args.server_optimizer,
+                                  batch_size=args.batch_size, compression=args.compression,
+                                  scheduler=args.scheduler, clients_per_round=clients_per_round,
+                                  deadline=args.deadline, straggler_policy=args.straggler_policy,
+                                  buffer_size=args.buffer_size, checkpoint_dir=args.checkpoint_dir,
+                                  checkpoint_every=args.checkpoint_every, keep_checkpoints=args.keep_checkpoints,
+                                  resume=not args.no_resume, workers=args.workers)
+
+    if args.save_model:
+        keras_model.save(args.save_model)
+        print(f"Saved global model to {args.save_model}")
+
+    evaluate_model(keras_model, client_data)
+
+if __name__ == "__main__":
+    main()
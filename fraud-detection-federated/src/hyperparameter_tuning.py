@@ -1,155 +1,425 @@
 """
-This module handles hyperparameter tuning.
+Parallel hyperparameter search over model_builder and trainer settings.
+Successive halving trains many configurations for a few epochs, keeps the
+best 1/eta of them and retrains those with eta times the epochs, until the
+full budget is reached; Hyperband runs several such brackets that trade the
+number of configurations against the starting budget. Trials run in a
+process pool, and every result is appended to a JSONL trial log, so an
+interrupted search resumes without repeating finished trials; the log is
+tied to a fingerprint of the data and seed, so it is never reused for others.
 """
 
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles hyperparameter tuning.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles hyperparameter tuning.
-"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles hyperparameter tuning.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles hyperparameter tuning.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
 
-    def print_preview(self):
-        print(self.data.head())
+# model_builder.build_model and trainer.train_model arguments; epochs is the
+# budget the search itself allocates.
+SEARCH_SPACE = {
+    "architecture": ["simple", "wide", "deep"],
+    "optimizer": ["adam", "sgd", "rmsprop"],
+    "dropout_rate": [0.1, 0.2, 0.4],
+    "batch_size": [32, 128],
+    "patience": [2, 5],
+}
+
+SEARCH_METHODS = ("grid", "halving", "hyperband")
+
+# === Search Spaces ===
+
+def grid(space=SEARCH_SPACE):
+    """
+    Every combination of the space's values, as a list of config dicts.
+    """
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+def sample_configs(space=SEARCH_SPACE, n=10, seed=None):
+    """
+    n distinct random configs (all of them if the grid is smaller).
+    """
+    configs = grid(space)
+    rng = np.random.default_rng(seed)
+    return [configs[i] for i in rng.permutation(len(configs))[:n]]
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+# === Trial Log ===
+
+class TrialLog:
+    """
+    Append-only JSONL record of finished trials, keyed by (config, epochs).
+
+    The first line is a header holding the fingerprint of the data and seed
+    the trials were run with; a log is only reused for the same fingerprint,
+    so a shared log path never feeds scores from other data into a search.
+    """
+
+    def __init__(self, path=None, fingerprint=None):
+        """
+        Args:
+            path (str): JSONL file (None keeps results in memory only).
+            fingerprint (str): trial_fingerprint of the search data and seed.
+
+        Raises:
+            ValueError: If the existing log was written with another fingerprint.
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.results = {}
+        if not path:
+            return
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._append({"fingerprint": fingerprint})
+            return
+        with open(path) as f:
+            header = None
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from an interrupted write.
+                    continue
+                if header is None:
+                    header = record
+                    if header.get("fingerprint") != fingerprint:
+                        raise ValueError(f"Trial log '{path}' was written for different data or seed "
+                                         f"(fingerprint {str(header.get('fingerprint'))[:12]}, expected {str(fingerprint)[:12]}). "
+                                         f"Choose a new log path or delete the old log.")
+                    continue
+                self.results[(config_key(record["config"]), record["epochs"])] = record
+
+    def get(self, config, epochs):
+        return self.results.get((config_key(config), epochs))
+
+    def record(self, result):
+        self.results[(config_key(result["config"]), result["epochs"])] = result
+        if self.path:
+            self._append(result)
+
+    def _append(self, record):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def best(self):
+        return max(self.results.values(), key=lambda r: r["score"], default=None)
+
+    def __len__(self):
+        return len(self.results)
+
+# === Trials ===
+
+_DATA = {}
+
+def save_trial_data(X_train, y_train, X_val, y_val, directory=None):
+    """
+    Writes the search data once as .npy files that every worker memory-maps.
+
+    Returns:
+        str: The data directory.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="fraud-tuning-")
+    for name, array in (("X_train", X_train), ("y_train", y_train), ("X_val", X_val), ("y_val", y_val)):
+        np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array))
+    return directory
+
+def remove_trial_data(directory):
+    """
+    Deletes a directory written by save_trial_data.
+    """
+    shutil.rmtree(directory, ignore_errors=True)
+
+def trial_fingerprint(directory, seed=0):
+    """
+    SHA-256 over the search data and training seed, identifying which trial
+    results are comparable.
+    """
+    digest = hashlib.sha256(f"seed={seed}".encode())
+    for name in ("X_train", "y_train", "X_val", "y_val"):
+        with open(os.path.join(directory, f"{name}.npy"), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _load_trial_data(directory):
+    # Loaded once per worker process and shared by its trials.
+    if directory not in _DATA:
+        _DATA[directory] = tuple(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                                 for name in ("X_train", "y_train", "X_val", "y_val"))
+    return _DATA[directory]
+
+def run_trial(data_dir, config, epochs, seed=0):
+    """
+    Builds, trains and scores one configuration.
+
+    Returns:
+        dict: config, epochs (budget), epochs_run (after early stopping),
+        score (validation ROC AUC), val_loss and seconds.
+    """
+    import tensorflow as tf
+    from metrics_engine import ThresholdMetrics
+    from model_builder import build_model
+    from trainer import train_model
+
+    # One thread per trial: parallelism comes from the process pool.
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    tf.keras.utils.set_random_seed(seed)
+
+    X_train, y_train, X_val, y_val = _load_trial_data(data_dir)
+    start = time.perf_counter()
+    model = build_model(input_shape=X_train.shape[1], architecture=config["architecture"],
+                        optimizer=config["optimizer"], dropout_rate=config["dropout_rate"], show_summary=False)
+    _, history = train_model(model, np.asarray(X_train), np.asarray(y_train), epochs=epochs,
+                             batch_size=config["batch_size"], patience=config["patience"], verbose=0,
+                             plot_history=False)
+    # One forward pass over the validation rows gives both AUC and log-loss.
+    y_val = np.asarray(y_val)
+    scores = np.asarray(model.predict_on_batch(np.asarray(X_val)), dtype=np.float64).ravel()
+    clipped = np.clip(scores, 1e-7, 1 - 1e-7)
+    val_loss = float(-np.mean(np.where(y_val == 1, np.log(clipped), np.log1p(-clipped))))
+    auc = ThresholdMetrics(y_val, scores).roc_auc()
+    return {
+        "config": config,
+        "epochs": epochs,
+        "epochs_run": len(history.history["loss"]),
+        "score": float(auc) if np.isfinite(auc) else 0.0,
+        "val_loss": val_loss,
+        "seconds": time.perf_counter() - start,
+    }
+
+class Tuner:
+    """
+    Runs trials in a process pool, skipping any already in the trial log.
+    """
+
+    def __init__(self, data_dir, log_path=None, workers=1, seed=0):
+        """
+        Args:
+            data_dir (str): Directory written by save_trial_data.
+            log_path (str): JSONL trial log; reused results make searches resumable.
+            workers (int): Trial processes (1 runs trials in this process).
+            seed (int): Training seed shared by all trials.
+        """
+        self.data_dir = data_dir
+        self.log = TrialLog(log_path, fingerprint=trial_fingerprint(data_dir, seed) if log_path else None)
+        self.workers = workers
+        self.seed = seed
+        self.trials_run = 0
+        self.epochs_run = 0
+        # Trials loaded from an earlier run's log, and those this search used.
+        self._logged = set(self.log.results)
+        self._reused = set()
+        self._pool = None
+
+    @property
+    def trials_reused(self):
+        return len(self._reused)
+
+    def _executor(self):
+        if self._pool is None:
+            import multiprocessing as mp
+            # TensorFlow is not fork-safe.
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"))
+        return self._pool
+
+    def evaluate(self, configs, epochs):
+        """
+        Scores every config at the given epoch budget.
+
+        Returns:
+            list: Trial results aligned with configs.
+        """
+        keys = [(config_key(c), epochs) for c in configs]
+        self._reused.update(k for k in keys if k in self._logged)
+        pending = [c for c in configs if self.log.get(c, epochs) is None]
+        if self.workers > 1 and len(pending) > 1:
+            futures = [self._executor().submit(run_trial, self.data_dir, c, epochs, self.seed) for c in pending]
+            for future in futures:
+                self._record(future.result())
+        else:
+            for config in pending:
+                self._record(run_trial(self.data_dir, config, epochs, self.seed))
+        return [self.log.get(c, epochs) for c in configs]
+
+    def _record(self, result):
+        self.log.record(result)
+        self.trials_run += 1
+        self.epochs_run += result["epochs_run"]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# === Search Strategies ===
+
+def grid_search(tuner, configs, epochs):
+    """
+    Every config at the full epoch budget.
+
+    Returns:
+        dict: The best trial.
+    """
+    return max(tuner.evaluate(configs, epochs), key=lambda r: r["score"])
+
+def successive_halving(tuner, configs, min_epochs=1, max_epochs=27, eta=3, verbose=True):
+    """
+    Trains all configs for min_epochs, keeps the top 1/eta, multiplies the
+    budget by eta, and repeats until max_epochs.
+
+    Returns:
+        dict: The best trial at the last rung.
+    """
+    survivors, epochs = list(configs), min_epochs
+    while True:
+        results = tuner.evaluate(survivors, epochs)
+        ranked = sorted(results, key=lambda r: r["score"], reverse=True)
+        if verbose:
+            print(f"  rung: {len(survivors):>3} configs x {epochs:>3} epochs, best AUC {ranked[0]['score']:.4f}")
+        if epochs >= max_epochs or len(ranked) == 1:
+            return ranked[0]
+        survivors = [r["config"] for r in ranked[:max(1, len(ranked) // eta)]]
+        epochs = min(max_epochs, epochs * eta)
+
+def hyperband(tuner, space=SEARCH_SPACE, max_epochs=27, eta=3, seed=0, verbose=True):
+    """
+    Runs successive halving brackets from many configs with a small starting
+    budget down to few configs at the full budget.
+
+    Returns:
+        dict: The best trial over all brackets.
+    """
+    s_max = int(math.floor(math.log(max_epochs, eta) + 1e-9))
+    best = None
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        min_epochs = max(1, int(round(max_epochs / eta ** s)))
+        if verbose:
+            print(f"Bracket s={s}: {n} configs from {min_epochs} epochs")
+        result = successive_halving(tuner, sample_configs(space, n, seed=seed + s), min_epochs, max_epochs, eta,
+                                    verbose=verbose)
+        if best is None or result["score"] > best["score"]:
+            best = result
+    return best
+
+def search(method, tuner, space=SEARCH_SPACE, max_epochs=27, min_epochs=1, eta=3, n_configs=None, seed=0):
+    """
+    Dispatches to grid_search, successive_halving or hyperband.
+    """
+    if method == "hyperband":
+        return hyperband(tuner, space, max_epochs=max_epochs, eta=eta, seed=seed)
+    configs = grid(space) if n_configs is None else sample_configs(space, n_configs, seed=seed)
+    if method == "grid":
+        return grid_search(tuner, configs, max_epochs)
+    if method == "halving":
+        return successive_halving(tuner, configs, min_epochs=min_epochs, max_epochs=max_epochs, eta=eta)
+    raise ValueError(f"Unsupported search method '{method}'. Choose from {list(SEARCH_METHODS)}.")
+
+# === Benchmark ===
+
+def benchmark_search(n_rows=20_000, n_features=8, max_epochs=9, eta=3, workers=1, seed=0):
+    """
+    Wall time, trials and epochs of exhaustive grid search versus successive
+    halving over the same grid, on synthetic imbalanced data.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    logits = X @ rng.normal(size=n_features) + 0.5 * X[:, 0] * X[:, 1] - 3.0
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logits))).astype(np.int32)
+    split = int(0.8 * n_rows)
+    data_dir = save_trial_data(X[:split], y[:split], X[split:], y[split:])
+    try:
+        return _compare_searches(data_dir, max_epochs, eta, workers, seed)
+    finally:
+        remove_trial_data(data_dir)
+
+def _compare_searches(data_dir, max_epochs, eta, workers, seed):
+    space = {"architecture": ["simple", "wide", "deep"], "optimizer": ["adam", "sgd", "rmsprop"],
+             "dropout_rate": [0.2], "batch_size": [64, 256], "patience": [3]}
+    configs = grid(space)
+
+    print(f"\n=== Hyperparameter Search ({len(configs)} configs, {max_epochs} epochs, {workers} workers) ===")
+    report = {}
+    for name in ("grid", "halving"):
+        with Tuner(data_dir, workers=workers, seed=seed) as tuner:
+            start = time.perf_counter()
+            if name == "grid":
+                best = grid_search(tuner, configs, max_epochs)
+            else:
+                best = successive_halving(tuner, configs, min_epochs=1, max_epochs=max_epochs, eta=eta)
+            seconds = time.perf_counter() - start
+        report[name] = {"seconds": seconds, "trials": tuner.trials_run, "epochs": tuner.epochs_run,
+                        "best_score": best["score"], "best_config": best["config"]}
+        print(f"{name:<8} {seconds:7.1f}s  {tuner.trials_run:>3} trials  {tuner.epochs_run:>4} epochs  "
+              f"best AUC {best['score']:.4f}  {config_key(best['config'])}")
+    print(f"Speedup: {report['grid']['seconds'] / report['halving']['seconds']:.1f}x")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive halving / Hyperband hyperparameter search")
+    parser.add_argument("--data", type=str, default="../data/synthetic_data.csv", help="Training CSV")
+    parser.add_argument("--method", choices=SEARCH_METHODS, default="halving", help="Search strategy")
+    parser.add_argument("--max_epochs", type=int, default=27, help="Full epoch budget per trial")
+    parser.add_argument("--min_epochs", type=int, default=1, help="First-rung epochs for successive halving")
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta of the trials at each rung")
+    parser.add_argument("--n_configs", type=int, default=None, help="Random configs to try (default: full grid)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Trial processes")
+    parser.add_argument("--log", type=str, default="../models/tuning_trials.jsonl",
+                        help="Resumable JSONL trial log")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Benchmark halving vs grid search on ROWS rows")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_search(n_rows=args.benchmark, workers=args.workers)
+        return
+
+    from data_loader import load_raw_data, preprocess_data, split_data
+    # Split the raw rows first so the scaler and encoders only see training rows.
+    df = load_raw_data(args.data)
+    features = ["amount", "is_international", "merchant_id"]
+    train_df, val_df, _, _ = split_data(df, df["is_fraud"])
+    X_train, y_train, pipeline = preprocess_data(train_df, features, return_pipeline=True)
+    X_val, y_val = preprocess_data(val_df, features, pipeline=pipeline)
+    X_train, X_val = X_train.astype(np.float32), X_val.astype(np.float32)
+    y_train, y_val = y_train.astype(np.int32), y_val.astype(np.int32)
+    if os.path.dirname(args.log):
+        os.makedirs(os.path.dirname(args.log), exist_ok=True)
+
+    data_dir = save_trial_data(X_train, y_train, X_val, y_val)
+    try:
+        try:
+            tuner = Tuner(data_dir, log_path=args.log, workers=args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+        with tuner:
+            best = search(args.method, tuner, max_epochs=args.max_epochs, min_epochs=args.min_epochs,
+                          eta=args.eta, n_configs=args.n_configs)
+    finally:
+        remove_trial_data(data_dir)
+    print(f"Ran {tuner.trials_run} trials ({tuner.trials_reused} reused from {args.log})")
+    print(f"Best: AUC={best['score']:.4f} at {best['epochs']} epochs with {config_key(best['config'])}")
 
 if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
+    main()
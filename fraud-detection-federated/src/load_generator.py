@@ -0,0 +1,75 @@
+"""
+Load generator for the local scoring server.
+Sends concurrent scoring requests and reports throughput and p50/p99 latency.
+"""
+
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+def send_request(url, rows, timeout=10.0):
+    """
+    Posts one batch of transactions and returns the round-trip latency in milliseconds.
+    """
+    body = json.dumps({"transactions": rows}).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        resp.read()
+    return (time.perf_counter() - start) * 1000.0
+
+def run_load(url="http://127.0.0.1:8080/score", n_requests=2000, concurrency=16,
+             rows_per_request=1, n_features=3, seed=42):
+    """
+    Fires n_requests at the scoring server from a pool of concurrent clients.
+
+    Args:
+        url (str): Scoring endpoint.
+        n_requests (int): Total number of requests to send.
+        concurrency (int): Number of concurrent client threads.
+        rows_per_request (int): Transactions per request.
+        n_features (int): Number of input features per transaction.
+        seed (int): Random seed for the generated transactions.
+
+    Returns:
+        dict: Throughput and latency percentiles in milliseconds.
+    """
+    rng = np.random.default_rng(seed)
+    payloads = [rng.random((rows_per_request, n_features)).round(4).tolist() for _ in range(n_requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(lambda rows: send_request(url, rows), payloads)))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "requests": n_requests,
+        "requests_per_sec": n_requests / elapsed,
+        "rows_per_sec": n_requests * rows_per_request / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+    print(f"=== Load Test ({n_requests} requests, concurrency={concurrency}, rows/request={rows_per_request}) ===")
+    print(f"Throughput: {report['requests_per_sec']:,.0f} req/sec ({report['rows_per_sec']:,.0f} rows/sec)")
+    print(f"Latency: p50={report['p50_ms']:.2f}ms p99={report['p99_ms']:.2f}ms max={report['max_ms']:.2f}ms")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the fraud scoring server")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8080/score", help="Scoring endpoint")
+    parser.add_argument("--requests", type=int, default=2000, help="Total number of requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--rows", type=int, default=1, help="Transactions per request")
+    parser.add_argument("--features", type=int, default=3, help="Features per transaction")
+    args = parser.parse_args()
+
+    run_load(url=args.url, n_requests=args.requests, concurrency=args.concurrency,
+             rows_per_request=args.rows, n_features=args.features)
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,92 @@
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import argparse
+import functools
+import os
+import subprocess
+import sys
+import time
 from datetime import datetime
+import pandas as pd
+from streaming_stats import SummaryAccumulator, TopKCounter, GroupRate, Histogram, scan_csv
 
-# Load dataset
-df = pd.read_csv("../data/synthetic_data.csv")
+DATA_PATH = os.environ.get(
+    "FRAUD_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "synthetic_data.csv"),
+)
 
-# === Summary Statistics ===
-def summarize_data(df):
+# === Lazy Loading ===
+# Nothing is read at import time and matplotlib is imported only when a chart
+# is drawn, so flags like --fraud start without paying for either.
+
+@functools.lru_cache(maxsize=None)
+def load_data(path=DATA_PATH):
+    """
+    Loads the full dataset on first use (through the columnar cache).
+    """
+    from dataset_cache import read_csv_cached
+    return read_csv_cached(path)
+
+def __getattr__(name):
+    # Keeps `from main import df` working without loading data at import.
+    if name == "df":
+        return load_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+# === Report Printers ===
+# Each report is computed by a mergeable accumulator from streaming_stats, so
+# the same printers serve an in-memory DataFrame and a single chunked scan.
+
+def print_summary(summary):
     print("=== Summary Statistics ===")
-    print(df.describe(include='all'))
+    print(summary.result())
     print("\nMissing Values:")
-    print(df.isnull().sum())
+    print(summary.missing)
 
-# === Fraud Stats ===
-def fraud_stats(df):
-    fraud_count = df["is_fraud"].sum()
-    total = len(df)
-    fraud_rate = fraud_count / total * 100
+def print_fraud_stats(label_counts):
+    fraud_count = int(label_counts.counts.get(1, 0))
+    total = label_counts.total
+    fraud_rate = fraud_count / total * 100 if total else 0.0
     print(f"\nTotal Transactions: {total}")
     print(f"Fraudulent Transactions: {fraud_count}")
     print(f"Fraud Rate: {fraud_rate:.2f}%")
 
+def print_group_rates(rates, title, sort=False):
+    if rates.missing:
+        print(f"\n{title}: column '{rates.key}' not found; skipping.")
+        return
+    result = rates.rates()
+    if sort:
+        result = result.sort_values(ascending=False)
+    print(f"\n{title}:")
+    print(result)
+
+def print_top_users(user_counts, top_n=5):
+    print(f"\nTop {top_n} Users with Most Fraudulent Transactions:")
+    print(user_counts.most_common(top_n))
+
+def _to_day(timestamps):
+    return pd.to_datetime(timestamps).dt.floor("D")
+
+# === Summary Statistics ===
+def summarize_data(df):
+    print_summary(SummaryAccumulator().update(df))
+
+# === Fraud Stats ===
+def fraud_stats(df):
+    print_fraud_stats(TopKCounter(column="is_fraud").update(df))
+
 # === Visualize Fraud vs Legit ===
-def plot_fraud_distribution(df):
+def plot_fraud_distribution(label_counts):
+    plt = _pyplot()
+    counts = label_counts.counts.reindex([0, 1], fill_value=0)
     plt.figure(figsize=(6,4))
-    df['is_fraud'].value_counts().plot(kind='bar', color=['blue', 'orange'])
+    counts.plot(kind='bar', color=['blue', 'orange'])
     plt.title("Fraud vs Legit Transactions")
     plt.xticks([0, 1], ['Legit', 'Fraud'])
     plt.xlabel("Transaction Type")
@@ -37,9 +96,11 @@ def plot_fraud_distribution(df):
     plt.close()
 
 # === Transaction Amounts ===
-def plot_amount_distribution(df):
+def plot_amount_distribution(histogram):
+    plt = _pyplot()
+    counts = histogram.result()
     plt.figure(figsize=(8, 5))
-    sns.histplot(df['amount'], bins=30, kde=True)
+    plt.bar(counts.index, counts.values, width=histogram.bin_width, align='edge')
     plt.title("Transaction Amount Distribution")
     plt.xlabel("Amount")
     plt.ylabel("Frequency")
@@ -49,26 +110,22 @@ def plot_amount_distribution(df):
 
 # === Fraud by Transaction Type ===
 def fraud_by_transaction_type(df):
-    type_fraud = df.groupby('transaction_type')['is_fraud'].mean()
-    print("\nFraud Rate by Transaction Type:")
-    print(type_fraud)
+    print_group_rates(GroupRate("transaction_type").update(df), "Fraud Rate by Transaction Type")
 
 # === High Risk Locations ===
 def high_risk_locations(df):
-    location_fraud = df.groupby('location')['is_fraud'].mean().sort_values(ascending=False)
-    print("\nHigh Risk Locations (by fraud rate):")
-    print(location_fraud)
+    print_group_rates(GroupRate("location").update(df), "High Risk Locations (by fraud rate)", sort=True)
 
 # === Top Users with Most Fraud ===
 def top_users_by_fraud(df, top_n=5):
-    user_fraud = df[df['is_fraud'] == 1].groupby('user_id').size().sort_values(ascending=False).head(top_n)
-    print(f"\nTop {top_n} Users with Most Fraudulent Transactions:")
-    print(user_fraud)
+    print_top_users(TopKCounter(column="user_id", where=lambda c: c["is_fraud"] == 1).update(df), top_n)
 
 # === Time Series of Transactions ===
-def plot_time_series(df):
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    ts = df.set_index('timestamp').resample('D').size()
+def plot_time_series(daily):
+    plt = _pyplot()
+    ts = daily.counts.sort_index()
+    if len(ts):
+        ts = ts.reindex(pd.date_range(ts.index.min(), ts.index.max(), freq="D"), fill_value=0)
     plt.figure(figsize=(10, 4))
     ts.plot()
     plt.title("Daily Transaction Volume")
@@ -78,6 +135,69 @@ def plot_time_series(df):
     plt.savefig("../docs/daily_transactions.png")
     plt.close()
 
+# === Single-Pass Streaming Reports ===
+def run_reports(path, summary=False, fraud=False, charts=False, risks=False, chunksize=100000, top_n=5):
+    """
+    Computes every requested report in one chunked scan of the CSV.
+
+    Memory is bounded by the chunk size and the accumulators' group counts,
+    not by the number of rows in the file.
+    """
+    accs = {}
+    if summary:
+        accs["summary"] = SummaryAccumulator()
+    if fraud or charts:
+        accs["labels"] = TopKCounter(column="is_fraud")
+    if charts:
+        accs["amounts"] = Histogram("amount", bin_width=250.0)
+        accs["daily"] = GroupRate("timestamp", key_fn=_to_day)
+    if risks:
+        accs["types"] = GroupRate("transaction_type")
+        accs["locations"] = GroupRate("location")
+        accs["users"] = TopKCounter(column="user_id", where=lambda c: c["is_fraud"] == 1)
+    if not accs:
+        return accs
+
+    scan_csv(path, accs.values(), chunksize=chunksize)
+
+    if summary:
+        print_summary(accs["summary"])
+    if fraud:
+        print_fraud_stats(accs["labels"])
+    if charts:
+        plot_fraud_distribution(accs["labels"])
+        plot_amount_distribution(accs["amounts"])
+        plot_time_series(accs["daily"])
+    if risks:
+        print_group_rates(accs["types"], "Fraud Rate by Transaction Type")
+        print_group_rates(accs["locations"], "High Risk Locations (by fraud rate)", sort=True)
+        print_top_users(accs["users"], top_n)
+    return accs
+
+# === Startup Benchmark ===
+def benchmark_startup(flags=("--summary", "--fraud", "--charts", "--risks"), repeats=3, data_path=DATA_PATH):
+    """
+    Times a fresh `python main.py <flag>` process for each flag.
+
+    Returns:
+        dict: flag -> best wall time in seconds over `repeats` runs.
+    """
+    script = os.path.abspath(__file__)
+    timings = {}
+    for flag in flags:
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, script, flag, "--data", data_path],
+                           cwd=os.path.dirname(script), capture_output=True, check=True)
+            best = min(best, time.perf_counter() - start)
+        timings[flag] = best
+
+    print("=== Startup Benchmark (best of %d) ===" % repeats)
+    for flag, secs in timings.items():
+        print(f"{flag:<10} {secs:.3f}s")
+    return timings
+
 # === CLI Handler ===
 def main():
     parser = argparse.ArgumentParser(description="Fraud Detection Data Analysis")
@@ -85,20 +205,17 @@ def main():
     parser.add_argument('--fraud', action='store_true', help='Show fraud statistics')
     parser.add_argument('--charts', action='store_true', help='Generate charts')
     parser.add_argument('--risks', action='store_true', help='Show risk analysis')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Rows per chunk for the streaming scan')
+    parser.add_argument('--data', type=str, default=DATA_PATH, help='Path to the transactions CSV')
+    parser.add_argument('--benchmark', action='store_true', help='Time process startup for each flag')
     args = parser.parse_args()
 
-    if args.summary:
-        summarize_data(df)
-    if args.fraud:
-        fraud_stats(df)
-    if args.charts:
-        plot_fraud_distribution(df)
-        plot_amount_distribution(df)
-        plot_time_series(df)
-    if args.risks:
-        fraud_by_transaction_type(df)
-        high_risk_locations(df)
-        top_users_by_fraud(df)
+    if args.benchmark:
+        benchmark_startup(data_path=args.data)
+        return
+
+    run_reports(args.data, summary=args.summary, fraud=args.fraud, charts=args.charts,
+                risks=args.risks, chunksize=args.chunksize)
 
 if __name__ == "__main__":
     main()
@@ -77,4 +77,5 @@ if __name__ == "__main__":
     y_dummy = np.random.randint(0, 2, 100)
 
     print("Building and training 'deep' model with 5 inputs...")
-    model = build_model(input_shape=5, architecture='deep', optimizer='ada
+    model = build_model(input_shape=5, architecture='deep', optimizer='adam')
+    model.fit(X_dummy, y_dummy, epochs=3, batch_size=8)
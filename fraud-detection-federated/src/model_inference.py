@@ -6,16 +6,21 @@ Loads a trained model and performs inference on sample transactions.
 import numpy as np
 import pandas as pd
 import argparse
+import contextlib
+import io
 import os
+import time
 from tensorflow.keras.models import load_model
+from threshold_optimizer import load_threshold
 
-def load_sample_data(from_csv=False, csv_path=None):
+def load_sample_data(from_csv=False, csv_path=None, pipeline=None):
     """
     Loads input data for prediction.
 
     Args:
         from_csv (bool): If True, loads from a CSV file.
-        csv_path (str): Path to CSV file (must have numerical features).
+        csv_path (str): Path to CSV file (must have numerical features unless a pipeline is given).
+        pipeline (PreprocessingPipeline): Optional fitted pipeline applied to raw CSV columns.
 
     Returns:
         np.ndarray: Input features.
@@ -23,6 +28,8 @@ def load_sample_data(from_csv=False, csv_path=None):
     if from_csv and csv_path:
         df = pd.read_csv(csv_path)
         print(f"Loaded {len(df)} samples from CSV.")
+        if pipeline is not None:
+            return pipeline.transform(df)
         return df.values
     else:
         print("Using sample transaction amounts.")
@@ -32,53 +39,304 @@ def load_sample_data(from_csv=False, csv_path=None):
             [75.5, 0, 510]
         ])
 
-def load_model_for_inference(model_path):
+def load_model_for_inference(model_path, show_summary=True):
     """
     Loads a trained Keras model.
+
+    Args:
+        model_path (str): Path to the saved model.
+        show_summary (bool): If True, prints the model summary.
     """
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model not found at {model_path}")
     model = load_model(model_path)
-    model.summary()
+    if show_summary:
+        model.summary()
     return model
 
-def run_inference(model, data, threshold=0.5, save_output=False, output_path="predictions.csv"):
+def _feature_block(data, start, stop):
+    """
+    Returns rows [start, stop) of a NumPy array or DataFrame as a float32 block.
+    """
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return data.iloc[start:stop].to_numpy(dtype=np.float32)
+    return np.asarray(data[start:stop], dtype=np.float32)
+
+def score_batches(model, data, threshold=0.5, batch_size=8192):
+    """
+    Scores input data in fixed-size chunks and thresholds it in one vectorized step.
+
+    Args:
+        model: Trained Keras model (or any object exposing predict/predict_on_batch).
+        data (np.ndarray or pd.DataFrame): Input features.
+        threshold (float): Classification threshold.
+        batch_size (int): Number of rows passed to the model per call.
+
+    Returns:
+        dict: Column-oriented results with 'fraud_prob' (float32) and 'is_fraud' (int8) arrays.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer")
+
+    n_rows = len(data)
+    probs = np.empty(n_rows, dtype=np.float32)
+    predict = getattr(model, "predict_on_batch", None) or model.predict
+
+    for start in range(0, n_rows, batch_size):
+        stop = min(start + batch_size, n_rows)
+        batch_probs = predict(_feature_block(data, start, stop))
+        probs[start:stop] = np.asarray(batch_probs, dtype=np.float32).reshape(-1)
+
+    return {
+        "fraud_prob": probs,
+        "is_fraud": (probs >= threshold).astype(np.int8),
+    }
+
+def run_inference(model, data, threshold=0.5, save_output=False, output_path="predictions.csv",
+                  batch_size=8192, max_display=20, explainer=None, feature_names=None):
     """
     Runs model inference on input data.
 
     Args:
         model: Trained Keras model.
-        data (np.ndarray): Input features.
+        data (np.ndarray or pd.DataFrame): Input features.
         threshold (float): Classification threshold.
         save_output (bool): Whether to save results to CSV.
         output_path (str): Output file path if saving.
+        batch_size (int): Number of rows scored per model call.
+        max_display (int): Maximum number of rows printed to stdout.
+        explainer (ExplanationEngine): If given, every flagged row gets its top
+            attributed features under results['reasons'].
+        feature_names (list): Names used in the reasons (default feature_1, ...).
+
+    Returns:
+        dict: Column-oriented results from score_batches (plus 'reasons').
     """
-    predictions = model.predict(data)
+    results = score_batches(model, data, threshold=threshold, batch_size=batch_size)
+    probs, labels = results["fraud_prob"], results["is_fraud"]
+
+    if explainer is not None:
+        from explainability import top_reasons
+
+        flagged = np.flatnonzero(labels)
+        names = feature_names or [f"feature_{i+1}" for i in range(explainer.n_features)]
+        reasons = np.full(len(probs), "", dtype=object)
+        if len(flagged):
+            reasons[flagged] = top_reasons(explainer.explain(_feature_block(data, 0, len(probs))[flagged]), names)
+        results["reasons"] = reasons
+
     print("\n=== Inference Results ===")
+    preview = _feature_block(data, 0, max_display)
+    for i in range(len(preview)):
+        line = f"Input: {preview[i]} -> Fraud Probability: {probs[i]:.4f} -> Classified as: {'FRAUD' if labels[i] else 'LEGIT'}"
+        if explainer is not None and labels[i]:
+            line += f" -> Reasons: {results['reasons'][i]}"
+        print(line)
+    if len(probs) > max_display:
+        print(f"... {len(probs) - max_display} more rows not shown")
+    print(f"Flagged {int(labels.sum())} of {len(probs)} transactions as FRAUD (threshold={threshold})")
+    if explainer is not None:
+        stats = explainer.stats()
+        print(f"Explained {stats['rows']} alerts ({stats['cache_hits']} from cache) at "
+              f"{stats['explanations_per_sec']:,.0f} explanations/sec")
+
+    if save_output:
+        features = np.asarray(data)
+        col_names = [f"feature_{i+1}" for i in range(features.shape[1])]
+        df = pd.DataFrame(features, columns=col_names)
+        df["fraud_prob"] = probs
+        df["is_fraud"] = labels
+        if "reasons" in results:
+            df["reasons"] = results["reasons"]
+        df.to_csv(output_path, index=False)
+        print(f"Results saved to {output_path}")
+
+    return results
+
+def stream_csv_inference(model, csv_path, output_path="predictions.csv", threshold=0.5,
+                         chunk_size=100000, batch_size=8192, report_every=10, pipeline=None, explain=None):
+    """
+    Scores a CSV file chunk by chunk and appends results to the output file.
+
+    Only one chunk is held in memory at a time, so memory use stays flat
+    regardless of the number of rows in the input. Each output row is the
+    input row plus 'fraud_prob' and 'pred_is_fraud' (input columns, including
+    any is_fraud label, are left unchanged).
+
+    Args:
+        model: Trained Keras model.
+        csv_path (str): Path to input CSV file (must have numerical features).
+        output_path (str): Output CSV path; overwritten if it exists.
+        threshold (float): Classification threshold.
+        chunk_size (int): Number of CSV rows read per chunk.
+        batch_size (int): Number of rows scored per model call.
+        report_every (int): Print throughput every N chunks.
+        pipeline (PreprocessingPipeline): Optional fitted pipeline applied to each raw chunk.
+        explain (str): If set ('ig' or 'shapley'), flagged rows get their top
+            attributed features in a 'reasons' column. The first chunk is the
+            background reference, and the explanation cache spans all chunks.
+
+    Returns:
+        dict: Total 'rows', 'flagged' transactions, 'seconds' and 'rows_per_sec'.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Input CSV not found: {csv_path}")
+
+    total_rows = 0
+    total_flagged = 0
+    start = time.perf_counter()
+    explainer, names = None, None
+    written = False
+
+    try:
+        reader = pd.read_csv(csv_path, chunksize=chunk_size)
+    except pd.errors.EmptyDataError:
+        reader = []
+    for chunk_num, chunk in enumerate(reader, start=1):
+        features = pipeline.transform(chunk) if pipeline is not None else chunk
+        results = score_batches(model, features, threshold=threshold, batch_size=batch_size)
+        if explain:
+            from explainability import ExplanationEngine, top_reasons
+
+            # Taken before the result columns are added (features may be the chunk itself).
+            block = _feature_block(features, 0, len(chunk))
+        chunk["fraud_prob"] = results["fraud_prob"]
+        # A separate column, so a ground-truth is_fraud in labelled input is kept.
+        chunk["pred_is_fraud"] = results["is_fraud"]
+        if explain:
+            if explainer is None:
+                explainer = ExplanationEngine(model, block, method=explain)
+                names = pipeline.features if pipeline is not None else list(features.columns[:block.shape[1]])
+            flagged = np.flatnonzero(results["is_fraud"])
+            reasons = np.full(len(chunk), "", dtype=object)
+            if len(flagged):
+                reasons[flagged] = top_reasons(explainer.explain(block[flagged]), names)
+            chunk["reasons"] = reasons
+        chunk.to_csv(output_path, mode="w" if chunk_num == 1 else "a", header=chunk_num == 1, index=False)
+        written = True
+
+        total_rows += len(chunk)
+        total_flagged += int(results["is_fraud"].sum())
+        if chunk_num % report_every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"Chunk {chunk_num}: {total_rows} rows scored, {total_rows / elapsed:,.0f} rows/sec")
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": total_rows,
+        "flagged": total_flagged,
+        "seconds": elapsed,
+        "rows_per_sec": total_rows / elapsed if elapsed > 0 else 0.0,
+    }
+    print(f"Streamed {total_rows} rows in {elapsed:.2f}s ({summary['rows_per_sec']:,.0f} rows/sec), "
+          f"flagged {total_flagged} as FRAUD")
+    if explainer is not None:
+        stats = explainer.stats()
+        summary["explanations_per_sec"] = stats["explanations_per_sec"]
+        print(f"Explained {stats['rows']} alerts ({stats['cache_hits']} from cache) at "
+              f"{stats['explanations_per_sec']:,.0f} explanations/sec")
+    if written:
+        print(f"Results saved to {output_path}")
+    else:
+        print(f"{csv_path} is empty; nothing written to {output_path}")
+    return summary
+
+def _run_inference_rowwise(model, data, threshold=0.5):
+    """
+    Original per-row inference loop, kept only as the benchmark baseline.
+    """
+    predictions = model.predict(data, verbose=0)
     results = []
     for i, row in enumerate(data):
         prob = predictions[i][0]
         is_fraud = int(prob >= threshold)
         print(f"Input: {row} -> Fraud Probability: {prob:.4f} -> Classified as: {'FRAUD' if is_fraud else 'LEGIT'}")
         results.append(list(row) + [prob, is_fraud])
+    return results
 
-    if save_output:
-        col_names = [f"feature_{i+1}" for i in range(data.shape[1])] + ["fraud_prob", "is_fraud"]
-        df = pd.DataFrame(results, columns=col_names)
-        df.to_csv(output_path, index=False)
-        print(f"Results saved to {output_path}")
+def benchmark_inference(model, n_rows=100000, n_features=3, batch_size=8192, seed=42):
+    """
+    Compares rows/sec of the per-row baseline against score_batches.
+
+    Args:
+        model: Trained Keras model.
+        n_rows (int): Number of random transactions to score.
+        n_features (int): Number of input features expected by the model.
+        batch_size (int): Chunk size used by score_batches.
+        seed (int): Random seed for the generated input.
+
+    Returns:
+        dict: Rows per second for 'rowwise' and 'batched' scoring.
+    """
+    rng = np.random.default_rng(seed)
+    data = rng.random((n_rows, n_features), dtype=np.float32)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _run_inference_rowwise(model, data)
+    rowwise_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score_batches(model, data, batch_size=batch_size)
+    batched_secs = time.perf_counter() - start
+
+    report = {
+        "rowwise": n_rows / rowwise_secs,
+        "batched": n_rows / batched_secs,
+    }
+    print(f"\n=== Inference Benchmark ({n_rows} rows, batch_size={batch_size}) ===")
+    print(f"Row-wise run_inference: {report['rowwise']:,.0f} rows/sec ({rowwise_secs:.2f}s)")
+    print(f"Batched score_batches:  {report['batched']:,.0f} rows/sec ({batched_secs:.2f}s)")
+    print(f"Speedup: {report['batched'] / report['rowwise']:.1f}x")
+    return report
 
 def main():
     parser = argparse.ArgumentParser(description="Fraud Detection Inference Script")
     parser.add_argument("--model", type=str, default="../models/simple_model.h5", help="Path to trained model")
     parser.add_argument("--csv", type=str, help="Path to input CSV file (optional)")
-    parser.add_argument("--threshold", type=float, default=0.5, help="Classification threshold")
+    parser.add_argument("--pipeline", type=str, help="Path to a saved PreprocessingPipeline applied to --csv input")
+    parser.add_argument("--threshold", type=float,
+                        help="Classification threshold (default: the one saved with the model, else 0.5)")
     parser.add_argument("--save", action='store_true', help="Save predictions to CSV")
+    parser.add_argument("--output", type=str, default="predictions.csv", help="Output CSV path for saved or streamed predictions")
+    parser.add_argument("--stream", action='store_true', help="Score --csv in chunks and append results to --output")
+    parser.add_argument("--chunk_size", type=int, default=100000, help="CSV rows read per chunk in --stream mode")
+    parser.add_argument("--batch_size", type=int, default=8192, help="Rows scored per model call")
+    parser.add_argument("--explain", choices=["ig", "shapley"], help="Attach top feature attributions to every alert")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Benchmark batched vs row-wise scoring on ROWS random rows")
     args = parser.parse_args()
+    if args.threshold is None:
+        args.threshold = load_threshold(args.model)
+
+    if args.benchmark:
+        model = load_model_for_inference(args.model)
+        benchmark_inference(model, n_rows=args.benchmark, n_features=model.input_shape[-1], batch_size=args.batch_size)
+        return
+
+    pipeline = None
+    if args.pipeline:
+        from preprocessing import PreprocessingPipeline
+        pipeline = PreprocessingPipeline.load(args.pipeline)
+
+    if args.stream:
+        if not args.csv:
+            parser.error("--stream requires --csv")
+        model = load_model_for_inference(args.model)
+        stream_csv_inference(model, args.csv, output_path=args.output, threshold=args.threshold,
+                             chunk_size=args.chunk_size, batch_size=args.batch_size, pipeline=pipeline,
+                             explain=args.explain)
+        return
 
-    input_data = load_sample_data(from_csv=bool(args.csv), csv_path=args.csv)
+    input_data = load_sample_data(from_csv=bool(args.csv), csv_path=args.csv, pipeline=pipeline)
     model = load_model_for_inference(args.model)
-    run_inference(model, input_data, threshold=args.threshold, save_output=args.save)
+    explainer = None
+    if args.explain:
+        from explainability import ExplanationEngine
+        # The scored rows (mostly legitimate) serve as the background reference.
+        explainer = ExplanationEngine(model, input_data, method=args.explain)
+    run_inference(model, input_data, threshold=args.threshold, save_output=args.save,
+                  output_path=args.output, batch_size=args.batch_size, explainer=explainer,
+                  feature_names=pipeline.features if pipeline else None)
 
 if __name__ == "__main__":
     main()
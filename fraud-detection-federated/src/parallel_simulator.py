@@ -0,0 +1,238 @@
+"""
+Parallel multi-process federated client training simulator.
+Each client's local update runs in a worker process (one Keras model per
+worker, reused across clients and rounds); the coordinator aggregates the
+returned weights with a sample-weighted average.
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+
+# Per-worker state, populated once by _init_worker.
+_WORKER = {}
+
+def _init_worker(model_config, learning_rate, threads_per_worker, model_fn=None):
+    """
+    Builds the worker's Keras model once; later tasks only swap weights.
+    """
+    import tensorflow as tf
+    from tensorflow.keras.optimizers import SGD
+    from model_builder import build_model
+
+    # One TF thread pool per core is faster than N pools fighting over all cores.
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(threads_per_worker)
+
+    if model_fn is not None:
+        model = model_fn()
+        model.compile(optimizer=SGD(learning_rate=learning_rate), loss="binary_crossentropy")
+        _WORKER["model"] = model
+        return
+    config = dict(model_config, show_summary=False)
+    config["optimizer"] = SGD(learning_rate=learning_rate)
+    _WORKER["model"] = build_model(**config)
+
+def _train_client(task):
+    """
+    Runs one client's local update and returns its new weights and timing.
+    """
+    from client_shards import client_size, fit_client
+
+    client_id, weights, client, epochs, batch_size = task
+    start = time.perf_counter()
+    model = _WORKER["model"]
+    model.set_weights(weights)
+    loss = fit_client(model, client, epochs=epochs, batch_size=batch_size)
+    return {
+        "client_id": client_id,
+        "weights": model.get_weights(),
+        "num_samples": client_size(client),
+        "loss": loss,
+        "seconds": time.perf_counter() - start,
+        "pid": os.getpid(),
+    }
+
+def _evaluate_client(task):
+    """
+    Scores one client with the given weights; returns its accumulator state.
+    """
+    from streaming_metrics import evaluate_client
+
+    weights, client, accumulator_opts = task
+    model = _WORKER["model"]
+    model.set_weights(weights)
+    return evaluate_client(model, client, **accumulator_opts).get_state()
+
+def weighted_average(weight_lists, sizes):
+    """
+    Averages per-client weight lists, weighting each client by its sample count.
+
+    Args:
+        weight_lists (list): One list of layer arrays per client.
+        sizes (list): Number of training samples per client.
+
+    Returns:
+        list: Averaged layer arrays.
+    """
+    coeffs = np.asarray(sizes, dtype=np.float64)
+    coeffs = coeffs / coeffs.sum()
+    return [
+        np.tensordot(coeffs, np.stack(layers), axes=1).astype(layers[0].dtype)
+        for layers in zip(*weight_lists)
+    ]
+
+class ParallelSimulator:
+    """
+    Trains client updates across a pool of worker processes.
+
+    Workers are started with the 'spawn' method (TensorFlow is not fork-safe)
+    and keep their model between rounds, so start-up cost is paid once.
+    """
+
+    def __init__(self, model_config, num_workers=None, local_epochs=1, batch_size=32,
+                 learning_rate=0.05, threads_per_worker=1, model_fn=None):
+        """
+        Args:
+            model_config (dict): Keyword arguments for model_builder.build_model
+                (ignored when model_fn is given).
+            num_workers (int): Worker processes (default: all CPU cores).
+            local_epochs (int): Local epochs per client per round.
+            batch_size (int): Local batch size.
+            learning_rate (float): Client SGD learning rate.
+            threads_per_worker (int): TensorFlow threads per worker.
+            model_fn (callable): Module-level function returning an uncompiled
+                Keras model, used instead of model_config (e.g. to match the
+                architecture of a FedAvgEngine).
+        """
+        self.model_config = dict(model_config or {})
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.local_epochs = local_epochs
+        self.batch_size = batch_size
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_config, learning_rate, threads_per_worker, model_fn),
+        )
+
+    def train_clients(self, global_weights, client_data, client_ids=None):
+        """
+        Runs every client's local update in parallel.
+
+        Args:
+            global_weights (list): Current global model weights.
+            client_data (list): (X_i, y_i) tuples or ClientShards, one per client.
+                Shards over a memory-mapped base are sent to workers as indices.
+            client_ids (list): Stable ids for those clients (defaults to positions).
+
+        Returns:
+            list: Per-client result dicts (weights, num_samples, loss, seconds).
+        """
+        client_ids = range(len(client_data)) if client_ids is None else client_ids
+        tasks = [
+            (i, global_weights, client, self.local_epochs, self.batch_size)
+            for i, client in zip(client_ids, client_data)
+        ]
+        return list(self.pool.map(_train_client, tasks))
+
+    def evaluate_clients(self, global_weights, client_data, **accumulator_opts):
+        """
+        Scores every client in the worker pool.
+
+        Returns:
+            list: One streaming_metrics.MetricAccumulator per client.
+        """
+        from streaming_metrics import MetricAccumulator
+
+        tasks = [(global_weights, client, accumulator_opts) for client in client_data]
+        return [MetricAccumulator.from_state(state) for state in self.pool.map(_evaluate_client, tasks)]
+
+    def run_round(self, global_weights, client_data):
+        """
+        Trains all clients and aggregates their weights on the coordinator.
+
+        Returns:
+            list: New global weights.
+            dict: Round statistics (wall time, per-client timing and loss).
+        """
+        start = time.perf_counter()
+        results = self.train_clients(global_weights, client_data)
+        new_weights = weighted_average([r["weights"] for r in results], [r["num_samples"] for r in results])
+        client_secs = np.array([r["seconds"] for r in results])
+        sizes = np.array([r["num_samples"] for r in results])
+        stats = {
+            "round_seconds": time.perf_counter() - start,
+            "clients": len(results),
+            "client_seconds_mean": float(client_secs.mean()),
+            "client_seconds_p50": float(np.median(client_secs)),
+            "client_seconds_max": float(client_secs.max()),
+            "loss": float(np.average([r["loss"] for r in results], weights=sizes)),
+            "client_seconds": client_secs.tolist(),
+        }
+        return new_weights, stats
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def simulate(X, y, num_clients=100, num_rounds=3, model_config=None, num_workers=None,
+             local_epochs=1, batch_size=32, learning_rate=0.05, seed=42):
+    """
+    Splits data into clients and runs parallel federated rounds.
+
+    Returns:
+        list: Final global weights.
+        list: Per-round statistics.
+    """
+    from client_simulator import split_clients
+    from model_builder import build_model
+
+    model_config = model_config or {"input_shape": X.shape[1], "architecture": "simple"}
+    client_data = split_clients(X, y, num_clients=num_clients, seed=seed, lazy=True)
+    weights = build_model(**dict(model_config, show_summary=False)).get_weights()
+
+    history = []
+    with ParallelSimulator(model_config, num_workers=num_workers, local_epochs=local_epochs,
+                           batch_size=batch_size, learning_rate=learning_rate) as sim:
+        for round_num in range(1, num_rounds + 1):
+            weights, stats = sim.run_round(weights, client_data)
+            history.append(stats)
+            logging.info(
+                f"Round {round_num}: {stats['round_seconds']:.2f}s wall, {stats['clients']} clients, "
+                f"client time mean={stats['client_seconds_mean']:.3f}s p50={stats['client_seconds_p50']:.3f}s "
+                f"max={stats['client_seconds_max']:.3f}s, loss={stats['loss']:.4f}"
+            )
+    return weights, history
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel federated client training simulator")
+    parser.add_argument("--data", type=str, default="../data/synthetic_data.csv", help="Transactions CSV")
+    parser.add_argument("--clients", type=int, default=100, help="Number of simulated clients")
+    parser.add_argument("--rounds", type=int, default=3, help="Number of federated rounds")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--epochs", type=int, default=1, help="Local epochs per round")
+    parser.add_argument("--batch_size", type=int, default=32, help="Local batch size")
+    parser.add_argument("--lr", type=float, default=0.05, help="Client learning rate")
+    args = parser.parse_args()
+
+    from data_loader import load_and_preprocess
+    X, y = load_and_preprocess(args.data, ["amount", "is_international", "merchant_id"])
+    simulate(X.astype(np.float32), y.astype(np.float32), num_clients=args.clients, num_rounds=args.rounds,
+             num_workers=args.workers, local_epochs=args.epochs, batch_size=args.batch_size,
+             learning_rate=args.lr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Headless plot rendering for training and evaluation runs.
+Plots are described as plain data and rendered with the non-interactive
+Agg backend into a per-run directory, on a background thread or in a
+worker pool, so evaluation and training never block on plt.show(). Long
+curves are downsampled before they are handed to the renderer.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+DEFAULT_RUNS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "outputs", "runs")
+
+# === Downsampling ===
+
+def downsample_curve(x, y, max_points=1000):
+    """
+    Reduces a monotone curve (ROC, PR) to at most max_points points.
+
+    Points in the middle of horizontal or vertical runs are dropped first
+    (they do not change the drawn line); if the curve is still too long,
+    points are picked at equal arc-length spacing, which keeps the drawn
+    shape within about 1/max_points of the original. Endpoints are kept.
+
+    Returns:
+        np.ndarray, np.ndarray: Downsampled x and y.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= max_points:
+        return x, y
+
+    keep = np.ones(len(x), dtype=bool)
+    same_x = (x[1:-1] == x[:-2]) & (x[1:-1] == x[2:])
+    same_y = (y[1:-1] == y[:-2]) & (y[1:-1] == y[2:])
+    keep[1:-1] = ~(same_x | same_y)
+    x, y = x[keep], y[keep]
+    if len(x) <= max_points:
+        return x, y
+
+    arc = np.r_[0.0, np.cumsum(np.hypot(np.diff(x), np.diff(y)))]
+    targets = np.linspace(0.0, arc[-1], max_points)
+    idx = np.unique(np.r_[0, np.searchsorted(arc, targets), len(x) - 1].clip(0, len(x) - 1))
+    return x[idx], y[idx]
+
+# === Renderers ===
+# Each renderer draws onto a fresh Figure through the object-oriented API
+# (no pyplot global state), so renders are safe on any thread or process.
+
+def render_confusion_matrix(fig, cm, labels=None, title="Confusion Matrix"):
+    import seaborn as sns
+
+    ax = fig.add_subplot(1, 1, 1)
+    sns.heatmap(np.asarray(cm), annot=True, fmt='d', cmap='Blues', xticklabels=labels or "auto",
+                yticklabels=labels or "auto", ax=ax)
+    ax.set_xlabel("Predicted")
+    ax.set_ylabel("Actual")
+    ax.set_title(title)
+
+def render_roc(fig, fpr, tpr, roc_auc, title="ROC Curve"):
+    ax = fig.add_subplot(1, 1, 1)
+    ax.plot(fpr, tpr, label=f'ROC curve (AUC = {roc_auc:.2f})')
+    ax.plot([0, 1], [0, 1], 'k--')
+    ax.set_xlabel("False Positive Rate")
+    ax.set_ylabel("True Positive Rate")
+    ax.set_title(title)
+    ax.legend(loc="lower right")
+
+def render_pr(fig, recall, precision, average_precision, title="Precision-Recall Curve"):
+    ax = fig.add_subplot(1, 1, 1)
+    ax.plot(recall, precision, label=f'PR curve (AP = {average_precision:.2f})')
+    ax.set_xlabel("Recall")
+    ax.set_ylabel("Precision")
+    ax.set_title(title)
+    ax.legend(loc="lower left")
+
+def render_history(fig, history):
+    if 'accuracy' in history:
+        ax = fig.add_subplot(1, 2, 1)
+        ax.plot(history['accuracy'], label='Train Acc')
+        if 'val_accuracy' in history:
+            ax.plot(history['val_accuracy'], label='Val Acc')
+        ax.set_title("Accuracy over Epochs")
+        ax.set_xlabel("Epoch")
+        ax.set_ylabel("Accuracy")
+        ax.legend()
+
+    ax = fig.add_subplot(1, 2, 2)
+    ax.plot(history['loss'], label='Train Loss')
+    if 'val_loss' in history:
+        ax.plot(history['val_loss'], label='Val Loss')
+    ax.set_title("Loss over Epochs")
+    ax.set_xlabel("Epoch")
+    ax.set_ylabel("Loss")
+    ax.legend()
+
+def render_pie(fig, labels, sizes, title="Label Distribution"):
+    ax = fig.add_subplot(1, 1, 1)
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140)
+    ax.set_title(title)
+
+RENDERERS = {
+    "confusion_matrix": (render_confusion_matrix, (5, 4)),
+    "roc": (render_roc, (6, 4)),
+    "pr": (render_pr, (6, 4)),
+    "history": (render_history, (12, 4)),
+    "pie": (render_pie, (5, 5)),
+}
+
+def _render(kind, path, dpi, data):
+    """
+    Renders one plot to a file; runs in the reporter's worker.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    render, figsize = RENDERERS[kind]
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    render(fig, **data)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    return path
+
+# === Reporter ===
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "plot"
+
+class PlotReporter:
+    """
+    Renders a run's plots to image files without blocking the caller.
+
+    plot() returns immediately with a Future; close() (or leaving a with
+    block) waits for every render and writes index.json listing the files.
+    """
+
+    def __init__(self, run_dir=None, workers=1, processes=False, dpi=100, fmt="png", max_curve_points=1000):
+        """
+        Args:
+            run_dir (str): Output directory; defaults to outputs/runs/<timestamp>.
+            workers (int): Rendering threads or processes.
+            processes (bool): Render in worker processes (parallel) instead of threads.
+            dpi (int): Output resolution.
+            fmt (str): Image format ('png', 'svg', 'pdf').
+            max_curve_points (int): Points kept per ROC/PR curve.
+        """
+        self.run_dir = run_dir or os.path.join(DEFAULT_RUNS_DIR, time.strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.dpi = dpi
+        self.fmt = fmt
+        self.max_curve_points = max_curve_points
+        if processes:
+            import multiprocessing as mp
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plot")
+        self._futures = []
+        self._names = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _path_for(self, name):
+        with self._lock:
+            base = _slug(name)
+            candidate, n = base, 1
+            while candidate in self._names:
+                n += 1
+                candidate = f"{base}_{n}"
+            self._names.add(candidate)
+        return os.path.join(self.run_dir, f"{candidate}.{self.fmt}")
+
+    def plot(self, kind, name, **data):
+        """
+        Queues a plot.
+
+        Args:
+            kind (str): Renderer name from RENDERERS.
+            name (str): File name stem (made unique within the run).
+            **data: Renderer arguments (arrays, labels, titles).
+
+        Returns:
+            concurrent.futures.Future: Resolves to the written file path.
+        """
+        if kind not in RENDERERS:
+            raise ValueError(f"Unsupported plot kind '{kind}'. Choose from {list(RENDERERS)}.")
+        future = self.pool.submit(_render, kind, self._path_for(name), self.dpi, data)
+        self._futures.append(future)
+        return future
+
+    def confusion_matrix(self, cm, labels=None, title="Confusion Matrix", name=None):
+        return self.plot("confusion_matrix", name or title, cm=np.asarray(cm), labels=labels, title=title)
+
+    def roc_curve(self, fpr, tpr, roc_auc, title="ROC Curve", name=None):
+        fpr, tpr = downsample_curve(fpr, tpr, self.max_curve_points)
+        return self.plot("roc", name or title, fpr=fpr, tpr=tpr, roc_auc=roc_auc, title=title)
+
+    def pr_curve(self, recall, precision, average_precision, title="Precision-Recall Curve", name=None):
+        recall, precision = downsample_curve(recall, precision, self.max_curve_points)
+        return self.plot("pr", name or title, recall=recall, precision=precision,
+                         average_precision=average_precision, title=title)
+
+    def training_history(self, history, name="training_history"):
+        history = {k: [float(v) for v in vals] for k, vals in history.items()}
+        return self.plot("history", name, history=history)
+
+    def pie(self, labels, sizes, title="Label Distribution", name=None):
+        return self.plot("pie", name or title, labels=list(labels), sizes=list(sizes), title=title)
+
+    def wait(self):
+        """
+        Blocks until every queued plot is written.
+
+        Returns:
+            list: Paths of the written files.
+        """
+        return [f.result() for f in list(self._futures)]
+
+    def close(self):
+        if self._closed:
+            return []
+        self._closed = True
+        paths = self.wait()
+        self.pool.shutdown()
+        with open(os.path.join(self.run_dir, "index.json"), "w") as f:
+            json.dump({"plots": [os.path.basename(p) for p in paths]}, f, indent=2)
+        return paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_DEFAULT = {}
+
+def default_reporter():
+    """
+    Returns the process-wide reporter used when callers do not pass one.
+    Its run directory is created on first use and flushed at exit.
+    """
+    if "reporter" not in _DEFAULT:
+        reporter = PlotReporter(run_dir=os.environ.get("FRAUD_RUN_DIR"))
+        atexit.register(reporter.close)
+        _DEFAULT["reporter"] = reporter
+    return _DEFAULT["reporter"]
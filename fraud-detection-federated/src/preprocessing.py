@@ -9,6 +9,8 @@ import argparse
 import os
 import joblib
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from categorical_encoders import make_encoder, encoder_from_state
+from dataset_cache import read_csv_cached
 
 def normalize_data(X, method="minmax", scaler=None):
     """
@@ -57,11 +59,130 @@ def load_scaler(path):
         raise FileNotFoundError(f"Scaler file not found: {path}")
     return joblib.load(path)
 
-def normalize_csv(input_path, output_path, method="minmax"):
+class PreprocessingPipeline:
+    """
+    Fitted encoding + scaling pipeline shared by training and inference.
+
+    Categorical (object or category dtype) columns are encoded with a per-column encoder from
+    categorical_encoders (by default the same integer codes LabelEncoder would
+    assign, with unseen values mapped to -1), numeric columns pass through, and the
+    result is standardized with the training mean and scale. Column order is
+    fixed at fit time, so inference always sees the training layout.
+    """
+
+    def __init__(self, features, categorical_cols=None, scale=True, encoders=None):
+        """
+        Args:
+            features (list): Feature columns, in model input order.
+            categorical_cols (list): Columns to encode. Defaults to the
+                object/category-dtype columns among `features` at fit time plus any
+                column listed in `encoders`.
+            scale (bool): Standardize the encoded matrix.
+            encoders (dict): Optional column -> encoder name ('dict', 'hash')
+                or encoder instance. Unlisted categorical columns use 'dict'.
+        """
+        self.features = list(features)
+        self.categorical_cols = list(categorical_cols) if categorical_cols is not None else None
+        self.scale = scale
+        self.encoders = dict(encoders or {})
+        self.encoders_ = {}
+        self.mean_ = None
+        self.scale_ = None
+        self.fitted_ = False
+
+    def _check_columns(self, df):
+        missing = [col for col in self.features if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+
+    def _encode(self, df):
+        X = np.empty((len(df), len(self.features)), dtype=np.float64)
+        for j, col in enumerate(self.features):
+            if col in self.encoders_:
+                X[:, j] = self.encoders_[col].transform(df[col].to_numpy())
+            else:
+                X[:, j] = df[col].to_numpy(dtype=np.float64)
+        return X
+
+    def fit(self, df):
+        """
+        Learns category vocabularies and scaling statistics from a DataFrame.
+        """
+        self._check_columns(df)
+        if self.categorical_cols is None:
+            detected = df[self.features].select_dtypes(include=['object', 'category']).columns
+            self.categorical_cols = [col for col in self.features if col in detected or col in self.encoders]
+        self.encoders_ = {
+            col: make_encoder(self.encoders.get(col, "dict")).fit(df[col].to_numpy())
+            for col in self.categorical_cols
+        }
+
+        if self.scale:
+            X = self._encode(df)
+            self.mean_ = X.mean(axis=0)
+            std = X.std(axis=0)
+            self.scale_ = np.where(std == 0, 1.0, std)
+        self.fitted_ = True
+        return self
+
+    def transform(self, df):
+        """
+        Applies the fitted encoding and scaling to a DataFrame.
+
+        Returns:
+            np.ndarray: Feature matrix in `features` order.
+        """
+        if not self.fitted_:
+            raise RuntimeError("PreprocessingPipeline must be fitted before transform")
+        self._check_columns(df)
+        X = self._encode(df)
+        if self.scale:
+            X -= self.mean_
+            X /= self.scale_
+        return X
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def get_state(self):
+        return {
+            "features": self.features,
+            "categorical_cols": self.categorical_cols,
+            "scale": self.scale,
+            "encoders": {col: enc.get_state() for col, enc in self.encoders_.items()},
+            "mean": self.mean_,
+            "scale_values": self.scale_,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        pipeline = cls(state["features"], categorical_cols=state["categorical_cols"], scale=state["scale"])
+        pipeline.encoders_ = {col: encoder_from_state(enc) for col, enc in state["encoders"].items()}
+        pipeline.mean_ = state["mean"]
+        pipeline.scale_ = state["scale_values"]
+        pipeline.fitted_ = True
+        return pipeline
+
+    def save(self, path):
+        """
+        Saves the fitted pipeline as a single compressed artifact.
+        """
+        joblib.dump(self.get_state(), path, compress=3)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a pipeline saved with `save`.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Pipeline file not found: {path}")
+        return cls.from_state(joblib.load(path))
+
+def normalize_csv(input_path, output_path, method="minmax", use_cache=True):
     """
     Normalizes numeric columns from CSV and writes output.
     """
-    df = pd.read_csv(input_path)
+    df = read_csv_cached(input_path) if use_cache else pd.read_csv(input_path)
     num_cols = df.select_dtypes(include=[np.number]).columns
     X = df[num_cols].values
 
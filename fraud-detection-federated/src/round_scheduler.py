@@ -0,0 +1,275 @@
+"""
+Straggler-tolerant and asynchronous round scheduling for federated training.
+Runs a FedAvgEngine on a simulated clock: each client gets a latency drawn
+from a per-client distribution, synchronous rounds sample clients and apply
+a deadline (drop, down-weight or wait for stragglers), and the asynchronous
+mode aggregates buffered, staleness-weighted updates (FedAsync / FedBuff).
+"""
+
+import heapq
+
+import numpy as np
+
+from client_shards import client_size
+
+# === Simulated Client Latency ===
+
+class ClientLatencyModel:
+    """
+    Simulated per-client round latency.
+
+    Latency = (base_seconds + per_sample_seconds * num_samples) * speed * noise,
+    where speed is a fixed per-client factor (stragglers are slowed down by
+    straggler_slowdown) and noise is log-normal per round.
+    """
+
+    def __init__(self, num_clients, base_seconds=1.0, per_sample_seconds=0.01,
+                 straggler_fraction=0.1, straggler_slowdown=10.0, sigma=0.3, seed=0):
+        """
+        Args:
+            num_clients (int): Number of clients.
+            base_seconds (float): Fixed per-round cost (model download, startup).
+            per_sample_seconds (float): Training cost per local sample.
+            straggler_fraction (float): Fraction of clients that are persistently slow.
+            straggler_slowdown (float): Slowdown factor for those clients.
+            sigma (float): Log-normal per-round jitter.
+            seed (int): Random seed.
+        """
+        self.base_seconds = base_seconds
+        self.per_sample_seconds = per_sample_seconds
+        self.sigma = sigma
+        self.rng = np.random.default_rng(seed)
+        self.speed = np.ones(num_clients)
+        n_slow = int(round(straggler_fraction * num_clients))
+        if n_slow:
+            slow = self.rng.choice(num_clients, size=n_slow, replace=False)
+            self.speed[slow] = straggler_slowdown
+
+    def get_state(self):
+        return {"speed": self.speed, "rng": self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        self.speed = state["speed"]
+        self.rng.bit_generator.state = state["rng"]
+
+    def sample(self, client_id, num_samples):
+        """
+        Returns one simulated round latency (seconds) for a client.
+        """
+        noise = self.rng.lognormal(mean=0.0, sigma=self.sigma) if self.sigma > 0 else 1.0
+        return float((self.base_seconds + self.per_sample_seconds * num_samples) * self.speed[client_id] * noise)
+
+# === Synchronous Rounds ===
+
+STRAGGLER_POLICIES = ("wait", "drop", "downweight")
+
+class SyncScheduler:
+    """
+    Synchronous rounds with per-round client sampling and a straggler deadline.
+
+    Policies:
+        wait: the round lasts until the slowest sampled client reports.
+        drop: clients slower than the deadline are left out of the round.
+        downweight: late updates are kept but scaled by deadline / latency;
+            the round still closes at the deadline.
+    """
+
+    def __init__(self, engine, latency_model, clients_per_round=None, deadline=None,
+                 straggler_policy="drop", seed=0):
+        """
+        Args:
+            engine (FedAvgEngine): Engine that trains and aggregates.
+            latency_model (ClientLatencyModel): Simulated client latencies.
+            clients_per_round (int or float): Clients sampled per round; a float
+                in (0, 1] is a fraction of all clients, None samples everyone.
+            deadline (float): Round deadline in simulated seconds (None: no deadline).
+            straggler_policy (str): One of STRAGGLER_POLICIES.
+            seed (int): Sampling seed.
+        """
+        if straggler_policy not in STRAGGLER_POLICIES:
+            raise ValueError(f"Unsupported straggler policy '{straggler_policy}'. Choose from {list(STRAGGLER_POLICIES)}.")
+        self.engine = engine
+        self.latency_model = latency_model
+        self.clients_per_round = clients_per_round
+        self.deadline = deadline
+        self.straggler_policy = straggler_policy
+        self.rng = np.random.default_rng(seed)
+
+    def get_state(self):
+        return {"rng": self.rng.bit_generator.state, "latency": self.latency_model.get_state()}
+
+    def set_state(self, state):
+        self.rng.bit_generator.state = state["rng"]
+        self.latency_model.set_state(state["latency"])
+
+    def sample_clients(self, num_clients):
+        k = self.clients_per_round
+        if k is None:
+            return np.arange(num_clients)
+        if isinstance(k, float):
+            k = max(1, int(round(k * num_clients)))
+        return np.sort(self.rng.choice(num_clients, size=min(k, num_clients), replace=False))
+
+    def run_round(self, state, client_data):
+        """
+        Runs one round on the simulated clock.
+
+        Returns:
+            dict: New server state.
+            dict: Engine metrics plus 'sim_seconds', 'sampled' and 'dropped'.
+        """
+        sampled = self.sample_clients(len(client_data))
+        latency = np.array([self.latency_model.sample(i, client_size(client_data[i])) for i in sampled])
+
+        if self.deadline is None or self.straggler_policy == "wait":
+            keep, scales, sim_seconds = sampled, None, float(latency.max())
+        elif self.straggler_policy == "drop":
+            on_time = latency <= self.deadline
+            if not on_time.any():
+                # Nobody made it: keep the fastest client so the round still makes progress.
+                on_time[np.argmin(latency)] = True
+            keep, scales = sampled[on_time], None
+            sim_seconds = float(self.deadline if not on_time.all() else latency.max())
+        else:
+            keep = sampled
+            scales = np.minimum(1.0, self.deadline / latency)
+            sim_seconds = float(min(self.deadline, latency.max()))
+
+        state, metrics = self.engine.next(state, [client_data[i] for i in keep],
+                                          client_ids=[int(i) for i in keep], weight_scales=scales)
+        metrics.update(sim_seconds=sim_seconds, sampled=len(sampled), dropped=len(sampled) - len(keep))
+        return state, metrics
+
+    def run(self, state, client_data, num_rounds, eval_fn=None, target=None):
+        """
+        Runs rounds until num_rounds, or until eval_fn(weights) reaches target.
+
+        Returns:
+            dict: Final server state.
+            list: History of {'round', 'sim_time', 'metric', ...} dicts.
+        """
+        sim_time, history = 0.0, []
+        for _ in range(num_rounds):
+            state, metrics = self.run_round(state, client_data)
+            sim_time += metrics["sim_seconds"]
+            entry = dict(metrics, round=state["round"], sim_time=sim_time)
+            if eval_fn is not None:
+                entry["metric"] = eval_fn(state["weights"])
+            history.append(entry)
+            if target is not None and entry.get("metric", -np.inf) >= target:
+                break
+        return state, history
+
+# === Asynchronous Aggregation ===
+
+def staleness_weight(staleness, exponent=0.5):
+    """
+    Polynomial staleness discount (1 + staleness) ** -exponent (Xie et al., FedAsync).
+    """
+    return float((1.0 + staleness) ** -exponent)
+
+class AsyncScheduler:
+    """
+    Event-driven asynchronous training (FedBuff; FedAsync when buffer_size=1).
+
+    'concurrency' clients train at once, each on the global model version it
+    downloaded. Finished updates go into a buffer; once buffer_size updates
+    have arrived the server aggregates them, discounting each by its staleness
+    (global versions published since the client started), and the freed
+    clients are replaced by new ones on the latest model. No round ever waits
+    for a straggler.
+    """
+
+    def __init__(self, engine, latency_model, concurrency=10, buffer_size=5,
+                 staleness_exponent=0.5, seed=0):
+        """
+        Args:
+            engine (FedAvgEngine): Engine that trains and aggregates.
+            latency_model (ClientLatencyModel): Simulated client latencies.
+            concurrency (int): Clients training at the same time.
+            buffer_size (int): Updates aggregated per server step.
+            staleness_exponent (float): Exponent for staleness_weight.
+            seed (int): Client selection seed.
+        """
+        self.engine = engine
+        self.latency_model = latency_model
+        self.concurrency = concurrency
+        self.buffer_size = buffer_size
+        self.staleness_exponent = staleness_exponent
+        self.rng = np.random.default_rng(seed)
+
+    def run(self, state, client_data, num_updates, eval_fn=None, target=None):
+        """
+        Runs until num_updates server steps, or until eval_fn(weights) reaches target.
+
+        Returns:
+            dict: Final server state.
+            list: History of {'round', 'sim_time', 'metric', 'staleness_mean', ...} dicts.
+        """
+        num_clients = len(client_data)
+        idle = set(range(num_clients))
+        in_flight = []  # heap of (finish_time, seq, client_id, version, base_weights)
+        seq = 0
+
+        def launch(now):
+            nonlocal seq
+            client_id = int(self.rng.choice(sorted(idle)))
+            idle.discard(client_id)
+            finish = now + self.latency_model.sample(client_id, client_size(client_data[client_id]))
+            heapq.heappush(in_flight, (finish, seq, client_id, state["round"], state["weights"]))
+            seq += 1
+
+        for _ in range(min(self.concurrency, num_clients)):
+            launch(0.0)
+
+        buffer, history = [], []
+        while in_flight and len(history) < num_updates:
+            now, _, client_id, version, base_weights = heapq.heappop(in_flight)
+            # Training results do not depend on the simulated clock, so the
+            # client is trained when its update "arrives".
+            result = self.engine.trainer.train_clients(base_weights, [client_data[client_id]],
+                                                       client_ids=[client_id])[0]
+            result["base_weights"] = base_weights
+            buffer.append((result, state["round"] - version))
+            idle.add(client_id)
+
+            if len(buffer) >= self.buffer_size:
+                staleness = [s for _, s in buffer]
+                scales = [staleness_weight(s, self.staleness_exponent) for s in staleness]
+                state, metrics = self.engine.aggregate(state, [r for r, _ in buffer], weight_scales=scales)
+                buffer = []
+                entry = dict(metrics, round=state["round"], sim_time=now,
+                             staleness_mean=float(np.mean(staleness)), staleness_max=int(max(staleness)))
+                if eval_fn is not None:
+                    entry["metric"] = eval_fn(state["weights"])
+                history.append(entry)
+                if target is not None and entry.get("metric", -np.inf) >= target:
+                    break
+            launch(now)
+        return state, history
+
+# === Evaluation ===
+
+def make_auc_eval(model_fn, X, y, batch_size=4096):
+    """
+    Returns eval_fn(weights) -> ROC AUC of the global model on (X, y).
+    """
+    from metrics_engine import ThresholdMetrics
+
+    model = model_fn()
+
+    def eval_fn(weights):
+        model.set_weights(weights)
+        scores = np.asarray(model.predict(X, batch_size=batch_size, verbose=0)).ravel()
+        return ThresholdMetrics(y, scores).roc_auc()
+
+    return eval_fn
+
+def time_to_target(history, target):
+    """
+    Returns the simulated time at which history first reached target, or None.
+    """
+    for entry in history:
+        if entry.get("metric", -np.inf) >= target:
+            return entry["sim_time"]
+    return None
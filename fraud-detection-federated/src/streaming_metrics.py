@@ -0,0 +1,199 @@
+"""
+Streaming, mergeable evaluation metrics for federated evaluation.
+Each client folds its scored rows into a fixed-size accumulator (a score
+histogram per class plus exact counters); the server adds accumulators
+together. Counts, log-loss and confusion at the tracked thresholds merge
+exactly; ROC AUC and PR AUC come from the merged histograms, with ROC AUC
+reported together with guaranteed lower and upper bounds.
+"""
+
+import numpy as np
+
+from client_shards import ClientShard
+
+class MetricAccumulator:
+    """
+    Bounded-memory accumulator for binary classification metrics.
+
+    Memory is O(n_bins + len(thresholds)) regardless of how many rows are
+    added. Scores are expected to be probabilities in [0, 1]; values outside
+    are clipped into the edge bins.
+    """
+
+    def __init__(self, n_bins=4096, thresholds=(0.5,), eps=1e-7):
+        """
+        Args:
+            n_bins (int): Histogram resolution for ROC/PR AUC.
+            thresholds (tuple): Thresholds whose confusion counts are tracked exactly.
+            eps (float): Probability clipping for log-loss.
+        """
+        self.n_bins = n_bins
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.eps = eps
+        self.pos_hist = np.zeros(n_bins, dtype=np.int64)
+        self.neg_hist = np.zeros(n_bins, dtype=np.int64)
+        # Per threshold: positives and negatives scoring >= threshold.
+        self.tp = np.zeros(len(self.thresholds), dtype=np.int64)
+        self.fp = np.zeros(len(self.thresholds), dtype=np.int64)
+        self.log_loss_sum = 0.0
+
+    @property
+    def n_pos(self):
+        return int(self.pos_hist.sum())
+
+    @property
+    def n_neg(self):
+        return int(self.neg_hist.sum())
+
+    def update(self, y_true, scores):
+        """
+        Adds one batch of labels and predicted probabilities.
+        """
+        y = np.asarray(y_true).ravel().astype(bool)
+        p = np.asarray(scores, dtype=np.float64).ravel()
+        bins = np.clip((p * self.n_bins).astype(np.int64), 0, self.n_bins - 1)
+        self.pos_hist += np.bincount(bins[y], minlength=self.n_bins)
+        self.neg_hist += np.bincount(bins[~y], minlength=self.n_bins)
+
+        if len(self.thresholds):
+            above = p[:, None] >= self.thresholds[None, :]
+            self.tp += above[y].sum(axis=0)
+            self.fp += above[~y].sum(axis=0)
+
+        clipped = np.clip(p, self.eps, 1 - self.eps)
+        self.log_loss_sum += float(-np.sum(np.where(y, np.log(clipped), np.log1p(-clipped))))
+        return self
+
+    def merge(self, other):
+        """
+        Adds another accumulator (same n_bins and thresholds) into this one.
+        """
+        if other.n_bins != self.n_bins or not np.array_equal(other.thresholds, self.thresholds):
+            raise ValueError("Accumulators must share n_bins and thresholds to be merged")
+        self.pos_hist += other.pos_hist
+        self.neg_hist += other.neg_hist
+        self.tp += other.tp
+        self.fp += other.fp
+        self.log_loss_sum += other.log_loss_sum
+        return self
+
+    @classmethod
+    def merge_all(cls, accumulators):
+        """
+        Merges accumulators into a new one (an empty accumulator if there are none).
+        """
+        accumulators = list(accumulators)
+        if not accumulators:
+            return cls()
+        merged = cls(accumulators[0].n_bins, accumulators[0].thresholds, accumulators[0].eps)
+        for acc in accumulators:
+            merged.merge(acc)
+        return merged
+
+    # === Results ===
+
+    def roc_auc_bounds(self):
+        """
+        Returns (lower, estimate, upper) ROC AUC. Pairs of a positive and a
+        negative in the same bin are counted as 0, 1/2 and 1 respectively, so
+        the exact AUC always lies within [lower, upper].
+        """
+        n_pos, n_neg = self.n_pos, self.n_neg
+        if n_pos == 0 or n_neg == 0:
+            return float("nan"), float("nan"), float("nan")
+        # Positives scoring in a strictly higher bin than each negative.
+        pos_above = np.cumsum(self.pos_hist[::-1])[::-1] - self.pos_hist
+        pairs = float(n_pos) * n_neg
+        ranked = float(np.dot(self.neg_hist, pos_above.astype(np.float64)))
+        tied = float(np.dot(self.neg_hist, self.pos_hist.astype(np.float64)))
+        return ranked / pairs, (ranked + 0.5 * tied) / pairs, (ranked + tied) / pairs
+
+    def pr_auc(self):
+        """
+        Average precision with every bin edge used as a threshold.
+        """
+        if self.n_pos == 0:
+            return float("nan")
+        tps = np.cumsum(self.pos_hist[::-1]).astype(np.float64)
+        fps = np.cumsum(self.neg_hist[::-1]).astype(np.float64)
+        predicted = tps + fps
+        precision = np.divide(tps, predicted, out=np.zeros_like(tps), where=predicted > 0)
+        recall_step = self.pos_hist[::-1] / self.n_pos
+        return float(np.sum(recall_step * precision))
+
+    def confusion(self):
+        """
+        Exact confusion counts at each tracked threshold.
+
+        Returns:
+            dict: threshold -> {'tp', 'fp', 'fn', 'tn'}.
+        """
+        n_pos, n_neg = self.n_pos, self.n_neg
+        return {
+            float(t): {"tp": int(tp), "fp": int(fp), "fn": n_pos - int(tp), "tn": n_neg - int(fp)}
+            for t, tp, fp in zip(self.thresholds, self.tp, self.fp)
+        }
+
+    def result(self):
+        """
+        Returns:
+            dict: count, positives, log_loss, roc_auc (+ bounds), pr_auc and,
+            per tracked threshold, confusion counts with accuracy/precision/recall/F1.
+        """
+        count = self.n_pos + self.n_neg
+        lower, roc_auc, upper = self.roc_auc_bounds()
+        at_threshold = {}
+        for t, c in self.confusion().items():
+            precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 0.0
+            recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            at_threshold[t] = dict(c, accuracy=(c["tp"] + c["tn"]) / count if count else 0.0,
+                                   precision=precision, recall=recall, f1=f1)
+        return {
+            "count": count,
+            "positives": self.n_pos,
+            "log_loss": self.log_loss_sum / count if count else float("nan"),
+            "roc_auc": roc_auc,
+            "roc_auc_bounds": (lower, upper),
+            "pr_auc": self.pr_auc(),
+            "thresholds": at_threshold,
+        }
+
+    # === Transport ===
+
+    def get_state(self):
+        return {
+            "n_bins": self.n_bins, "thresholds": self.thresholds, "eps": self.eps,
+            "pos_hist": self.pos_hist, "neg_hist": self.neg_hist,
+            "tp": self.tp, "fp": self.fp, "log_loss_sum": self.log_loss_sum,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        acc = cls(state["n_bins"], state["thresholds"], state["eps"])
+        for key in ("pos_hist", "neg_hist", "tp", "fp"):
+            setattr(acc, key, np.asarray(state[key], dtype=np.int64).copy())
+        acc.log_loss_sum = float(state["log_loss_sum"])
+        return acc
+
+def evaluate_client(model, client, batch_size=4096, **accumulator_opts):
+    """
+    Scores one client's rows batch by batch into a MetricAccumulator.
+
+    Args:
+        model: Keras model with the global weights.
+        client: ClientShard or (X, y) tuple.
+        batch_size (int): Rows scored per predict_on_batch call.
+
+    Returns:
+        MetricAccumulator: The client's accumulator.
+    """
+    acc = MetricAccumulator(**accumulator_opts)
+    if isinstance(client, ClientShard):
+        batches = client.batches(batch_size, shuffle=False)
+    else:
+        X, y = client
+        batches = ((X[i:i + batch_size], y[i:i + batch_size]) for i in range(0, len(y), batch_size))
+    for X_batch, y_batch in batches:
+        acc.update(y_batch, np.asarray(model.predict_on_batch(X_batch)).ravel())
+    return acc
@@ -0,0 +1,255 @@
+"""
+Mergeable streaming accumulators for out-of-core transaction analytics.
+Each accumulator consumes DataFrame chunks via update(), can be combined with
+another accumulator of the same kind via merge(), and keeps memory bounded
+by the number of columns, groups or its top-k capacity rather than by rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+class NumericStats:
+    """
+    Count, mean, std, min and max per numeric column (Chan et al. parallel variance).
+    """
+
+    def __init__(self, columns=None):
+        self.columns = list(columns) if columns is not None else None
+        self.count = None
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.select_dtypes(include=[np.number]).columns)
+        data = chunk[self.columns].astype(np.float64)
+        other = NumericStats(self.columns)
+        other.count = data.count()
+        other.mean = data.mean().fillna(0.0)
+        other.m2 = ((data - other.mean) ** 2).sum()
+        other.min = data.min()
+        other.max = data.max()
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.count is None:
+            return self
+        if self.count is None:
+            self.columns = other.columns
+            self.count, self.mean, self.m2 = other.count.copy(), other.mean.copy(), other.m2.copy()
+            self.min, self.max = other.min.copy(), other.max.copy()
+            return self
+        total = self.count + other.count
+        safe_total = total.where(total > 0, 1)
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / safe_total
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / safe_total
+        self.count = total
+        self.min = pd.concat([self.min, other.min], axis=1).min(axis=1)
+        self.max = pd.concat([self.max, other.max], axis=1).max(axis=1)
+        return self
+
+    def result(self):
+        """
+        Returns a describe()-style frame with rows count, mean, std, min, max.
+        """
+        if self.count is None:
+            return pd.DataFrame()
+        std = np.sqrt(self.m2 / (self.count - 1).where(self.count > 1))
+        return pd.DataFrame({
+            "count": self.count,
+            "mean": self.mean.where(self.count > 0),
+            "std": std,
+            "min": self.min,
+            "max": self.max,
+        }).T
+
+class TopKCounter:
+    """
+    Value counts with bounded memory.
+
+    Exact while the number of distinct values stays under 2 * capacity; past
+    that, the tail is pruned back to the `capacity` heaviest values, so the
+    top of the ranking stays accurate for skewed data.
+    """
+
+    def __init__(self, capacity=10000, column=None, where=None):
+        """
+        Args:
+            capacity (int): Number of heavy hitters kept after pruning.
+            column (str): If set, update() takes a chunk and counts this column.
+            where (callable): Optional chunk -> boolean mask selecting rows to count.
+        """
+        self.capacity = capacity
+        self.column = column
+        self.where = where
+        self.counts = pd.Series(dtype=np.int64)
+        self.total = 0
+        self.truncated = False
+
+    def _add(self, counts):
+        self.counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+        if len(self.counts) > 2 * self.capacity:
+            self.counts = self.counts.nlargest(self.capacity)
+            self.truncated = True
+
+    def update(self, data):
+        if self.where is not None:
+            data = data[self.where(data)]
+        values = pd.Series(data[self.column] if self.column is not None else data)
+        self.total += len(values)
+        self._add(values.value_counts())
+        return self
+
+    def merge(self, other):
+        self.total += other.total
+        self.truncated = self.truncated or other.truncated
+        self._add(other.counts)
+        return self
+
+    def most_common(self, k=5):
+        return self.counts.sort_values(ascending=False, kind="stable").head(k)
+
+    @property
+    def n_unique(self):
+        return len(self.counts)
+
+class GroupRate:
+    """
+    Per-group sum and count of a value column (e.g. fraud rate by location).
+
+    If the key column is absent from the data, `missing` is set instead of raising.
+    """
+
+    def __init__(self, key, value="is_fraud", key_fn=None):
+        self.key = key
+        self.value = value
+        self.key_fn = key_fn
+        self.sums = pd.Series(dtype=np.float64)
+        self.counts = pd.Series(dtype=np.int64)
+        self.missing = False
+
+    def update(self, chunk):
+        if self.key not in chunk.columns:
+            self.missing = True
+            return self
+        keys = chunk[self.key] if self.key_fn is None else self.key_fn(chunk[self.key])
+        grouped = chunk[self.value].groupby(keys, observed=True).agg(["sum", "count"])
+        self.sums = self.sums.add(grouped["sum"], fill_value=0)
+        self.counts = self.counts.add(grouped["count"], fill_value=0).astype(np.int64)
+        return self
+
+    def merge(self, other):
+        self.missing = self.missing and other.missing
+        self.sums = self.sums.add(other.sums, fill_value=0)
+        self.counts = self.counts.add(other.counts, fill_value=0).astype(np.int64)
+        return self
+
+    def rates(self):
+        return (self.sums / self.counts).sort_index()
+
+class Histogram:
+    """
+    Fixed-width histogram of a numeric column, keyed by bin left edge.
+    """
+
+    def __init__(self, column, bin_width=100.0):
+        self.column = column
+        self.bin_width = bin_width
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, chunk):
+        bins = np.floor(chunk[self.column].dropna().to_numpy() / self.bin_width).astype(np.int64)
+        self.counts = self.counts.add(pd.Series(bins).value_counts(), fill_value=0).astype(np.int64)
+        return self
+
+    def merge(self, other):
+        self.counts = self.counts.add(other.counts, fill_value=0).astype(np.int64)
+        return self
+
+    def result(self):
+        counts = self.counts.sort_index()
+        counts.index = counts.index * self.bin_width
+        return counts
+
+class SummaryAccumulator:
+    """
+    Streaming equivalent of df.describe(include='all') plus missing-value counts.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.rows = 0
+        self.columns = None
+        self.missing = None
+        self.numeric = NumericStats()
+        self.categorical = {}
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            numeric_cols = set(chunk.select_dtypes(include=[np.number]).columns)
+            self.numeric = NumericStats([c for c in self.columns if c in numeric_cols])
+            self.categorical = {c: TopKCounter(self.capacity) for c in self.columns if c not in numeric_cols}
+            self.missing = pd.Series(0, index=self.columns, dtype=np.int64)
+        self.rows += len(chunk)
+        self.missing = self.missing.add(chunk.isnull().sum(), fill_value=0).astype(np.int64)
+        self.numeric.update(chunk)
+        for col, counter in self.categorical.items():
+            counter.update(chunk[col].dropna())
+        return self
+
+    def merge(self, other):
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.columns = other.columns
+            self.missing = pd.Series(0, index=self.columns, dtype=np.int64)
+            self.categorical = {c: TopKCounter(self.capacity) for c in other.categorical}
+        self.rows += other.rows
+        self.missing = self.missing.add(other.missing, fill_value=0).astype(np.int64)
+        self.numeric.merge(other.numeric)
+        for col, counter in other.categorical.items():
+            self.categorical[col].merge(counter)
+        return self
+
+    def result(self):
+        """
+        Returns a describe()-style frame across all columns.
+        """
+        frame = pd.DataFrame(index=["count", "unique", "top", "freq", "mean", "std", "min", "max"],
+                             columns=self.columns or [], dtype=object)
+        numeric = self.numeric.result()
+        for col in numeric.columns:
+            for stat in numeric.index:
+                frame.loc[stat, col] = numeric.loc[stat, col]
+        for col, counter in self.categorical.items():
+            top = counter.most_common(1)
+            frame.loc["count", col] = counter.total
+            frame.loc["unique", col] = counter.n_unique if not counter.truncated else f">={counter.n_unique}"
+            if len(top):
+                frame.loc["top", col] = top.index[0]
+                frame.loc["freq", col] = top.iloc[0]
+        return frame
+
+def scan_csv(path, accumulators, chunksize=100000):
+    """
+    Streams a CSV once, feeding every chunk to each accumulator.
+
+    Args:
+        path (str): CSV file path.
+        accumulators (iterable): Objects exposing update(chunk).
+        chunksize (int): Rows per chunk.
+
+    Returns:
+        int: Number of rows scanned.
+    """
+    accumulators = list(accumulators)
+    rows = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        for acc in accumulators:
+            acc.update(chunk)
+        rows += len(chunk)
+    return rows
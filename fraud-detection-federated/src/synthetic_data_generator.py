@@ -1,155 +1,377 @@
 """
-This module handles synthetic data generator.
+High-volume synthetic transaction generator.
+Produces rows in the synthetic_data.csv schema (transaction_id, amount,
+merchant_id, timestamp, location, device_type, user_id, is_international,
+is_fraud) with fully vectorized NumPy, chunk by chunk, so output size is
+bounded only by disk. Users and merchants carry persistent profiles (home
+location, usual device, spending level, popularity), and three fraud
+patterns are injected on top of normal traffic:
+
+- background: isolated fraudulent transactions (large, unusual device/location);
+- card_testing: bursts of tiny charges on one card within minutes, often
+  followed by a large cash-out;
+- merchant_compromise: a breached merchant leaks the cards used there, which
+  are later charged elsewhere, abroad, for large amounts.
+
+Every chunk draws from its own generator seeded by (seed, chunk index), so
+output is reproducible and chunks can be generated in any order or in
+parallel.
 """
 
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles synthetic data generator.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles synthetic data generator.
-"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
 
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles synthetic data generator.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
-
-if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
-"""
-This module handles synthetic data generator.
-"""
-
-import numpy as np
-import pandas as pd
-
-def example_function_1():
-    result = []
-    for i in range(50):
-        result.append(i ** 2)
-    return result
-
-def example_function_2():
-    return np.random.rand(100)
-
-class ExampleClass:
-    def __init__(self):
-        self.data = pd.DataFrame({"A": range(100)})
-
-    def compute_sum(self):
-        return self.data.sum()
-
-    def print_preview(self):
-        print(self.data.head())
+COLUMNS = ["transaction_id", "amount", "merchant_id", "timestamp", "location", "device_type",
+           "user_id", "is_international", "is_fraud"]
+
+LOCATIONS = ["CA", "NY", "TX", "IL", "FL", "WA", "GA", "NJ", "OH", "PA"]
+DEVICE_TYPES = ["mobile", "desktop", "tablet", "POS"]
+
+FRAUD_PATTERNS = ("none", "background", "card_testing", "merchant_compromise")
+
+# Cards leaked by a single merchant breach.
+MAX_BREACH_VICTIMS = 200
+
+class TransactionGenerator:
+    """
+    Seedable, chunked generator of labelled transactions.
+    """
+
+    def __init__(self, n_users=100_000, n_merchants=5_000, start="2025-01-01", days=30,
+                 background_fraud_rate=0.002, card_testing_per_million=200, merchant_compromise_per_million=10,
+                 seed=0):
+        """
+        Args:
+            n_users (int): Distinct cardholders.
+            n_merchants (int): Distinct merchants (Zipf-distributed popularity).
+            start (str): First timestamp.
+            days (int): Time span covered by the whole output.
+            background_fraud_rate (float): Share of normal rows turned into isolated fraud.
+            card_testing_per_million (float): Card-testing bursts per million rows.
+            merchant_compromise_per_million (float): Merchant breaches per million rows.
+            seed (int): Random seed; the same seed and chunking give the same rows.
+        """
+        self.n_users = n_users
+        self.n_merchants = n_merchants
+        self.start = np.datetime64(start, "s")
+        self.span_seconds = int(days * 86400)
+        self.background_fraud_rate = background_fraud_rate
+        self.card_testing_per_million = card_testing_per_million
+        self.merchant_compromise_per_million = merchant_compromise_per_million
+        self.seed = seed
+
+        # Persistent entity profiles, shared by every chunk.
+        rng = np.random.default_rng([seed, 2 ** 32 - 1])
+        self.merchant_names = np.char.add("M", np.arange(100, 100 + n_merchants).astype(str))
+        popularity = 1.0 / np.arange(1, n_merchants + 1) ** 1.1
+        self.merchant_cdf = np.cumsum(rng.permutation(popularity) / popularity.sum())
+        self.merchant_scale = rng.lognormal(0.0, 0.5, n_merchants)
+
+        activity = rng.gamma(0.8, 1.0, n_users)
+        self.user_cdf = np.cumsum(activity / activity.sum())
+        self.user_ids = rng.choice(np.arange(1000, 1000 + 20 * n_users), n_users, replace=False)
+        self.user_home = rng.integers(0, len(LOCATIONS), n_users).astype(np.int8)
+        self.user_device = rng.choice(len(DEVICE_TYPES), n_users, p=[0.5, 0.25, 0.1, 0.15]).astype(np.int8)
+        self.user_log_amount = rng.normal(4.0, 0.7, n_users)
+        self.user_travel = rng.beta(1.0, 30.0, n_users)
+
+    # === Sampling helpers ===
+
+    @staticmethod
+    def _pick(rng, cdf, n):
+        return np.minimum(np.searchsorted(cdf, rng.random(n)), len(cdf) - 1)
+
+    def _normal_rows(self, rng, n, t0, t1):
+        users = self._pick(rng, self.user_cdf, n)
+        merchants = self._pick(rng, self.merchant_cdf, n)
+        travelling = rng.random(n) < self.user_travel[users]
+        location = np.where(travelling, rng.integers(0, len(LOCATIONS), n), self.user_home[users])
+        device = np.where(rng.random(n) < 0.9, self.user_device[users], rng.integers(0, len(DEVICE_TYPES), n))
+        amount = np.exp(rng.normal(self.user_log_amount[users], 0.6)) * self.merchant_scale[merchants]
+        return {
+            "user": users,
+            "merchant": merchants,
+            "ts": rng.integers(t0, t1, n),
+            "amount": amount,
+            "location": location,
+            "device": device,
+            "is_international": travelling & (rng.random(n) < 0.3),
+            "pattern": np.zeros(n, dtype=np.int8),
+        }
+
+    def _card_testing(self, rng, n_bursts, t0, t1):
+        sizes = rng.integers(5, 31, n_bursts)
+        cash_out = rng.random(n_bursts) < 0.6
+        counts = sizes + cash_out
+        n = int(counts.sum())
+        burst = np.repeat(np.arange(n_bursts), counts)
+        # Position within the burst; the cash-out (if any) comes last.
+        step = np.arange(n) - np.repeat(np.cumsum(counts) - counts, counts)
+        is_cash_out = cash_out[burst] & (step == sizes[burst])
+
+        users = self._pick(rng, self.user_cdf, n_bursts)[burst]
+        burst_start = rng.integers(t0, max(t0 + 1, t1 - 3600), n_bursts)[burst]
+        ts = np.minimum(burst_start + step * rng.integers(5, 120, n), t1 - 1)
+        # Testers hammer one (often online) merchant, then cash out elsewhere.
+        tested_merchant = self._pick(rng, self.merchant_cdf, n_bursts)[burst]
+        merchants = np.where(is_cash_out, self._pick(rng, self.merchant_cdf, n), tested_merchant)
+        amount = np.where(is_cash_out, rng.uniform(500, 5000, n), rng.uniform(0.5, 5.0, n))
+        device = np.where(rng.random(n_bursts) < 0.8, 0, 1)[burst]
+        return {
+            "user": users,
+            "merchant": merchants,
+            "ts": ts,
+            "amount": amount,
+            "location": rng.integers(0, len(LOCATIONS), n_bursts)[burst],
+            "device": device,
+            "is_international": (rng.random(n_bursts) < 0.5)[burst],
+            "pattern": np.full(n, 2, dtype=np.int8),
+        }
+
+    def _merchant_compromise(self, rng, normal, n_breaches, t0, t1):
+        """
+        Cards used at breached merchants during the breach are charged later
+        at other merchants. Returns the fraudulent follow-up rows.
+        """
+        parts = []
+        # Busy merchants are both likelier targets and bigger leaks (capped).
+        for merchant in self._pick(rng, self.merchant_cdf, n_breaches):
+            breach_start = rng.integers(t0, t0 + max(1, (t1 - t0) // 2))
+            breach_end = breach_start + max(1, min((t1 - t0) // 4, 6 * 3600))
+            exposed = (normal["merchant"] == merchant) & (normal["ts"] >= breach_start) & (normal["ts"] < breach_end)
+            victims = np.unique(normal["user"][exposed])
+            victims = victims[rng.random(len(victims)) < 0.3]
+            if len(victims) > MAX_BREACH_VICTIMS:
+                victims = rng.choice(victims, MAX_BREACH_VICTIMS, replace=False)
+            if not len(victims):
+                continue
+            uses = rng.integers(1, 4, len(victims))
+            users = np.repeat(victims, uses)
+            n = len(users)
+            parts.append({
+                "user": users,
+                "merchant": self._pick(rng, self.merchant_cdf, n),
+                "ts": rng.integers(breach_end, max(breach_end + 1, t1), n),
+                "amount": rng.lognormal(6.5, 0.6, n),
+                "location": rng.integers(0, len(LOCATIONS), n),
+                "device": rng.integers(0, len(DEVICE_TYPES), n),
+                "is_international": rng.random(n) < 0.7,
+                "pattern": np.full(n, 3, dtype=np.int8),
+            })
+        return parts
+
+    # === Chunks ===
+
+    def chunk_bounds(self, chunk_index, n_chunks):
+        """
+        Seconds-from-start interval covered by one chunk; chunks tile the
+        full time span in order, so concatenated output is time-sorted.
+        """
+        t0 = self.span_seconds * chunk_index // n_chunks
+        t1 = max(t0 + 1, self.span_seconds * (chunk_index + 1) // n_chunks)
+        return t0, t1
+
+    def generate_chunk(self, chunk_index, n_rows, n_chunks=1, first_id=1, include_pattern=False):
+        """
+        Generates one chunk of exactly n_rows rows, sorted by timestamp.
+
+        Args:
+            chunk_index (int): Position of the chunk; selects its time slice and seed.
+            n_rows (int): Rows in the chunk.
+            n_chunks (int): Total chunks in the output.
+            first_id (int): transaction_id of the chunk's first row.
+            include_pattern (bool): Add a 'fraud_pattern' column naming the injected pattern.
+
+        Returns:
+            pd.DataFrame: Transactions in COLUMNS order.
+        """
+        rng = np.random.default_rng([self.seed, chunk_index])
+        t0, t1 = self.chunk_bounds(chunk_index, n_chunks)
+        per_million = n_rows / 1e6
+
+        # Fraud rows are drawn first; normal traffic fills the rest of the chunk.
+        n_bursts = rng.poisson(self.card_testing_per_million * per_million)
+        testing = self._card_testing(rng, n_bursts, t0, t1)
+        normal = self._normal_rows(rng, max(0, n_rows - len(testing["ts"])), t0, t1)
+        breaches = self._merchant_compromise(rng, normal, rng.poisson(self.merchant_compromise_per_million * per_million),
+                                             t0, t1)
+
+        parts = [normal, testing] + breaches
+        rows = {key: np.concatenate([p[key] for p in parts]) for key in normal}
+        # Keep the chunk at n_rows: compromise follow-ups replace random normal rows.
+        n_extra = len(rows["ts"]) - n_rows
+        keep = np.ones(len(rows["ts"]), dtype=bool)
+        if n_extra > 0:
+            n_normal = len(normal["ts"])
+            if n_extra <= n_normal:
+                keep[rng.choice(n_normal, n_extra, replace=False)] = False
+            else:
+                keep[:n_normal] = False
+                keep[n_normal + rng.choice(len(keep) - n_normal, n_extra - n_normal, replace=False)] = False
+        order = np.flatnonzero(keep)
+        order = order[np.argsort(rows["ts"][order], kind="stable")]
+        rows = {key: values[order] for key, values in rows.items()}
+
+        pattern = rows["pattern"]
+        background = (pattern == 0) & (rng.random(n_rows) < self.background_fraud_rate)
+        if background.any():
+            k = int(background.sum())
+            pattern[background] = 1
+            rows["amount"][background] *= rng.uniform(3.0, 10.0, k)
+            rows["device"][background] = rng.integers(0, len(DEVICE_TYPES), k)
+            rows["location"][background] = rng.integers(0, len(LOCATIONS), k)
+            rows["is_international"][background] |= rng.random(k) < 0.4
+
+        df = pd.DataFrame({
+            "transaction_id": np.arange(first_id, first_id + n_rows, dtype=np.int64),
+            "amount": np.round(rows["amount"], 2),
+            "merchant_id": pd.Categorical.from_codes(rows["merchant"], categories=self.merchant_names),
+            "timestamp": self.start + rows["ts"].astype("timedelta64[s]"),
+            "location": pd.Categorical.from_codes(rows["location"], categories=LOCATIONS),
+            "device_type": pd.Categorical.from_codes(rows["device"], categories=DEVICE_TYPES),
+            "user_id": self.user_ids[rows["user"]],
+            "is_international": rows["is_international"].astype(np.int8),
+            "is_fraud": (pattern > 0).astype(np.int8),
+        })
+        if include_pattern:
+            df["fraud_pattern"] = pd.Categorical.from_codes(pattern, categories=FRAUD_PATTERNS)
+        return df
+
+    def iter_chunks(self, n_rows, chunk_size=1_000_000, workers=1, include_pattern=False):
+        """
+        Yields the output as consecutive DataFrame chunks.
+
+        Args:
+            n_rows (int): Total rows.
+            chunk_size (int): Rows per chunk.
+            workers (int): Worker processes generating chunks ahead of the consumer.
+        """
+        n_chunks = max(1, -(-n_rows // chunk_size))
+        sizes = [min(chunk_size, n_rows - i * chunk_size) for i in range(n_chunks)]
+        args = [(i, sizes[i], n_chunks, 1 + i * chunk_size, include_pattern) for i in range(n_chunks)]
+        if workers <= 1:
+            for a in args:
+                yield self.generate_chunk(*a)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(_generate_chunk, [self] * n_chunks, args)
+
+def _generate_chunk(generator, args):
+    return generator.generate_chunk(*args)
+
+# === Output ===
+
+def _require_parquet_engine():
+    # Parquet is optional: pandas needs pyarrow or fastparquet to write it.
+    for module in ("pyarrow", "fastparquet"):
+        try:
+            __import__(module)
+            return
+        except ImportError:
+            continue
+    raise ImportError("Parquet output requires pyarrow or fastparquet (pip install pyarrow); "
+                      "use a .csv output instead.")
+
+def write_transactions(path, n_rows, chunk_size=1_000_000, fmt=None, workers=1, include_pattern=False, **config):
+    """
+    Generates n_rows transactions and writes them chunk by chunk.
+
+    Args:
+        path (str): Output file ('csv') or directory of part files ('parquet').
+        n_rows (int): Total rows.
+        chunk_size (int): Rows generated and written at a time.
+        fmt (str): 'csv' or 'parquet'; if omitted, 'parquet' for a .parquet
+            path and 'csv' otherwise.
+        workers (int): Generator processes.
+        **config: TransactionGenerator arguments (seed, n_users, days, ...).
+
+    Returns:
+        dict: rows, fraud rows and seconds taken.
+
+    Raises:
+        ImportError: For parquet output without pyarrow or fastparquet,
+            before anything is generated or written.
+    """
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "csv")
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from ['csv', 'parquet'].")
+    if fmt == "parquet":
+        _require_parquet_engine()
+    generator = TransactionGenerator(**config)
+
+    start = time.perf_counter()
+    n_fraud = 0
+    if fmt == "parquet":
+        os.makedirs(path, exist_ok=True)
+    elif os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    for i, chunk in enumerate(generator.iter_chunks(n_rows, chunk_size, workers=workers,
+                                                    include_pattern=include_pattern)):
+        n_fraud += int(chunk["is_fraud"].sum())
+        if fmt == "csv":
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        else:
+            chunk.to_parquet(os.path.join(path, f"part-{i:05d}.parquet"), index=False)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {n_rows:,} transactions ({n_fraud:,} fraud, {n_fraud / max(n_rows, 1):.3%}) "
+          f"to {path} in {seconds:.1f}s")
+    return {"rows": n_rows, "fraud": n_fraud, "seconds": seconds}
+
+# === Benchmark ===
+
+def benchmark_generator(n_rows=10_000_000, chunk_size=1_000_000, seed=0):
+    """
+    Measures in-memory generation throughput and the fraud pattern mix.
+    """
+    generator = TransactionGenerator(seed=seed)
+    start = time.perf_counter()
+    counts = np.zeros(len(FRAUD_PATTERNS), dtype=np.int64)
+    for chunk in generator.iter_chunks(n_rows, chunk_size, include_pattern=True):
+        counts += np.bincount(chunk["fraud_pattern"].cat.codes, minlength=len(FRAUD_PATTERNS))
+    seconds = time.perf_counter() - start
+
+    print(f"\n=== Synthetic Generator ({n_rows:,} rows, chunk_size={chunk_size:,}) ===")
+    print(f"Generated in {seconds:.2f}s: {n_rows / seconds * 60 / 1e6:,.1f}M rows/minute")
+    for name, count in zip(FRAUD_PATTERNS, counts):
+        print(f"{name:<20} {count:>12,} ({count / n_rows:.3%})")
+    return {"seconds": seconds, "rows_per_minute": n_rows / seconds * 60}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic transactions at scale")
+    parser.add_argument("--output", type=str, default="../data/generated_transactions.csv",
+                        help="Output CSV file, or directory of part files for --format parquet / a .parquet path")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of transactions")
+    parser.add_argument("--chunk_size", type=int, default=1_000_000, help="Rows per generated chunk")
+    parser.add_argument("--format", choices=["csv", "parquet"],
+                        help="Output format (default: parquet for a .parquet --output, else csv)")
+    parser.add_argument("--workers", type=int, default=1, help="Generator processes")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--users", type=int, default=100_000, help="Distinct cardholders")
+    parser.add_argument("--merchants", type=int, default=5_000, help="Distinct merchants")
+    parser.add_argument("--days", type=int, default=30, help="Days covered by the output")
+    parser.add_argument("--fraud_rate", type=float, default=0.002, help="Background fraud rate")
+    parser.add_argument("--card_testing", type=float, default=200, help="Card-testing bursts per million rows")
+    parser.add_argument("--merchant_compromise", type=float, default=10, help="Merchant breaches per million rows")
+    parser.add_argument("--include_pattern", action="store_true", help="Add a fraud_pattern column")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Benchmark in-memory generation of ROWS rows")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_generator(n_rows=args.benchmark, chunk_size=args.chunk_size, seed=args.seed)
+        return
+    try:
+        write_transactions(args.output, args.rows, chunk_size=args.chunk_size, fmt=args.format,
+                           workers=args.workers, include_pattern=args.include_pattern, seed=args.seed,
+                           n_users=args.users, n_merchants=args.merchants, days=args.days,
+                           background_fraud_rate=args.fraud_rate, card_testing_per_million=args.card_testing,
+                           merchant_compromise_per_million=args.merchant_compromise)
+    except ImportError as e:
+        parser.error(str(e))
 
 if __name__ == "__main__":
-    obj = ExampleClass()
-    obj.print_preview()
-    print(example_function_1()[:5])
-    print(example_function_2()[:5])
+    main()
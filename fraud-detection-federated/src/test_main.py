@@ -51,6 +51,142 @@ class TestDataIntegrity(unittest.TestCase):
         self.assertGreaterEqual(fraud_rate, 0.01)
         self.assertLessEqual(fraud_rate, 0.5)
 
+class TestStreamingReports(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(DATA_PATH)
+
+    def test_chunked_summary_matches_describe(self):
+        from streaming_stats import SummaryAccumulator, scan_csv
+        summary = SummaryAccumulator()
+        scan_csv(DATA_PATH, [summary], chunksize=37)
+        expected = self.df.describe()
+        result = summary.numeric.result()
+        for col in expected.columns:
+            for stat in ["count", "mean", "std", "min", "max"]:
+                self.assertAlmostEqual(result.loc[stat, col], expected.loc[stat, col], places=6)
+
+    def test_merged_group_rates_match_groupby(self):
+        from streaming_stats import GroupRate
+        left = GroupRate("location").update(self.df.iloc[:100])
+        right = GroupRate("location").update(self.df.iloc[100:])
+        rates = left.merge(right).rates()
+        expected = self.df.groupby("location")["is_fraud"].mean()
+        for loc, rate in expected.items():
+            self.assertAlmostEqual(rates[loc], rate)
+
+class TestMetricsEngine(unittest.TestCase):
+    def setUp(self):
+        import numpy as np
+        rng = np.random.default_rng(0)
+        self.y = (rng.random(2000) < 0.1).astype(int)
+        # Rounded scores create many ties across both classes.
+        self.scores = np.round(np.clip(0.3 * self.y + rng.random(2000) * 0.7, 0, 1), 2)
+        self.weights = rng.random(2000) * 3
+
+    def test_matches_sklearn_with_ties_and_weights(self):
+        from sklearn.metrics import (average_precision_score, confusion_matrix, f1_score,
+                                     precision_score, recall_score, roc_auc_score)
+        from metrics_engine import compute_metrics
+        for weights in (None, self.weights):
+            result = compute_metrics(self.y, self.scores, threshold=0.5, sample_weight=weights)
+            pred = (self.scores >= 0.5).astype(int)
+            self.assertAlmostEqual(result["roc_auc"], roc_auc_score(self.y, self.scores, sample_weight=weights))
+            self.assertAlmostEqual(result["pr_auc"],
+                                   average_precision_score(self.y, self.scores, sample_weight=weights))
+            self.assertAlmostEqual(result["precision"], precision_score(self.y, pred, sample_weight=weights))
+            self.assertAlmostEqual(result["recall"], recall_score(self.y, pred, sample_weight=weights))
+            self.assertAlmostEqual(result["f1_score"], f1_score(self.y, pred, sample_weight=weights))
+            expected = confusion_matrix(self.y, pred, sample_weight=weights)
+            for got, want in zip(result["confusion_matrix"].ravel(), expected.ravel()):
+                self.assertAlmostEqual(float(got), float(want))
+
+    def test_roc_curve_matches_sklearn(self):
+        import numpy as np
+        from sklearn.metrics import roc_curve
+        from metrics_engine import ThresholdMetrics
+        fpr, tpr, _ = ThresholdMetrics(self.y, self.scores, sample_weight=self.weights).roc_curve()
+        want_fpr, want_tpr, _ = roc_curve(self.y, self.scores, sample_weight=self.weights, drop_intermediate=False)
+        np.testing.assert_allclose(fpr, want_fpr)
+        np.testing.assert_allclose(tpr, want_tpr)
+
+class TestStreamingMetrics(unittest.TestCase):
+    def test_auc_bounds_contain_exact_value(self):
+        import numpy as np
+        from sklearn.metrics import roc_auc_score
+        from streaming_metrics import MetricAccumulator
+        rng = np.random.default_rng(1)
+        y = (rng.random(5000) < 0.2).astype(int)
+        scores = np.clip(0.2 * y + rng.random(5000) * 0.8, 0, 1)
+        parts = []
+        for i in range(3):
+            acc = MetricAccumulator(n_bins=64)
+            acc.update(y[i::3], scores[i::3])
+            parts.append(acc)
+        lower, upper = MetricAccumulator.merge_all(parts).result()["roc_auc_bounds"]
+        exact = roc_auc_score(y, scores)
+        self.assertLessEqual(lower, exact)
+        self.assertGreaterEqual(upper, exact)
+
+    def test_merge_all_empty(self):
+        from streaming_metrics import MetricAccumulator
+        merged = MetricAccumulator.merge_all([])
+        self.assertEqual(merged.result()["count"], 0)
+
+class TestVelocityFeatures(unittest.TestCase):
+    def setUp(self):
+        t0 = pd.Timestamp("2025-01-01 00:00:00")
+        seconds = [0, 0, 3600, 3601, 86400, 90000]
+        self.df = pd.DataFrame({
+            "timestamp": [t0 + pd.Timedelta(seconds=s) for s in seconds],
+            "amount": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+            "user_id": [1, 1, 1, 2, 1, 2],
+            "merchant_id": ["M1", "M2", "M1", "M1", "M1", "M2"],
+            "device_type": ["mobile", "mobile", "web", "web", "mobile", "web"],
+            "location": ["NY", "NY", "NY", "CA", "TX", "CA"],
+        })
+
+    def test_batch_matches_online_store(self):
+        import numpy as np
+        from feature_engineering import VelocityFeatureStore, velocity_features
+        batch = velocity_features(self.df)
+        online = VelocityFeatureStore().update_frame(self.df)
+        self.assertEqual(list(batch.columns), list(online.columns))
+        np.testing.assert_allclose(batch.to_numpy(), online.to_numpy())
+
+    def test_window_edges_and_first_events(self):
+        from feature_engineering import NO_HISTORY, velocity_features
+        f = velocity_features(self.df)
+        # First events of a user or merchant have no history.
+        self.assertEqual(f.loc[0, "user_seconds_since_last"], NO_HISTORY)
+        self.assertEqual(f.loc[3, "user_seconds_since_last"], NO_HISTORY)
+        # Equal timestamps: the earlier row counts, with a zero gap.
+        self.assertEqual(f.loc[1, "user_count_1h"], 1)
+        self.assertEqual(f.loc[1, "user_seconds_since_last"], 0)
+        # Window start is exclusive: events exactly 1h (or 24h) back fall out.
+        self.assertEqual(f.loc[2, "user_count_1h"], 0)
+        self.assertEqual(f.loc[2, "user_count_24h"], 2)
+        self.assertEqual(f.loc[4, "user_count_24h"], 1)
+        self.assertEqual(f.loc[4, "user_amount_24h"], 30.0)
+        self.assertEqual(f.loc[4, "user_amount_7d"], 60.0)
+        self.assertEqual(f.loc[4, "user_new_location"], 1)
+        self.assertEqual(f.loc[4, "user_new_device"], 0)
+
+class TestFedAvgAggregation(unittest.TestCase):
+    def aggregate(self, scales):
+        import numpy as np
+        from fedavg import FedAvgEngine
+        engine = FedAvgEngine(model_fn=None, trainer=object())
+        state = {"round": 0, "weights": [np.zeros(3, dtype=np.float32)], "optimizer": {}}
+        result = {"client_id": 0, "weights": [np.ones(3, dtype=np.float32)], "num_samples": 10, "loss": 0.1}
+        new_state, _ = engine.aggregate(state, [result], weight_scales=scales)
+        return new_state["weights"][0]
+
+    def test_stale_update_moves_model_less(self):
+        fresh = self.aggregate(None)
+        stale = self.aggregate([0.1])
+        self.assertAlmostEqual(float(fresh[0]), 1.0, places=6)
+        self.assertAlmostEqual(float(stale[0]), 0.1, places=6)
+
 class TestMainCLI(unittest.TestCase):
     def run_script_with_arg(self, arg):
         result = subprocess.run(
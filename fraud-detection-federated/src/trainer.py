@@ -3,7 +3,6 @@ Trains a Keras model on local client data.
 Supports early stopping, validation, and history visualization.
 """
 
-import matplotlib.pyplot as plt
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 
 def train_model(model, X, y,
@@ -13,7 +12,8 @@ def train_model(model, X, y,
                 patience=3,
                 save_path=None,
                 verbose=1,
-                plot_history=True):
+                plot_history=True,
+                reporter=None):
     """
     Trains the model on local data.
 
@@ -28,6 +28,7 @@ def train_model(model, X, y,
         save_path (str): Optional path to save best model.
         verbose (int): Verbosity level.
         plot_history (bool): Plot training/validation loss.
+        reporter (PlotReporter): Where to render the plot; defaults to the process-wide reporter.
 
     Returns:
         model: Trained model.
@@ -49,44 +50,19 @@ def train_model(model, X, y,
     )
 
     if plot_history:
-        plot_training_history(history)
+        plot_training_history(history, reporter=reporter)
 
     return model, history
 
-def plot_training_history(history):
+def plot_training_history(history, reporter=None):
     """
-    Plots training and validation accuracy/loss curves.
+    Renders training and validation accuracy/loss curves to the run directory.
     """
     if history is None:
         return
 
-    history_dict = history.history
-
-    plt.figure(figsize=(12, 4))
-
-    # Accuracy
-    plt.subplot(1, 2, 1)
-    if 'accuracy' in history_dict:
-        plt.plot(history_dict['accuracy'], label='Train Acc')
-        if 'val_accuracy' in history_dict:
-            plt.plot(history_dict['val_accuracy'], label='Val Acc')
-        plt.title("Accuracy over Epochs")
-        plt.xlabel("Epoch")
-        plt.ylabel("Accuracy")
-        plt.legend()
-
-    # Loss
-    plt.subplot(1, 2, 2)
-    plt.plot(history_dict['loss'], label='Train Loss')
-    if 'val_loss' in history_dict:
-        plt.plot(history_dict['val_loss'], label='Val Loss')
-    plt.title("Loss over Epochs")
-    plt.xlabel("Epoch")
-    plt.ylabel("Loss")
-    plt.legend()
-
-    plt.tight_layout()
-    plt.show()
+    from plot_reporter import default_reporter
+    return (reporter or default_reporter()).training_history(history.history)
 
 # Test mode
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+"""
+Communication-efficient compression of client model updates.
+Clients send their update as a delta against the global model they received
+(delta encoding); compressors shrink that delta with 8-bit quantization
+and/or top-k sparsification with per-client error feedback.
+"""
+
+import numpy as np
+
+def payload_bytes(payload):
+    """
+    Returns the number of bytes a compressed payload would put on the wire.
+    """
+    total = 0
+    for layer in payload:
+        for value in layer.values():
+            if isinstance(value, np.ndarray):
+                total += value.nbytes
+            elif isinstance(value, (float, int, np.floating, np.integer)):
+                total += 4
+    return total
+
+def _quantize(x, bits, rng):
+    levels = (1 << bits) - 1
+    dtype = np.uint8 if bits <= 8 else np.uint16
+    if x.size == 0:
+        return x.astype(dtype), np.float32(0.0), np.float32(1.0)
+    lo, hi = float(x.min()), float(x.max())
+    scale = (hi - lo) / levels if hi > lo else 1.0
+    # Stochastic rounding keeps the quantized update unbiased.
+    q = np.floor((x - lo) / scale + rng.random(x.shape, dtype=np.float32))
+    q = np.clip(q, 0, levels).astype(dtype)
+    return q, np.float32(lo), np.float32(scale)
+
+def _dequantize(q, lo, scale):
+    return q.astype(np.float32) * scale + lo
+
+class NoCompression:
+    """
+    Sends the raw float32 delta (the uncompressed baseline).
+    """
+
+    name = "none"
+
+    def compress(self, delta, client_id=None):
+        return [{"values": d.astype(np.float32)} for d in delta]
+
+    def decompress(self, payload):
+        return [layer["values"] for layer in payload]
+
+class QuantizationCompressor:
+    """
+    Per-tensor uniform quantization (8-bit by default) with stochastic rounding.
+    """
+
+    name = "int8"
+
+    def __init__(self, bits=8, seed=0):
+        if not 1 <= bits <= 16:
+            raise ValueError("bits must be between 1 and 16")
+        self.bits = bits
+        self.rng = np.random.default_rng(seed)
+
+    def compress(self, delta, client_id=None):
+        payload = []
+        for d in delta:
+            q, lo, scale = _quantize(d.astype(np.float32), self.bits, self.rng)
+            payload.append({"q": q, "lo": lo, "scale": scale})
+        return payload
+
+    def decompress(self, payload):
+        return [_dequantize(layer["q"], layer["lo"], layer["scale"]) for layer in payload]
+
+    def get_state(self):
+        return {"rng": self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        self.rng.bit_generator.state = state["rng"]
+
+class TopKCompressor:
+    """
+    Keeps the largest-magnitude fraction of each tensor's entries.
+
+    With error feedback, the entries a client did not send are carried over
+    and added to its next update, so small but persistent changes are not lost.
+    Values can optionally be quantized as well.
+    """
+
+    name = "topk"
+
+    def __init__(self, fraction=0.01, error_feedback=True, quantize_bits=None, seed=0):
+        """
+        Args:
+            fraction (float): Fraction of entries kept per tensor.
+            error_feedback (bool): Accumulate unsent residuals per client.
+            quantize_bits (int): Optionally quantize the kept values.
+            seed (int): Seed for stochastic rounding.
+        """
+        if not 0 < fraction <= 1:
+            raise ValueError("fraction must be in (0, 1]")
+        self.fraction = fraction
+        self.error_feedback = error_feedback
+        self.quantize_bits = quantize_bits
+        self.rng = np.random.default_rng(seed)
+        self.residuals = {}
+        if quantize_bits:
+            self.name = f"topk+int{quantize_bits}"
+
+    def compress(self, delta, client_id=None):
+        residual = self.residuals.get(client_id) if self.error_feedback else None
+        payload, new_residual = [], []
+        for i, d in enumerate(delta):
+            corrected = d.astype(np.float32).ravel()
+            if residual is not None:
+                corrected = corrected + residual[i]
+            k = max(1, int(np.ceil(self.fraction * corrected.size)))
+            idx = np.argpartition(np.abs(corrected), -k)[-k:].astype(np.int32)
+            values = corrected[idx]
+            layer = {"idx": idx, "shape": np.asarray(d.shape, dtype=np.int32)}
+            if self.quantize_bits:
+                q, lo, scale = _quantize(values, self.quantize_bits, self.rng)
+                layer.update(q=q, lo=lo, scale=scale)
+                values = _dequantize(q, lo, scale)
+            else:
+                layer["values"] = values
+            payload.append(layer)
+            if self.error_feedback:
+                leftover = corrected.copy()
+                leftover[idx] -= values
+                new_residual.append(leftover)
+        if self.error_feedback:
+            self.residuals[client_id] = new_residual
+        return payload
+
+    def decompress(self, payload):
+        delta = []
+        for layer in payload:
+            shape = tuple(int(s) for s in layer["shape"])
+            dense = np.zeros(int(np.prod(shape)), dtype=np.float32)
+            values = layer["values"] if "values" in layer else _dequantize(layer["q"], layer["lo"], layer["scale"])
+            dense[layer["idx"]] = values
+            delta.append(dense.reshape(shape))
+        return delta
+
+    def get_state(self):
+        return {"residuals": self.residuals, "rng": self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        self.residuals = state["residuals"]
+        self.rng.bit_generator.state = state["rng"]
+
+COMPRESSORS = {
+    "none": NoCompression,
+    "int8": QuantizationCompressor,
+    "topk": TopKCompressor,
+    "topk+int8": lambda **kwargs: TopKCompressor(quantize_bits=8, **kwargs),
+}
+
+def make_compressor(spec="none", **kwargs):
+    """
+    Returns a compressor from a name in COMPRESSORS or passes an instance through.
+    """
+    if spec is None:
+        return NoCompression()
+    if not isinstance(spec, str):
+        return spec
+    if spec not in COMPRESSORS:
+        raise ValueError(f"Unsupported compressor '{spec}'. Choose from {list(COMPRESSORS)}.")
+    return COMPRESSORS[spec](**kwargs)
@@ -6,8 +6,7 @@ import json
 import csv
 import os
 from sklearn.metrics import classification_report, confusion_matrix
-import matplotlib.pyplot as plt
-import seaborn as sns
+from plot_reporter import default_reporter
 
 def log_metrics(metrics_dict, prefix=""):
     """
@@ -53,18 +52,12 @@ def display_classification_report(y_true, y_pred):
     print("\n=== Classification Report ===")
     print(classification_report(y_true, y_pred))
 
-def plot_confusion_matrix(y_true, y_pred, labels=None, title="Confusion Matrix"):
+def plot_confusion_matrix(y_true, y_pred, labels=None, title="Confusion Matrix", reporter=None):
     """
-    Plots a confusion matrix heatmap.
+    Renders a confusion matrix heatmap to the run directory.
     """
     cm = confusion_matrix(y_true, y_pred)
-    plt.figure(figsize=(5, 4))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', xticklabels=labels, yticklabels=labels)
-    plt.xlabel("Predicted")
-    plt.ylabel("Actual")
-    plt.title(title)
-    plt.tight_layout()
-    plt.show()
+    return (reporter or default_reporter()).confusion_matrix(cm, labels=labels, title=title)
 
 # Example usage for standalone testing
 if __name__ == "__main__":